@@ -2,69 +2,739 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def calculate_moving_averages(df, windows=[7, 30, 50]):
+from metrics import timed
+
+# Candidate sampling steps for build_price_panel when no frequency is given
+PANEL_FREQUENCIES = ['1min', '5min', '15min', '1h', '4h', '1D', '7D']
+
+def infer_panel_freq(price_data_dict):
+    """
+    Pick a common sampling step for several price histories
+
+    Args:
+        price_data_dict (dict): Dictionary with coin_id as keys and price DataFrames as values
+
+    Returns:
+        str: The entry of PANEL_FREQUENCIES closest (in log scale) to the
+            coarsest median spacing among the inputs
+    """
+    spacings = [
+        df.index.to_series().diff().median()
+        for df in price_data_dict.values() if len(df) > 1
+    ]
+    if not spacings:
+        return '1h'
+
+    target = np.log(max(spacings).total_seconds())
+    steps = [pd.Timedelta(f).total_seconds() for f in PANEL_FREQUENCIES]
+    return PANEL_FREQUENCIES[int(np.argmin([abs(np.log(s) - target) for s in steps]))]
+
+@timed('analysis.build_price_panel')
+def build_price_panel(price_data_dict, freq=None, dtype='float64', fill='ffill',
+                      limit=None, how='outer'):
+    """
+    Align per-coin price histories on one resampled time index
+
+    Args:
+        price_data_dict (dict): Dictionary with coin_id as keys and price DataFrames as values
+        freq (str): Resampling frequency of the common index (e.g. '5min', '1h', '1D';
+            default: infer_panel_freq)
+        dtype (str): 'float64' or 'float32'
+        fill (str): Gap handling - 'ffill' carries the last price forward,
+            'interpolate' fills linearly in time, None leaves gaps as NaN
+        limit (int): Maximum number of consecutive missing periods to fill
+        how (str): 'outer' spans the union of all histories (leading gaps stay
+            NaN), 'inner' only the range every coin covers
+
+    Returns:
+        pd.DataFrame: Price matrix with a DatetimeIndex and one column per coin
+    """
+    if freq is None:
+        freq = infer_panel_freq(price_data_dict)
+
+    series = {}
+    for coin_id, df in price_data_dict.items():
+        if not df.empty and 'price' in df.columns:
+            series[coin_id] = df['price'].resample(freq).last()
+
+    if not series:
+        return pd.DataFrame(dtype=dtype)
+
+    starts = [s.index[0] for s in series.values()]
+    ends = [s.index[-1] for s in series.values()]
+    if how == 'inner':
+        start, end = max(starts), min(ends)
+    else:
+        start, end = min(starts), max(ends)
+    if start > end:
+        return pd.DataFrame(columns=list(series), dtype=dtype)
+
+    index = pd.date_range(start, end, freq=freq, name='timestamp')
+    values = np.empty((len(index), len(series)), dtype=dtype)
+    for col, s in enumerate(series.values()):
+        values[:, col] = s.reindex(index).to_numpy(dtype=dtype, na_value=np.nan)
+
+    panel = pd.DataFrame(values, index=index, columns=list(series))
+
+    if fill == 'ffill':
+        panel = panel.ffill(limit=limit)
+    elif fill == 'interpolate':
+        panel = panel.interpolate(method='time', limit=limit, limit_area='inside')
+    elif fill is not None:
+        raise ValueError(f"Unknown fill method: {fill}")
+
+    return panel
+
+def _as_matrix(values):
+    arr = np.asarray(values, dtype=np.float64)
+    return arr.reshape(-1, 1) if arr.ndim == 1 else arr
+
+def _window_sums(values, window):
+    # Sum and count of the valid values in each trailing window, for every
+    # column at once, from cumulative sums (NaN counts as missing)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    csum = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(filled, axis=0, out=csum[1:])
+    ccount = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(valid, axis=0, out=ccount[1:])
+
+    lagged = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return csum[1:] - csum[lagged], ccount[1:] - ccount[lagged]
+
+def rolling_mean(values, window, min_periods=1):
+    """
+    Trailing moving average of every column of a (time x assets) matrix
+
+    Args:
+        values (np.ndarray): 1D series or 2D matrix, NaN marks missing values
+        window (int): Window size
+        min_periods (int): Minimum number of valid values per window
+
+    Returns:
+        np.ndarray: float64 matrix with the same shape as the input (2D)
+    """
+    values = _as_matrix(values)
+    # Work on deviations from each column's mean to keep cumulative sums small
+    offset = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else 0.0
+    sums, counts = _window_sums(values - offset, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = sums / counts + offset
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+def rolling_std(values, window, min_periods=1, ddof=1):
+    """
+    Trailing standard deviation of every column of a (time x assets) matrix
+
+    Args:
+        values (np.ndarray): 1D series or 2D matrix, NaN marks missing values
+        window (int): Window size
+        min_periods (int): Minimum number of valid values per window
+        ddof (int): Delta degrees of freedom
+
+    Returns:
+        np.ndarray: float64 matrix with the same shape as the input (2D)
+    """
+    values = _as_matrix(values)
+    offset = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else 0.0
+    centered = values - offset
+    sums, counts = _window_sums(centered, window)
+    squares, _ = _window_sums(centered * centered, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - sums * sums / counts) / (counts - ddof)
+    out = np.sqrt(np.maximum(variance, 0.0))
+    out[(counts < max(min_periods, 1)) | (counts <= ddof)] = np.nan
+    return out
+
+def infer_periods_per_year(index):
+    """
+    Infer the annualization factor from a time index
+
+    Args:
+        index (pd.Index): Sample times
+
+    Returns:
+        float: Number of median-sized steps in a 365-day year (365 if the
+            index is not a DatetimeIndex or is too short)
+    """
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return 365.0
+    step = pd.Series(index).diff().median().total_seconds()
+    return 365 * 86400 / step if step > 0 else 365.0
+
+def compute_returns(values):
+    """
+    Simple period-over-period returns of every column
+
+    Args:
+        values (np.ndarray): 1D series or 2D price matrix
+
+    Returns:
+        np.ndarray: Returns matrix; the first row is NaN
+    """
+    values = _as_matrix(values)
+    out = np.full(values.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[1:] = values[1:] / values[:-1] - 1
+    return out
+
+@timed('analysis.calculate_indicators')
+def calculate_indicators(prices, ma_windows=(7, 30, 50), vol_window=30, periods_per_year=None,
+                         dtype='float64'):
+    """
+    Compute moving averages, returns and volatility for many assets at once
+
+    Every indicator is evaluated for the whole (time x coins) matrix in a
+    single NumPy pass, with no Python loop over assets.
+
+    Args:
+        prices (pd.DataFrame): Price matrix with one column per coin
+            (see build_price_panel)
+        ma_windows (tuple): Moving-average window sizes
+        vol_window (int): Window size for volatility calculation
+        periods_per_year (float): Annualization factor for volatility
+            (default: inferred from the sampling interval of the index)
+        dtype (str): dtype of the indicator frames; 'float32' halves their
+            memory (computations still run in float64)
+
+    Returns:
+        dict: Indicator name ('price', 'MA_<window>', 'returns', 'volatility',
+            'volatility_annualized') -> pd.DataFrame shaped like prices
+
+    See chunked.compute_indicators_chunked for histories too long to hold
+    every indicator in memory.
+    """
+    values = _as_matrix(prices.to_numpy(dtype=np.float64, na_value=np.nan))
+    if periods_per_year is None:
+        periods_per_year = infer_periods_per_year(prices.index)
+
+    def frame(matrix):
+        return pd.DataFrame(matrix.astype(dtype, copy=False), index=prices.index, columns=prices.columns)
+
+    indicators = {'price': prices}
+    for window in ma_windows:
+        indicators[f'MA_{window}'] = frame(rolling_mean(values, window))
+
+    returns = compute_returns(values)
+    volatility = rolling_std(returns, vol_window)
+    indicators['returns'] = frame(returns)
+    indicators['volatility'] = frame(volatility)
+    indicators['volatility_annualized'] = frame(volatility * np.sqrt(periods_per_year))
+
+    return indicators
+
+def indicator_frame(indicators, coin_id):
+    """
+    Extract one coin's indicators in the per-coin column layout
+
+    Args:
+        indicators (dict): Output of calculate_indicators
+        coin_id (str): Column to extract
+
+    Returns:
+        pd.DataFrame: Frame with one column per indicator ('price', 'MA_7', ...),
+            starting at the coin's first valid price
+    """
+    df = pd.DataFrame({name: frame[coin_id] for name, frame in indicators.items()})
+    first_valid = df['price'].first_valid_index()
+    return df.loc[first_valid:] if first_valid is not None else df.iloc[0:0]
+
+@timed('analysis.calculate_moving_averages')
+def calculate_moving_averages(df, windows=[7, 30, 50], copy=True, dtype='float64'):
     """
     Calculate simple moving averages for price data
 
     Args:
         df (pd.DataFrame): Price data with 'price' column
         windows (list): List of window sizes for moving averages
+        copy (bool): Add the columns to a copy of df; False adds them to
+            df itself
+        dtype (str): dtype of the added columns ('float64' or 'float32')
 
     Returns:
         pd.DataFrame: DataFrame with moving averages added
     """
-    df_ma = df.copy()
+    df_ma = df.copy() if copy else df
+    prices = df_ma['price'].to_numpy(dtype=np.float64, na_value=np.nan)
 
     for window in windows:
-        df_ma[f'MA_{window}'] = df_ma['price'].rolling(window=window, min_periods=1).mean()
+        df_ma[f'MA_{window}'] = rolling_mean(prices, window)[:, 0].astype(dtype, copy=False)
 
     return df_ma
 
-def calculate_volatility(df, window=30):
+@timed('analysis.calculate_volatility')
+def calculate_volatility(df, window=30, periods_per_year=None, copy=True, dtype='float64'):
     """
     Calculate rolling volatility (standard deviation of returns)
 
+    For daily statistics pass daily closes, e.g. the 1d level of
+    data_fetch.get_ohlcv, rather than intraday prices.
+
     Args:
         df (pd.DataFrame): Price data with 'price' column
         window (int): Window size for volatility calculation
+        periods_per_year (float): Annualization factor (default: inferred
+            from the sampling interval of the index)
+        copy (bool): Add the columns to a copy of df; False adds them to
+            df itself
+        dtype (str): dtype of the added columns ('float64' or 'float32')
 
     Returns:
         pd.DataFrame: DataFrame with volatility added
     """
-    df_vol = df.copy()
+    df_vol = df.copy() if copy else df
 
     # Calculate returns
-    df_vol['returns'] = df_vol['price'].pct_change()
+    returns = compute_returns(df_vol['price'].to_numpy(dtype=np.float64, na_value=np.nan))
+    df_vol['returns'] = returns[:, 0].astype(dtype, copy=False)
 
     # Calculate rolling volatility
-    df_vol['volatility'] = df_vol['returns'].rolling(window=window, min_periods=1).std()
+    volatility = rolling_std(returns, window)[:, 0]
+    df_vol['volatility'] = volatility.astype(dtype, copy=False)
 
-    # Annualized volatility (assuming daily data)
-    df_vol['volatility_annualized'] = df_vol['volatility'] * np.sqrt(365)
+    # Annualized for the sampling interval of the data
+    if periods_per_year is None:
+        periods_per_year = infer_periods_per_year(df_vol.index)
+    df_vol['volatility_annualized'] = (volatility * np.sqrt(periods_per_year)).astype(dtype, copy=False)
 
     return df_vol
 
-def calculate_correlation_matrix(price_data_dict):
+def compute_log_returns(values):
+    """
+    Log returns of every column of a (time x assets) price matrix
+
+    Args:
+        values (np.ndarray): 1D series or 2D price matrix
+
+    Returns:
+        np.ndarray: Log-returns matrix; the first row is NaN
+    """
+    values = _as_matrix(values)
+    out = np.full(values.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[1:] = np.log(values[1:] / values[:-1])
+    return out
+
+def correlation_from_returns(returns, min_periods=2, block_size=256):
+    """
+    Pairwise-complete Pearson correlation of every pair of columns
+
+    The matrix is assembled from block x block matrix products over the
+    valid-value masks, so it scales to hundreds or thousands of assets
+    without Python loops over pairs and gives the same result as
+    DataFrame.corr() for data with gaps.
+
+    Args:
+        returns (np.ndarray): (time x assets) matrix, NaN marks missing values
+        min_periods (int): Minimum number of overlapping observations per pair
+        block_size (int): Number of assets per block
+
+    Returns:
+        np.ndarray: (assets x assets) correlation matrix
+    """
+    returns = _as_matrix(returns)
+    valid = ~np.isnan(returns)
+    centered = np.where(valid, returns - np.nan_to_num(np.nanmean(returns, axis=0)), 0.0)
+    mask = valid.astype(np.float64)
+    squares = centered * centered
+
+    n_assets = returns.shape[1]
+    corr = np.empty((n_assets, n_assets))
+    for i in range(0, n_assets, block_size):
+        bi = slice(i, i + block_size)
+        for j in range(i, n_assets, block_size):
+            bj = slice(j, j + block_size)
+
+            count = mask[:, bi].T @ mask[:, bj]
+            sum_x = centered[:, bi].T @ mask[:, bj]
+            sum_y = mask[:, bi].T @ centered[:, bj]
+            sum_xx = squares[:, bi].T @ mask[:, bj]
+            sum_yy = mask[:, bi].T @ squares[:, bj]
+            sum_xy = centered[:, bi].T @ centered[:, bj]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = sum_xy - sum_x * sum_y / count
+                var_x = sum_xx - sum_x * sum_x / count
+                var_y = sum_yy - sum_y * sum_y / count
+                block = cov / np.sqrt(var_x * var_y)
+            block[count < max(min_periods, 2)] = np.nan
+
+            corr[bi, bj] = block
+            corr[bj, bi] = block.T
+
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return corr
+
+def _as_price_panel(price_data):
+    if isinstance(price_data, pd.DataFrame):
+        return price_data
+    return build_price_panel(price_data)
+
+@timed('analysis.calculate_correlation_matrix')
+def calculate_correlation_matrix(price_data_dict, method='returns', min_periods=2,
+                                 block_size=256):
     """
     Calculate correlation matrix between different cryptocurrencies
 
     Args:
-        price_data_dict (dict): Dictionary with coin_id as keys and price DataFrames as values
+        price_data_dict (dict | pd.DataFrame): Dictionary with coin_id as keys and
+            price DataFrames as values, or an aligned price panel (see build_price_panel)
+        method (str): 'returns' correlates log returns, 'prices' correlates raw
+            price levels
+        min_periods (int): Minimum number of overlapping observations per pair
+        block_size (int): Number of assets per block of the matrix product
 
     Returns:
         pd.DataFrame: Correlation matrix
     """
-    # Combine all price data
-    combined_df = pd.DataFrame()
-
-    for coin_id, df in price_data_dict.items():
-        if not df.empty and 'price' in df.columns:
-            combined_df[coin_id] = df['price']
+    # Combine all price data on a common time index
+    combined_df = _as_price_panel(price_data_dict)
 
     if combined_df.empty:
         return pd.DataFrame()
 
+    values = combined_df.to_numpy(dtype=np.float64, na_value=np.nan)
+    if method == 'returns':
+        values = compute_log_returns(values)
+    elif method != 'prices':
+        raise ValueError(f"Unknown correlation method: {method}")
+
     # Calculate correlation matrix
-    correlation_matrix = combined_df.corr()
+    correlation_matrix = pd.DataFrame(
+        correlation_from_returns(values, min_periods, block_size),
+        index=combined_df.columns, columns=combined_df.columns
+    )
+
+    return correlation_matrix
+
+@timed('analysis.rolling_correlation')
+def rolling_correlation(price_data, window=30, against=None, min_periods=None,
+                        pair_block=2048):
+    """
+    Rolling correlation of log returns over a trailing window
+
+    Args:
+        price_data (dict | pd.DataFrame): Price histories or an aligned price panel
+        window (int): Window size in periods
+        against (str): Correlate every coin with this one (e.g. 'bitcoin');
+            by default every pair of coins is returned
+        min_periods (int): Minimum overlapping observations (default: window)
+        pair_block (int): Number of pairs evaluated per vectorized step
+
+    Returns:
+        pd.DataFrame: Correlation series, one column per coin (with against)
+            or per (coin_a, coin_b) pair
+    """
+    panel = _as_price_panel(price_data)
+    if panel.empty:
+        return pd.DataFrame()
+
+    returns = compute_log_returns(panel.to_numpy(dtype=np.float64, na_value=np.nan))
+    returns -= np.nan_to_num(np.nanmean(returns, axis=0))
+    columns = list(panel.columns)
+
+    if against is not None:
+        ref = columns.index(against)
+        left = np.full(len(columns), ref)
+        right = np.arange(len(columns))
+        labels = pd.Index(columns)
+    else:
+        left, right = np.triu_indices(len(columns), k=1)
+        labels = pd.MultiIndex.from_arrays(
+            [[columns[i] for i in left], [columns[j] for j in right]]
+        )
+
+    min_periods = window if min_periods is None else min_periods
+    out = np.empty((len(panel), len(left)))
+    for start in range(0, len(left), pair_block):
+        pairs = slice(start, start + pair_block)
+        x = returns[:, left[pairs]]
+        y = returns[:, right[pairs]]
+        both = ~(np.isnan(x) | np.isnan(y))
+        x = np.where(both, x, np.nan)
+        y = np.where(both, y, np.nan)
+
+        sum_x, count = _window_sums(x, window)
+        sum_y, _ = _window_sums(y, window)
+        sum_xx, _ = _window_sums(x * x, window)
+        sum_yy, _ = _window_sums(y * y, window)
+        sum_xy, _ = _window_sums(x * y, window)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sum_xy - sum_x * sum_y / count
+            var_x = sum_xx - sum_x * sum_x / count
+            var_y = sum_yy - sum_y * sum_y / count
+            block = cov / np.sqrt(var_x * var_y)
+        block[count < max(min_periods, 2)] = np.nan
+        out[:, pairs] = np.clip(block, -1.0, 1.0)
+
+    return pd.DataFrame(out, index=panel.index, columns=labels)
+
+class IncrementalCovariance:
+    """
+    Windowed covariance and correlation of log returns, updated per tick
+
+    Each new price row is turned into log returns and folded into a
+    running mean and co-moment matrix with rank-1 updates (and the oldest
+    row removed the same way), so a tick costs O(assets^2) instead of a
+    full recomputation over the window.
+    """
+
+    def __init__(self, columns, window=30, resync_every=None):
+        """
+        Args:
+            columns (list): Asset names, in the order prices are given
+            window (int): Number of most recent return rows kept
+            resync_every (int): Updates between exact recomputations
+                (default: 10 windows)
+        """
+        self.columns = list(columns)
+        self.window = window
+        self.resync_every = resync_every or 10 * window
+        n_assets = len(self.columns)
+        self._buffer = np.zeros((window, n_assets))
+        self._pos = 0
+        self._count = 0
+        self._mean = np.zeros(n_assets)
+        self._comoment = np.zeros((n_assets, n_assets))
+        self._last_prices = None
+        self._updates = 0
+
+    def _add(self, row):
+        self._count += 1
+        delta = row - self._mean
+        self._mean += delta / self._count
+        self._comoment += np.outer(delta, row - self._mean)
+
+    def _remove(self, row):
+        if self._count <= 1:
+            self._count = 0
+            self._mean[:] = 0.0
+            self._comoment[:] = 0.0
+            return
+        delta = row - self._mean
+        self._mean -= delta / (self._count - 1)
+        self._comoment -= np.outer(delta, row - self._mean)
+        self._count -= 1
+
+    def _resync(self):
+        rows = self._buffer[:self._count] if self._count < self.window else self._buffer
+        self._mean = rows.mean(axis=0)
+        centered = rows - self._mean
+        self._comoment = centered.T @ centered
+
+    def update(self, prices):
+        """
+        Consume one row of prices
+
+        Missing prices are treated as unchanged (zero return); fill gaps
+        upstream (see build_price_panel) for exact results.
+
+        Args:
+            prices (array-like): Latest price of each asset, in column order
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        last, self._last_prices = self._last_prices, prices
+        if last is None:
+            return
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            row = np.nan_to_num(np.log(prices / last), nan=0.0, posinf=0.0, neginf=0.0)
+
+        if self._count == self.window:
+            self._remove(self._buffer[self._pos].copy())
+        self._buffer[self._pos] = row
+        self._pos = (self._pos + 1) % self.window
+        self._add(row)
+
+        self._updates += 1
+        if self._updates % self.resync_every == 0:
+            self._resync()
+
+    def seed(self, panel):
+        """
+        Warm up the state from an aligned price panel
+
+        Args:
+            panel (pd.DataFrame): Price matrix with self.columns as columns
+        """
+        for prices in panel[self.columns].to_numpy(dtype=np.float64, na_value=np.nan):
+            self.update(prices)
+
+    def covariance(self):
+        """
+        Returns:
+            pd.DataFrame: Sample covariance of log returns over the window
+        """
+        values = np.full_like(self._comoment, np.nan)
+        if self._count > 1:
+            values = self._comoment / (self._count - 1)
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """
+        Returns:
+            pd.DataFrame: Correlation of log returns over the window
+        """
+        cov = self.covariance().to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(np.diag(cov))
+            corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer with O(1) running mean and variance
+
+    Values enter and leave the window with Welford-style add/remove updates.
+    NaN values occupy a slot but are skipped, like pandas rolling() with
+    min_periods=1. The running moments are rebuilt from the buffer every few
+    windows to keep floating-point drift from accumulating on long streams.
+    """
+
+    def __init__(self, window, resync_every=None):
+        """
+        Args:
+            window (int): Number of most recent values kept
+            resync_every (int): Updates between exact recomputations
+                (default: 10 windows)
+        """
+        self.window = window
+        self.resync_every = resync_every or 10 * window
+        self._buffer = np.full(window, np.nan)
+        self._pos = 0
+        self._filled = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def _add(self, value):
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+    def _remove(self, value):
+        if self._count <= 1:
+            self._count = 0
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / (self._count - 1)
+        self._m2 -= delta * (value - self._mean)
+        self._count -= 1
+
+    def _resync(self):
+        values = self._buffer[~np.isnan(self._buffer)]
+        self._count = len(values)
+        self._mean = values.mean() if self._count else 0.0
+        self._m2 = ((values - self._mean) ** 2).sum() if self._count else 0.0
+
+    def push(self, value):
+        """
+        Add a value, dropping the oldest one once the window is full
+
+        Args:
+            value (float): New observation (NaN counts as missing)
+        """
+        if self._filled == self.window:
+            old = self._buffer[self._pos]
+            if not np.isnan(old):
+                self._remove(old)
+        else:
+            self._filled += 1
+
+        self._buffer[self._pos] = value
+        self._pos = (self._pos + 1) % self.window
+        if not np.isnan(value):
+            self._add(value)
+
+        self._updates += 1
+        if self._updates % self.resync_every == 0:
+            self._resync()
+
+    @property
+    def mean(self):
+        """Mean of the valid values in the window (NaN if none)"""
+        return self._mean if self._count else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation of the window (NaN below two values)"""
+        if self._count < 2:
+            return np.nan
+        return np.sqrt(max(self._m2, 0.0) / (self._count - 1))
+
+class IncrementalIndicators:
+    """
+    Streaming counterpart of calculate_moving_averages and calculate_volatility
+
+    Each update() consumes one new price in O(1) and returns the same
+    MA_<window>, returns, volatility and volatility_annualized values the
+    batch functions produce for the last row of the full series (equal to
+    floating-point rounding, given the same periods_per_year).
+    """
+
+    def __init__(self, windows=(7, 30, 50), vol_window=30, periods_per_year=365):
+        """
+        Args:
+            windows (tuple): Moving-average window sizes
+            vol_window (int): Window size for volatility calculation
+            periods_per_year (float): Annualization factor for volatility
+        """
+        self.windows = list(windows)
+        self.vol_window = vol_window
+        self.periods_per_year = periods_per_year
+        self._ma = {window: RollingWindow(window) for window in self.windows}
+        self._returns = RollingWindow(vol_window)
+        self._last_price = np.nan
+        self.count = 0
+
+    def update(self, price, timestamp=None):
+        """
+        Consume one price tick
+
+        Args:
+            price (float): Latest price
+            timestamp: Optional timestamp echoed back in the result
+
+        Returns:
+            dict: Latest price, moving averages, return and volatility values
+        """
+        price = float(price)
+        returns = price / self._last_price - 1 if self.count else np.nan
+        self._last_price = price
+        self.count += 1
+
+        result = {'timestamp': timestamp, 'price': price}
+        for window, rolling in self._ma.items():
+            rolling.push(price)
+            result[f'MA_{window}'] = rolling.mean
+
+        self._returns.push(returns)
+        result['returns'] = returns
+        result['volatility'] = self._returns.std
+        result['volatility_annualized'] = result['volatility'] * np.sqrt(self.periods_per_year)
+
+        return result
+
+    def seed(self, df):
+        """
+        Warm up the state from existing history
+
+        Args:
+            df (pd.DataFrame): Price data with 'price' column
 
-    return correlation_matrix
\ No newline at end of file
+        Returns:
+            dict: Indicator values for the last row (None if df is empty)
+        """
+        result = None
+        for timestamp, price in zip(df.index, df['price'].to_numpy()):
+            result = self.update(price, timestamp)
+        return result
\ No newline at end of file
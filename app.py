@@ -1,17 +1,26 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from datetime import datetime, timedelta
-import sys
+from datetime import datetime
 import os
-
-# Import our custom modules
-from data_fetch import get_price_data, get_historical_prices, CoinGeckoAPI
-from analysis import (calculate_moving_averages, calculate_volatility, 
-                     calculate_correlation_matrix)
-from plots import (create_price_chart, create_volatility_chart, 
-                  create_correlation_heatmap)
-from sentiment import generate_mock_sentiment_data, get_sentiment_signal
+import uuid
+
+from startup import import_timer, mark_first_paint, startup_report
+
+# Import our custom modules; live mode, prefetching, sentiment and the
+# screener are imported the first time they are enabled
+with import_timer('analysis'):
+    from analysis import (calculate_indicators, indicator_frame, calculate_volatility,
+                         calculate_correlation_matrix, rolling_correlation, build_price_panel)
+with import_timer('data_fetch'):
+    from data_fetch import (get_price_data, get_historical_prices_bulk, get_cache_stats,
+                            get_scheduler_stats, get_coalescing_stats, get_market_history,
+                            get_ohlcv, scan_markets, get_exchange_rates)
+with import_timer('plots'):
+    from plots import (create_price_chart, create_candlestick_chart, create_volatility_chart,
+                      create_correlation_heatmap, create_indicator_chart, MAX_POINTS)
+from fx import BASE_CURRENCY, DISPLAY_CURRENCIES, currency_prefix
+from ohlcv import RESOLUTIONS
+from metrics import timed, stage_summary, render_prometheus, start_metrics_server
 
 # Page configuration
 st.set_page_config(
@@ -48,30 +57,287 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Coins offered in the sidebar
+CRYPTO_OPTIONS = {
+    "Bitcoin": "bitcoin",
+    "Ethereum": "ethereum", 
+    "Dogecoin": "dogecoin",
+    "Cardano": "cardano",
+    "Solana": "solana",
+    "Polkadot": "polkadot",
+    "Chainlink": "chainlink",
+    "Litecoin": "litecoin",
+    "Polygon": "polygon",
+    "Avalanche": "avalanche-2"
+}
+
+# Technical indicators offered in the sidebar:
+# label -> (indicator request, outputs charted, reference lines)
+TECHNICAL_INDICATORS = {
+    "RSI (14)": ("rsi_14", ["rsi_14"], (30, 70)),
+    "MACD (12, 26, 9)": ("macd", ["macd", "macd_signal", "macd_hist"], (0,)),
+    "Bollinger Bands (20, 2)": ("bollinger_20_2", ["price", "bollinger_20_2_upper",
+                                                   "bollinger_20_2_mid", "bollinger_20_2_lower"], ()),
+    "ATR (14)": ("atr_14", ["atr_14"], ()),
+    "Drawdown": ("drawdown", ["drawdown", "drawdown_max"], (0,))
+}
+
+# Keep every offered coin (plus $CRYPTO_DASHBOARD_WATCHLIST) warm in the background
+PREFETCH_ENABLED = os.environ.get("CRYPTO_DASHBOARD_PREFETCH", "1") != "0"
+
+# Maximum number of coins whose history is fetched concurrently
+MAX_CONCURRENT_FETCHES = int(os.environ.get("MAX_CONCURRENT_FETCHES", 4))
+
+# Serve Prometheus metrics at http://<host>:<port>/metrics when a port is given
+METRICS_PORT = os.environ.get("CRYPTO_DASHBOARD_METRICS_PORT")
+METRICS_HOST = os.environ.get("CRYPTO_DASHBOARD_METRICS_HOST", "127.0.0.1")
+
 # Initialize session state
 if 'last_update' not in st.session_state:
     st.session_state.last_update = datetime.now()
 
+def render_price_cards(market_df, prefix="$"):
+    """
+    Render the metric cards for the first three coins
+
+    Args:
+        market_df (pd.DataFrame): Market data from get_price_data
+        prefix (str): Currency prefix for amounts (see fx.currency_prefix)
+    """
+    st.subheader("Current Market Prices")
+
+    cols = st.columns(min(len(market_df), 3))
+    for i, (_, row) in enumerate(market_df.head(3).iterrows()):
+        col = cols[i % 3]
+
+        change_class = "positive" if row['price_change_percentage_24h'] > 0 else "negative"
+        change_symbol = "â†—" if row['price_change_percentage_24h'] > 0 else "â†˜"
+
+        with col:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>{row['name']} ({row['symbol'].upper()})</h3>
+                <h2>{prefix}{row['current_price']:,.2f}</h2>
+                <p class="{change_class}">
+                    {change_symbol} {row['price_change_percentage_24h']:.2f}% (24h)
+                </p>
+                <p>Market Cap: {prefix}{row['market_cap']/1e9:.2f}B</p>
+                <p>Volume: {prefix}{row['total_volume']/1e6:.1f}M</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+def render_live_prices(market_df, selected_ids, poller, prefix="$", interval=None, session=None):
+    """
+    Render metric cards and recent ticks from the background poller
+
+    Runs as a Streamlit fragment, so each refresh only re-executes this
+    function instead of the whole page.
+
+    Args:
+        market_df (pd.DataFrame): Market data from get_price_data (names, symbols, fallback values)
+        selected_ids (list): Selected coin IDs
+        poller (TickPoller): Shared tick poller (polling BASE_CURRENCY)
+        prefix (str): Currency prefix for amounts
+        interval (float): Polling interval this session asks for
+        session (str): Key of this session's interval request
+    """
+    # Keep this session's coins and interval request alive between full reruns
+    poller.watch(selected_ids, interval, session)
+
+    # Ticks are in the base currency; without a rate the cards keep market_df's values
+    rate = market_df.attrs.get('fx_rate')
+    live_df = market_df.copy()
+    for i, crypto_id in enumerate(live_df['id']):
+        tick = poller.latest(crypto_id) if rate is not None else None
+        if tick is None:
+            continue
+        live_df.loc[i, 'current_price'] = tick['price'] * rate
+        live_df.loc[i, 'price_change_percentage_24h'] = tick['price_change_percentage_24h']
+        live_df.loc[i, 'market_cap'] = tick['market_cap'] * rate
+        live_df.loc[i, 'total_volume'] = tick['total_volume'] * rate
+
+    render_price_cards(live_df, prefix)
+
+    tick_prices = pd.DataFrame({
+        crypto_id: poller.ticks(crypto_id)['price'] for crypto_id in selected_ids
+    })
+    if len(tick_prices) > 1:
+        # Rebase to 100 so coins with very different prices share one axis
+        st.caption(f"Live ticks since poller start (rebased to 100), "
+                   f"last poll {poller.last_poll:%H:%M:%S}")
+        st.line_chart(tick_prices / tick_prices.bfill().iloc[0] * 100, height=200)
+
+    # Streaming indicators, advanced by the poller on every tick
+    live_indicators = {crypto_id: poller.indicators(crypto_id) for crypto_id in selected_ids}
+    live_indicators = {crypto_id: values for crypto_id, values in live_indicators.items()
+                       if values is not None and pd.notna(values['volatility'])}
+    if rate is not None and live_indicators:
+        names = dict(zip(market_df['id'], market_df['name']))
+        st.dataframe(pd.DataFrame([{
+            "Coin": names.get(crypto_id, crypto_id),
+            "MA (7 ticks)": values['MA_7'] * rate,
+            "MA (30 ticks)": values['MA_30'] * rate,
+            "Volatility (annualized)": values['volatility_annualized']
+        } for crypto_id, values in live_indicators.items()]), hide_index=True,
+            use_container_width=True, column_config={
+                "MA (7 ticks)": st.column_config.NumberColumn(format=f"{prefix}%,.2f"),
+                "MA (30 ticks)": st.column_config.NumberColumn(format=f"{prefix}%,.2f"),
+                "Volatility (annualized)": st.column_config.NumberColumn(format="%.2f")
+            })
+
+    # Return correlation over the latest ticks, updated by the poller per tick
+    live_corr = poller.correlation(selected_ids)
+    if live_corr is not None:
+        st.plotly_chart(create_correlation_heatmap(
+            live_corr, f"Live Return Correlations (last {poller.corr_window} ticks)"),
+            use_container_width=True)
+
+def render_screener(vs_currency=BASE_CURRENCY, prefix="$"):
+    """
+    Render the market screener over the top coins by market cap
+
+    Filtering, sorting and paging run in pandas; only the visible page is
+    sent to the browser's virtualised grid.
+
+    Args:
+        vs_currency (str): Quote currency
+        prefix (str): Currency prefix for amounts
+    """
+    with import_timer('screener'):
+        from screener import screen_markets, paginate, format_screener, SCREENER_COLUMNS
+
+    controls = st.columns(4)
+    top_n = controls[0].selectbox("Coins to scan", [250, 500, 1000, 2500, 5000], index=2)
+    search = controls[1].text_input("Search", placeholder="Name, symbol or ID")
+    min_market_cap = controls[2].number_input(f"Min market cap ({prefix.strip()}M)", min_value=0.0,
+                                              value=0.0, step=10.0)
+    min_volume = controls[3].number_input(f"Min 24h volume ({prefix.strip()}M)", min_value=0.0,
+                                          value=0.0, step=1.0)
+
+    controls = st.columns(4)
+    change_range = controls[0].slider("24h change (%)", -100.0, 100.0, (-100.0, 100.0))
+    sort_labels = {label: column for column, label in SCREENER_COLUMNS.items()}
+    sort_label = controls[1].selectbox("Sort by", list(sort_labels))
+    ascending = controls[2].toggle("Ascending", value=sort_label in ("Rank", "Name", "Symbol"))
+    page_size = controls[3].selectbox("Rows per page", [50, 100, 250], index=1)
+
+    with st.spinner(f"Scanning top {top_n} coins..."):
+        markets = scan_markets(top_n, vs_currency)
+    if markets.empty:
+        st.error("Unable to fetch the market scan. Please try again later.")
+        return
+    if markets.attrs.get('stale'):
+        st.warning("Some pages could not be fetched; showing the last complete scan "
+                   "or a partial one.")
+
+    # Keep scanned coins available in the sidebar selection
+    st.session_state.scanned_coins = {
+        f"{name} ({symbol.upper()})": coin_id
+        for coin_id, name, symbol in markets[['id', 'name', 'symbol']].itertuples(index=False)
+        if coin_id not in CRYPTO_OPTIONS.values()
+    }
+
+    # Screen matching rows, keeping any filter that is left at its default off
+    full_range = change_range == (-100.0, 100.0)
+    screened = screen_markets(markets, search, min_market_cap * 1e6, min_volume * 1e6,
+                              None if full_range else change_range,
+                              sort_labels[sort_label], ascending)
+
+    n_pages = max(1, -(-len(screened) // page_size))
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1)
+    rows, page, n_pages = paginate(screened, page, page_size)
+
+    st.caption(f"{len(screened):,} of {len(markets):,} coins match, "
+               f"scanned at {markets.attrs['fetched_at']:%H:%M:%S}")
+    st.dataframe(
+        format_screener(rows),
+        hide_index=True,
+        use_container_width=True,
+        height=min(35 * (len(rows) + 1) + 3, 800),
+        column_config={
+            'Price': st.column_config.NumberColumn(format=f"{prefix}%.6g"),
+            '1h %': st.column_config.NumberColumn(format="%+.2f%%"),
+            '24h %': st.column_config.NumberColumn(format="%+.2f%%"),
+            '7d %': st.column_config.NumberColumn(format="%+.2f%%"),
+            'Market Cap': st.column_config.NumberColumn(format=f"{prefix}%,.0f"),
+            'Volume (24h)': st.column_config.NumberColumn(format=f"{prefix}%,.0f"),
+            'Volume / Cap': st.column_config.NumberColumn(format="%.3f")
+        }
+    )
+
+def bar_extremes(coin_ids, days, index, vs_currency=BASE_CURRENCY):
+    """
+    High and low matrices matching a price panel, from the OHLCV pyramid
+
+    Args:
+        coin_ids (list): Coin IDs (panel columns)
+        days (int): Number of days of history
+        index (pd.DatetimeIndex): Panel index
+        vs_currency (str): Quote currency
+
+    Returns:
+        tuple: (high, low) DataFrames, or (None, None) when the panel step
+            is not one of the pyramid resolutions
+    """
+    if len(index) < 2:
+        return None, None
+    step_ms = int((index[1] - index[0]) / pd.Timedelta(milliseconds=1))
+    resolution = next((res for res, step in RESOLUTIONS.items() if step == step_ms), None)
+    if resolution is None:
+        return None, None
+
+    bars = {coin_id: get_ohlcv(coin_id, days, resolution, vs_currency) for coin_id in coin_ids}
+    bars = {coin_id: df for coin_id, df in bars.items() if not df.empty}
+    high = pd.DataFrame({coin_id: df['high'] for coin_id, df in bars.items()}).reindex(index)
+    low = pd.DataFrame({coin_id: df['low'] for coin_id, df in bars.items()}).reindex(index)
+    return high, low
+
+def render_debug_panel():
+    """
+    Render per-stage timings and the Prometheus export in the sidebar
+    """
+    with st.sidebar.expander("Debug Metrics", expanded=True):
+        summary = pd.DataFrame(stage_summary())
+        if summary.empty:
+            st.caption("No stages recorded yet.")
+        else:
+            for column in ['total', 'mean', 'p50', 'p95']:
+                summary[column] = (summary[column] * 1000).round(1)
+            st.dataframe(summary.rename(columns={'total': 'total ms', 'mean': 'mean ms',
+                                                 'p50': 'p50 ms', 'p95': 'p95 ms'}),
+                         hide_index=True, use_container_width=True)
+
+        report = startup_report()
+        if report['first_paint'] is not None:
+            st.caption(f"Cold start: first paint {report['first_paint']:.2f}s after process start "
+                       f"(budget {report['budget']:.1f}s), "
+                       f"{report['import_total'] * 1000:.0f} ms importing "
+                       + ", ".join(f"{module} {seconds * 1000:.0f} ms"
+                                   for module, seconds in report['imports'].items()))
+
+        metrics_text = render_prometheus()
+        st.download_button("Download Prometheus metrics", metrics_text,
+                           file_name="metrics.prom", mime="text/plain")
+        if METRICS_PORT:
+            st.caption(f"Scrape endpoint: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
 def main():
+    if METRICS_PORT:
+        start_metrics_server(int(METRICS_PORT), METRICS_HOST)
+
+    if PREFETCH_ENABLED:
+        with import_timer('prefetch'):
+            from prefetch import get_prefetcher
+        get_prefetcher(CRYPTO_OPTIONS.values())
+
     # Header
     st.markdown('<h1 class="main-header">â‚¿ Crypto Market Dashboard</h1>', unsafe_allow_html=True)
 
     # Sidebar controls
     st.sidebar.title("Dashboard Controls")
 
-    # Cryptocurrency selection
-    crypto_options = {
-        "Bitcoin": "bitcoin",
-        "Ethereum": "ethereum", 
-        "Dogecoin": "dogecoin",
-        "Cardano": "cardano",
-        "Solana": "solana",
-        "Polkadot": "polkadot",
-        "Chainlink": "chainlink",
-        "Litecoin": "litecoin",
-        "Polygon": "polygon",
-        "Avalanche": "avalanche-2"
-    }
+    # Cryptocurrency selection; coins listed by the screener can be added too
+    crypto_options = dict(CRYPTO_OPTIONS, **st.session_state.get('scanned_coins', {}))
 
     selected_cryptos = st.sidebar.multiselect(
         "Select Cryptocurrencies",
@@ -87,12 +353,47 @@ def main():
         format_func=lambda x: f"{x} days"
     )
 
+    # Quote currency; other currencies than the base one are converted from
+    # base data with the exchange-rate table instead of being refetched
+    vs_currency = st.sidebar.selectbox(
+        "Currency",
+        options=list(dict.fromkeys([BASE_CURRENCY, *DISPLAY_CURRENCIES])),
+        format_func=str.upper
+    )
+    rates = get_exchange_rates() if vs_currency != BASE_CURRENCY else None
+    prefix = currency_prefix(vs_currency, rates)
+
     # Analysis options
     st.sidebar.subheader("Analysis Options")
     show_ma = st.sidebar.checkbox("Show Moving Averages", True)
     show_volatility = st.sidebar.checkbox("Show Volatility Analysis", True)
     show_correlation = st.sidebar.checkbox("Show Correlation Matrix", True)
     show_sentiment = st.sidebar.checkbox("Show Sentiment Analysis", False)
+    show_screener = st.sidebar.checkbox("Show Market Screener", False)
+
+    selected_technical = st.sidebar.multiselect("Technical Indicators",
+                                                list(TECHNICAL_INDICATORS), default=[])
+    chart_style = st.sidebar.radio("Price Chart Style", ["Line", "Candlestick"], horizontal=True)
+
+    # Chart rendering budget (points per trace sent to the browser)
+    max_points = st.sidebar.select_slider(
+        "Chart Detail",
+        options=[500, 1000, 2000, 5000, None],
+        value=MAX_POINTS,
+        format_func=lambda x: "All points" if x is None else f"{x:,} points"
+    )
+
+    # Live mode: background polling with partial refreshes
+    live_mode = st.sidebar.checkbox("Live Mode", False)
+    live_interval = st.sidebar.select_slider(
+        "Live Refresh Interval",
+        options=[5, 10, 15, 30, 60],
+        value=15,
+        format_func=lambda x: f"{x} s",
+        disabled=not live_mode
+    )
+
+    show_debug = st.sidebar.checkbox("Show Debug Metrics", False)
 
     # Refresh button
     if st.sidebar.button("Refresh Data"):
@@ -102,6 +403,18 @@ def main():
     # Last update time
     st.sidebar.write(f"Last updated: {st.session_state.last_update.strftime('%H:%M:%S')}")
 
+    cache_stats = get_cache_stats()
+    st.sidebar.caption(f"History cache: {cache_stats['hits']} hits / "
+                       f"{cache_stats['misses']} misses "
+                       f"({cache_stats['size']}/{cache_stats['maxsize']} entries)")
+
+    scheduler_stats = get_scheduler_stats()
+    coalescing_stats = get_coalescing_stats()
+    st.sidebar.caption(f"API queue: {scheduler_stats['queue_depth']} waiting, "
+                       f"avg wait {scheduler_stats['avg_wait']:.2f}s, "
+                       f"{scheduler_stats['throttled']} throttled, "
+                       f"{coalescing_stats['shared']} coalesced")
+
     if not selected_cryptos:
         st.warning("Please select at least one cryptocurrency to display data.")
         return
@@ -112,7 +425,7 @@ def main():
     # Fetch current market data
     with st.spinner("Loading market data..."):
         try:
-            market_df = get_price_data(selected_ids)
+            market_df = get_price_data(selected_ids, vs_currency=vs_currency)
 
             if market_df.empty:
                 st.error("Unable to fetch market data. Please try again later.")
@@ -122,122 +435,208 @@ def main():
             st.error(f"Error loading data: {str(e)}")
             return
 
-    # Display current prices
-    st.subheader("Current Market Prices")
+    if market_df.attrs.get('stale'):
+        st.warning(f"CoinGecko is unavailable; showing last known prices from "
+                   f"{market_df.attrs['fetched_at']:%H:%M:%S}.")
 
-    cols = st.columns(min(len(selected_cryptos), 3))
-    for i, (_, row) in enumerate(market_df.head(3).iterrows()):
-        col = cols[i % 3]
-
-        change_class = "positive" if row['price_change_percentage_24h'] > 0 else "negative"
-        change_symbol = "â†—" if row['price_change_percentage_24h'] > 0 else "â†˜"
-
-        with col:
-            st.markdown(f"""
-            <div class="metric-card">
-                <h3>{row['name']} ({row['symbol'].upper()})</h3>
-                <h2>${row['current_price']:,.2f}</h2>
-                <p class="{change_class}">
-                    {change_symbol} {row['price_change_percentage_24h']:.2f}% (24h)
-                </p>
-                <p>Market Cap: ${row['market_cap']/1e9:.2f}B</p>
-                <p>Volume: ${row['total_volume']/1e6:.1f}M</p>
-            </div>
-            """, unsafe_allow_html=True)
+    # Display current prices
+    if live_mode:
+        with import_timer('live'):
+            from live import get_poller
+        poller = get_poller()
+        session = st.session_state.setdefault('live_session', uuid.uuid4().hex)
+        poller.watch(selected_ids, live_interval, session)
+        poller.start()
+        # Only this fragment re-executes on every tick; the tabs below stay as they are
+        st.fragment(run_every=live_interval)(render_live_prices)(market_df, selected_ids, poller, prefix,
+                                                                  live_interval, session)
+    else:
+        render_price_cards(market_df, prefix)
+    mark_first_paint()
+
+    # Fetch historical data once per rerun and share it across all tabs
+    with st.spinner("Loading historical data..."):
+        history = get_historical_prices_bulk(selected_ids, date_range, vs_currency,
+                                             max_workers=MAX_CONCURRENT_FETCHES)
+
+    stale_history = [crypto_id for crypto_id, df in history.items() if df.attrs.get('stale')]
+    if stale_history:
+        st.warning(f"Showing cached history for {', '.join(stale_history)}; "
+                   f"the latest update could not be fetched.")
+
+    # Align all coins on one index and compute every indicator in a single pass
+    price_panel = build_price_panel(history)
+    indicators = calculate_indicators(price_panel) if not price_panel.empty else {}
+
+    # Every requested technical indicator for every coin in one call, sharing
+    # intermediates such as EMAs and rolling sums
+    technical = {}
+    if selected_technical and not price_panel.empty:
+        with import_timer('indicators'):
+            from indicators import compute_indicators
+        high, low = (bar_extremes(price_panel.columns, date_range, price_panel.index, vs_currency)
+                     if "ATR (14)" in selected_technical else (None, None))
+        technical = compute_indicators(
+            price_panel, [TECHNICAL_INDICATORS[label][0] for label in selected_technical],
+            high, low)
+        technical['price'] = price_panel
 
     # Create tabs for different analyses
-    tab1, tab2, tab3, tab4 = st.tabs(["Price Trends", "Volatility Analysis", "Correlation Matrix", "Market Summary"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Price Trends", "Volatility Analysis", "Correlation Matrix",
+                                            "Market Summary", "Market Screener"])
 
-    with tab1:
+    with tab1, timed('app.tab.price_trends'):
         st.subheader("Price Trends and Moving Averages")
-
-        # Fetch historical data for price trends
-        historical_data = {}
-        for crypto_id in selected_ids:
-            hist_df = get_historical_prices(crypto_id, date_range)
-            if not hist_df.empty:
-                if show_ma:
-                    hist_df = calculate_moving_averages(hist_df)
-                historical_data[crypto_id] = hist_df
-
-        if historical_data:
+        history_rate = next((df.attrs['fx_rate'] for df in history.values()
+                             if df.attrs.get('fx_rate') is not None), None)
+        if history_rate is not None:
+            st.caption(f"Past prices are converted from {BASE_CURRENCY.upper()} at the current rate "
+                       f"({history_rate:,.4g} {vs_currency.upper()} per {BASE_CURRENCY.upper()}), "
+                       f"not at historical exchange rates.")
+
+        if indicators:
             # Individual charts
-            for crypto_id, hist_df in historical_data.items():
+            for crypto_id in price_panel.columns:
+                hist_df = indicator_frame(indicators, crypto_id)
                 crypto_name = market_df[market_df['id'] == crypto_id]['name'].iloc[0]
-                fig = create_price_chart(hist_df, crypto_name, show_ma)
+                if chart_style == "Candlestick":
+                    # Bars come from the precomputed OHLCV pyramid at a resolution
+                    # that suits the range
+                    bars = get_ohlcv(crypto_id, date_range, vs_currency=vs_currency)
+                    fig = create_candlestick_chart(bars, crypto_name, hist_df if show_ma else None,
+                                                   max_points, currency=vs_currency)
+                else:
+                    fig = create_price_chart(hist_df, crypto_name, show_ma, max_points,
+                                             currency=vs_currency)
                 st.plotly_chart(fig, use_container_width=True)
 
-    with tab2:
+                if technical:
+                    technical_df = indicator_frame(technical, crypto_id)
+                    for label in selected_technical:
+                        _, columns, levels = TECHNICAL_INDICATORS[label]
+                        fig_ta = create_indicator_chart(technical_df, columns,
+                                                        f"{crypto_name} {label}", levels,
+                                                        max_points=max_points)
+                        st.plotly_chart(fig_ta, use_container_width=True)
+
+    with tab2, timed('app.tab.volatility'):
         if show_volatility:
             st.subheader("Volatility Analysis")
 
-            for crypto_id in selected_ids:
-                hist_df = get_historical_prices(crypto_id, date_range)
-                if not hist_df.empty:
-                    hist_df = calculate_volatility(hist_df)
-                    crypto_name = market_df[market_df['id'] == crypto_id]['name'].iloc[0]
-
-                    fig_vol = create_volatility_chart(hist_df, crypto_name)
-                    st.plotly_chart(fig_vol, use_container_width=True)
-
-                    # Display volatility statistics
-                    if 'volatility' in hist_df.columns:
-                        avg_vol = hist_df['volatility'].mean()
-                        current_vol = hist_df['volatility'].iloc[-1]
-                        st.write(f"**{crypto_name} Volatility Stats:**")
-                        st.write(f"- Current 30-day volatility: {current_vol:.4f}")
-                        st.write(f"- Average volatility: {avg_vol:.4f}")
+            for crypto_id in price_panel.columns:
+                hist_df = indicator_frame(indicators, crypto_id)
+                crypto_name = market_df[market_df['id'] == crypto_id]['name'].iloc[0]
 
-    with tab3:
+                fig_vol = create_volatility_chart(hist_df, crypto_name, max_points)
+                st.plotly_chart(fig_vol, use_container_width=True)
+
+                # Display volatility statistics from daily bars, whatever the
+                # sampling of the chart data
+                daily = get_ohlcv(crypto_id, date_range, '1d', vs_currency)
+                if len(daily) > 2:
+                    window = min(30, len(daily) - 1)
+                    daily_vol = calculate_volatility(daily[['close']].rename(columns={'close': 'price'}),
+                                                     window, periods_per_year=365)
+                    st.write(f"**{crypto_name} Volatility Stats:**")
+                    st.write(f"- Current {window}-day volatility: "
+                             f"{daily_vol['volatility'].iloc[-1]:.4f} "
+                             f"({daily_vol['volatility_annualized'].iloc[-1]:.1%} annualized)")
+                    st.write(f"- Average daily volatility: {daily_vol['volatility'].mean():.4f}")
+
+    with tab3, timed('app.tab.correlation'):
         if show_correlation and len(selected_ids) > 1:
-            st.subheader("Price Correlation Matrix")
-
-            # Fetch price data for correlation analysis
-            price_data = {}
-            for crypto_id in selected_ids:
-                hist_df = get_historical_prices(crypto_id, date_range)
-                if not hist_df.empty:
-                    price_data[crypto_id] = hist_df
+            st.subheader("Return Correlation Matrix")
 
-            if len(price_data) > 1:
-                corr_matrix = calculate_correlation_matrix(price_data)
+            if len(price_panel.columns) > 1:
+                corr_matrix = calculate_correlation_matrix(price_panel)
                 if not corr_matrix.empty:
                     fig_corr = create_correlation_heatmap(corr_matrix)
                     st.plotly_chart(fig_corr, use_container_width=True)
 
                     st.write("**Correlation Insights:**")
+                    st.write("- Correlations are computed on log returns, not price levels")
                     st.write("- Values close to 1 indicate strong positive correlation")
                     st.write("- Values close to -1 indicate strong negative correlation") 
                     st.write("- Values close to 0 indicate no correlation")
 
-    with tab4:
+                # How each coin's correlation with a reference coin moved over time
+                st.subheader("Rolling Return Correlation")
+                names = dict(zip(market_df['id'], market_df['name']))
+                against = st.selectbox("Rolling correlation against", list(price_panel.columns),
+                                       format_func=lambda crypto_id: names.get(crypto_id, crypto_id))
+                corr_window = st.slider("Rolling window (periods)", 5, 90, 30)
+                rolling = rolling_correlation(price_panel, corr_window, against=against)
+                rolling = rolling.drop(columns=against).rename(columns=names).dropna(how='all')
+                if not rolling.empty:
+                    st.line_chart(rolling, height=300)
+
+    with tab4, timed('app.tab.market_summary'):
         st.subheader("Market Summary")
 
-        # Summary statistics table
-        summary_data = []
-        for _, row in market_df.iterrows():
-            summary_data.append({
-                "Cryptocurrency": f"{row['name']} ({row['symbol'].upper()})",
-                "Current Price": f"${row['current_price']:,.2f}",
-                "24h Change": f"{row['price_change_percentage_24h']:+.2f}%",
-                "Market Cap": f"${row['market_cap']/1e9:.2f}B",
-                "Volume (24h)": f"${row['total_volume']/1e6:.1f}M",
-                "Market Rank": int(row['market_cap_rank'])
-            })
-
-        summary_df = pd.DataFrame(summary_data)
-        st.table(summary_df)
+        # Summary statistics table, built column-wise and formatted by the grid
+        summary_df = pd.DataFrame({
+            "Cryptocurrency": market_df['name'] + " (" + market_df['symbol'].str.upper() + ")",
+            "Current Price": market_df['current_price'],
+            "24h Change": market_df['price_change_percentage_24h'],
+            "Market Cap": market_df['market_cap_billions'],
+            "Volume (24h)": market_df['volume_millions'],
+            "Market Rank": market_df['market_cap_rank']
+        })
+        summary_df.attrs = {}
+        st.dataframe(summary_df, hide_index=True, use_container_width=True, column_config={
+            "Current Price": st.column_config.NumberColumn(format=f"{prefix}%,.2f"),
+            "24h Change": st.column_config.NumberColumn(format="%+.2f%%"),
+            "Market Cap": st.column_config.NumberColumn(format=f"{prefix}%.2fB"),
+            "Volume (24h)": st.column_config.NumberColumn(format=f"{prefix}%.1fM"),
+            "Market Rank": st.column_config.NumberColumn(format="%d")
+        })
+
+        # Intraday history recorded from market snapshots (no extra API calls)
+        history_fields = {"Price": "current_price", "Volume (24h)": "total_volume",
+                          "Market Cap": "market_cap"}
+        history_field = st.radio("Intraday History", list(history_fields), horizontal=True)
+        intraday = get_market_history(selected_ids, history_fields[history_field], vs_currency)
+        intraday_rate = intraday.attrs.get('fx_rate')
+        if len(intraday) > 1:
+            if history_field == "Price":
+                # Rebase to 100 so coins with very different prices share one axis
+                intraday = intraday / intraday.bfill().iloc[0] * 100
+            st.line_chart(intraday, height=250)
+            if intraday_rate is not None:
+                st.caption(f"Converted from {BASE_CURRENCY.upper()} snapshots at the current rate.")
+        elif vs_currency != BASE_CURRENCY and intraday_rate is None:
+            st.caption(f"Intraday history is recorded in {BASE_CURRENCY.upper()}; "
+                       f"switch to a fiat currency to see it.")
+        else:
+            st.caption("Intraday history builds up as market data is refreshed.")
 
         # Sentiment analysis (mock data)
         if show_sentiment:
             st.subheader("Sentiment Analysis")
-            st.info("Note: This is a demonstration using mock sentiment data. "
-                   "Real implementation requires Twitter API credentials.")
+            with import_timer('sentiment'):
+                from sentiment import (generate_mock_sentiment_data, get_sentiment_signal,
+                                       get_corpus_sentiment)
+
+            # Match posts by coin ID, name and cashtag
+            coin_keywords = {
+                row['name']: [row['id'], row['name'], f"${row['symbol']}"]
+                for _, row in market_df[market_df['id'].isin(selected_ids)].iterrows()
+            }
+            sentiment_window = st.radio("Sentiment Window", ['1h', '24h', '7d', 'all'],
+                                        index=1, horizontal=True)
+            with st.spinner("Scoring new posts..."):
+                corpus_sentiment = get_corpus_sentiment(coin_keywords, sentiment_window)
+            if corpus_sentiment is None:
+                st.info("Note: This is a demonstration using mock sentiment data. "
+                       "Set CRYPTO_DASHBOARD_SENTIMENT_CORPUS to score your own posts.")
 
             sentiment_cols = st.columns(len(selected_cryptos))
             for i, crypto_id in enumerate(selected_ids):
                 crypto_name = market_df[market_df['id'] == crypto_id]['name'].iloc[0]
-                sentiment_data = generate_mock_sentiment_data(crypto_name)
+                if corpus_sentiment is not None:
+                    sentiment_data = corpus_sentiment[crypto_name]
+                else:
+                    sentiment_data = generate_mock_sentiment_data(crypto_name)
                 signal_data = get_sentiment_signal(sentiment_data)
 
                 with sentiment_cols[i % len(sentiment_cols)]:
@@ -249,5 +648,15 @@ def main():
                     st.write(f"ðŸ“ˆ Signal: {signal_data['signal'].upper()}")
                     st.write(f"ðŸŽ¯ Confidence: {signal_data['confidence']:.1%}")
 
+    with tab5, timed('app.tab.market_screener'):
+        if show_screener:
+            st.subheader("Market Screener")
+            render_screener(vs_currency, prefix)
+        else:
+            st.info("Enable **Show Market Screener** in the sidebar to scan the top coins by market cap.")
+
+    if show_debug:
+        render_debug_panel()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
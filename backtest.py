@@ -0,0 +1,365 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import rolling_mean, rolling_std, compute_returns, infer_periods_per_year
+from metrics import timed
+
+# Position sizing schemes accepted by backtest()
+SIZING_METHODS = ('equal', 'signal', 'volatility')
+
+def ma_crossover_signals(prices, fast=7, slow=30, allow_short=False):
+    """
+    Long when the fast moving average is above the slow one
+
+    Args:
+        prices (pd.DataFrame): Price matrix with one column per coin
+        fast (int): Fast moving-average window
+        slow (int): Slow moving-average window
+        allow_short (bool): Go short (-1) instead of flat when fast < slow
+
+    Returns:
+        pd.DataFrame: Signals in {-1, 0, 1} shaped like prices (0 until
+            the slow average is defined)
+
+    Raises:
+        ValueError: If fast is not shorter than slow
+    """
+    if fast >= slow:
+        raise ValueError(f"Fast window ({fast}) must be shorter than slow window ({slow})")
+
+    values = prices.to_numpy(dtype=np.float64, na_value=np.nan)
+    fast_ma = rolling_mean(values, fast, min_periods=fast)
+    slow_ma = rolling_mean(values, slow, min_periods=slow)
+
+    with np.errstate(invalid='ignore'):
+        signals = np.where(fast_ma > slow_ma, 1.0, -1.0 if allow_short else 0.0)
+    signals[np.isnan(fast_ma) | np.isnan(slow_ma)] = 0.0
+    return pd.DataFrame(signals, index=prices.index, columns=prices.columns)
+
+def sentiment_signals(compound, positive_pct, compound_threshold=0.1, buy_positive=50,
+                      sell_positive=30, allow_short=False):
+    """
+    Vectorized form of get_sentiment_signal over time x coins panels
+
+    Buy when the average compound score is above compound_threshold and
+    more than buy_positive percent of posts are positive; sell when it is
+    below -compound_threshold and fewer than sell_positive percent are
+    positive; otherwise hold the previous position. The defaults
+    reproduce get_sentiment_signal.
+
+    Args:
+        compound (pd.DataFrame): Average compound score per period and coin
+        positive_pct (pd.DataFrame): Share of positive posts in percent
+        compound_threshold (float): Compound score needed for a buy/sell
+        buy_positive (float): Positive share needed for a buy
+        sell_positive (float): Positive share below which sells trigger
+        allow_short (bool): Go short (-1) on sell instead of flat
+
+    Returns:
+        pd.DataFrame: Signals in {-1, 0, 1}; periods without posts hold
+    """
+    compound, positive_pct = compound.align(positive_pct, join='outer')
+    c = compound.to_numpy(dtype=np.float64, na_value=np.nan)
+    p = positive_pct.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    with np.errstate(invalid='ignore'):
+        buy = (c > compound_threshold) & (p > buy_positive)
+        sell = (c < -compound_threshold) & (p < sell_positive)
+
+    # NaN marks "hold", forward-filled from the last buy or sell
+    events = np.full(c.shape, np.nan)
+    events[buy] = 1.0
+    events[sell] = -1.0 if allow_short else 0.0
+    signals = pd.DataFrame(events, index=compound.index, columns=compound.columns)
+    return signals.ffill().fillna(0.0)
+
+def combine_signals(signals, how='all'):
+    """
+    Combine several signal panels into one
+
+    Args:
+        signals (list): pd.DataFrame signal panels; aligned on the first one's
+            index with previous values carried forward
+        how (str): 'all' keeps a position only where every signal agrees,
+            'mean' averages them into a fractional position
+
+    Returns:
+        pd.DataFrame: Combined signals
+    """
+    base = signals[0]
+    aligned = [base] + [s.reindex(index=base.index, columns=base.columns, method='ffill')
+                        .fillna(0.0) for s in signals[1:]]
+    stacked = np.stack([s.to_numpy(dtype=np.float64) for s in aligned])
+
+    if how == 'all':
+        combined = np.where((stacked == stacked[0]).all(axis=0), stacked[0], 0.0)
+    elif how == 'mean':
+        combined = stacked.mean(axis=0)
+    else:
+        raise ValueError(f"Unknown combination method: {how}")
+    return pd.DataFrame(combined, index=base.index, columns=base.columns)
+
+def size_positions(signals, prices=None, sizing='equal', max_leverage=1.0, vol_window=30):
+    """
+    Turn signals into portfolio weights
+
+    Args:
+        signals (pd.DataFrame): Signals in [-1, 1], one column per coin
+        prices (pd.DataFrame): Prices, required for 'volatility' sizing
+        sizing (str): 'equal' gives every coin a fixed 1/n slice,
+            'signal' splits the capital across the coins with an active
+            signal, 'volatility' weights active coins by inverse volatility
+        max_leverage (float): Sum of absolute weights when fully invested
+        vol_window (int): Window for volatility sizing
+
+    Returns:
+        pd.DataFrame: Target weights shaped like signals
+    """
+    s = signals.to_numpy(dtype=np.float64, na_value=0.0)
+
+    if sizing == 'equal':
+        weights = s / max(s.shape[1], 1)
+    elif sizing in ('signal', 'volatility'):
+        raw = s
+        if sizing == 'volatility':
+            if prices is None:
+                raise ValueError("Volatility sizing needs prices")
+            returns = compute_returns(prices.to_numpy(dtype=np.float64, na_value=np.nan))
+            vol = rolling_std(returns, vol_window, min_periods=2)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                raw = np.where(vol > 0, s / vol, 0.0)
+            raw = np.nan_to_num(raw, nan=0.0, posinf=0.0, neginf=0.0)
+        gross = np.abs(raw).sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = np.where(gross > 0, raw / gross, 0.0)
+    else:
+        raise ValueError(f"Unknown sizing method: {sizing} (expected one of {SIZING_METHODS})")
+
+    return pd.DataFrame(weights * max_leverage, index=signals.index, columns=signals.columns)
+
+def performance_stats(returns, ppy=365.0, turnover=None):
+    """
+    Summary statistics for one or more return series
+
+    Args:
+        returns (np.ndarray | pd.Series | pd.DataFrame): Per-period net returns,
+            one column per strategy
+        ppy (float): Periods per year
+        turnover (np.ndarray): Per-period turnover matching returns
+
+    Returns:
+        pd.DataFrame: One row per column with total and annualized return,
+            annualized volatility, Sharpe ratio, max drawdown, win rate and
+            (if given) turnover
+    """
+    names = returns.columns if isinstance(returns, pd.DataFrame) else None
+    r = np.asarray(returns, dtype=np.float64)
+    if r.ndim == 1:
+        r = r.reshape(-1, 1)
+    r = np.nan_to_num(r, nan=0.0)
+    n = len(r)
+
+    equity = np.cumprod(1 + r, axis=0)
+    total = equity[-1] - 1 if n else np.zeros(r.shape[1])
+    years = n / ppy if ppy else 0.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if years > 0:
+            annual = np.where(total > -1, np.maximum(1 + total, 0.0) ** (1 / years) - 1, -1.0)
+        else:
+            annual = np.zeros(r.shape[1])
+        mean = r.mean(axis=0) if n else np.zeros(r.shape[1])
+        std = r.std(axis=0, ddof=1) if n > 1 else np.zeros(r.shape[1])
+        sharpe = np.where(std > 0, mean / std * np.sqrt(ppy), 0.0)
+        peaks = np.maximum.accumulate(np.vstack([np.ones((1, r.shape[1])), equity]), axis=0)
+        drawdown = (np.vstack([np.ones((1, r.shape[1])), equity]) / peaks - 1).min(axis=0)
+        active = r != 0
+        win_rate = np.where(active.sum(axis=0) > 0,
+                            (r > 0).sum(axis=0) / active.sum(axis=0), 0.0)
+
+    stats = pd.DataFrame({
+        'total_return': total,
+        'annual_return': annual,
+        'annual_volatility': std * np.sqrt(ppy),
+        'sharpe': sharpe,
+        'max_drawdown': drawdown,
+        'win_rate': win_rate
+    }, index=names)
+    if turnover is not None:
+        stats['turnover'] = np.asarray(turnover, dtype=np.float64).reshape(n, -1).sum(axis=0)
+    return stats
+
+@timed('backtest.backtest')
+def backtest(prices, signals, fee=0.001, sizing='equal', max_leverage=1.0, lag=1,
+             initial_capital=10000.0, vol_window=30):
+    """
+    Backtest signals over a price panel for many coins at once
+
+    A signal observed at the close of period t is traded at the close of
+    t + lag - 1 and earns the returns from period t + lag on: with the
+    default lag=1 the position is taken at the signal's own close, the
+    earliest fill that uses no future prices, and each extra lag delays it
+    one period. Weights are rebalanced every period; each change in weight
+    pays fee on the traded notional.
+
+    Args:
+        prices (pd.DataFrame): Price matrix with one column per coin
+            (see build_price_panel)
+        signals (pd.DataFrame): Signals in [-1, 1] aligned with prices
+        fee (float): Cost per unit of traded notional (0.001 = 10 bps)
+        sizing (str): Position sizing (see size_positions)
+        max_leverage (float): Sum of absolute weights when fully invested
+        lag (int): Periods between a signal and the first return it earns
+            (1: traded at the signal's close)
+        initial_capital (float): Starting equity
+        vol_window (int): Window for volatility sizing
+
+    Returns:
+        dict: 'equity' (pd.Series), 'returns' (pd.Series of net returns),
+            'weights' (pd.DataFrame of held weights), 'stats' (dict for the
+            portfolio) and 'asset_stats' (pd.DataFrame with each coin
+            traded on its own signal at full size)
+    """
+    signals = signals.reindex(index=prices.index, columns=prices.columns).fillna(0.0)
+    targets = size_positions(signals, prices, sizing, max_leverage, vol_window)
+
+    # Weights held during period t were decided lag periods earlier
+    held = targets.shift(lag).fillna(0.0).to_numpy()
+    asset_returns = np.nan_to_num(compute_returns(
+        prices.to_numpy(dtype=np.float64, na_value=np.nan)), nan=0.0)
+
+    trades = np.abs(np.diff(held, axis=0, prepend=0.0))
+    turnover = trades.sum(axis=1)
+    net = (held * asset_returns).sum(axis=1) - fee * turnover
+    ppy = infer_periods_per_year(prices.index)
+
+    stats = performance_stats(net, ppy, turnover).iloc[0].to_dict()
+    stats['trades'] = int((trades > 0).sum())
+    stats['exposure'] = float(np.abs(held).sum(axis=1).mean()) if len(held) else 0.0
+    stats['fees_paid'] = float(fee * turnover.sum())
+
+    # Every coin on its own, fully invested whenever its signal is on
+    solo = np.clip(signals.shift(lag).fillna(0.0).to_numpy(), -1.0, 1.0)
+    solo_trades = np.abs(np.diff(solo, axis=0, prepend=0.0))
+    solo_net = solo * asset_returns - fee * solo_trades
+    asset_stats = performance_stats(pd.DataFrame(solo_net, columns=prices.columns), ppy,
+                                    solo_trades)
+
+    return {
+        'equity': pd.Series(initial_capital * np.cumprod(1 + net), index=prices.index,
+                            name='equity'),
+        'returns': pd.Series(net, index=prices.index, name='returns'),
+        'weights': pd.DataFrame(held, index=prices.index, columns=prices.columns),
+        'stats': stats,
+        'asset_stats': asset_stats
+    }
+
+def _ma_strategy(prices, fast=7, slow=30, allow_short=False):
+    return ma_crossover_signals(prices, fast, slow, allow_short)
+
+def _sentiment_strategy(prices, compound, positive_pct, **params):
+    return sentiment_signals(compound, positive_pct, **params).reindex(
+        prices.index, method='ffill').fillna(0.0)
+
+# Named strategies usable by parameter_sweep: name -> (signal function, data keys)
+STRATEGIES = {
+    'ma_crossover': (_ma_strategy, ()),
+    'sentiment': (_sentiment_strategy, ('compound', 'positive_pct'))
+}
+
+# Per-process sweep state, set once by _init_sweep_worker
+_sweep = {}
+
+def _init_sweep_worker(prices, data, options):
+    _sweep['prices'] = prices
+    _sweep['data'] = data
+    _sweep['options'] = options
+
+def _run_combination(strategy, params):
+    signal_fn, data_keys = STRATEGIES[strategy]
+    prices = _sweep['prices']
+    try:
+        signals = signal_fn(prices, *[_sweep['data'][key] for key in data_keys], **params)
+    except ValueError:
+        return None
+    result = backtest(prices, signals, **_sweep['options'])
+    return dict(params, **result['stats'])
+
+@timed('backtest.parameter_sweep')
+def parameter_sweep(prices, strategy, grid, data=None, workers=None, **options):
+    """
+    Backtest every combination of a parameter grid in parallel
+
+    The price panel (and any extra data) is sent to each worker process
+    once, when it starts; tasks only carry their parameters.
+
+    Args:
+        prices (pd.DataFrame): Price matrix with one column per coin
+        strategy (str): Key of STRATEGIES ('ma_crossover' or 'sentiment')
+        grid (dict): Parameter name -> list of values for the signal function
+        data (dict): Extra panels the strategy needs (e.g. 'compound' and
+            'positive_pct' for 'sentiment')
+        workers (int): Worker processes (default: CPU count); 0 or 1 runs
+            in the calling process
+        **options: backtest() options (fee, sizing, max_leverage, lag, ...)
+
+    Returns:
+        pd.DataFrame: One row per valid combination with its parameters
+            and portfolio stats, best Sharpe ratio first
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy} (expected one of {list(STRATEGIES)})")
+
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    data = data or {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(combinations) <= 1:
+        _init_sweep_worker(prices, data, options)
+        rows = [_run_combination(strategy, params) for params in combinations]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(combinations)),
+                                 initializer=_init_sweep_worker,
+                                 initargs=(prices, data, options)) as executor:
+            chunksize = max(1, len(combinations) // (workers * 4))
+            rows = list(executor.map(_run_combination, itertools.repeat(strategy),
+                                     combinations, chunksize=chunksize))
+
+    results = pd.DataFrame([row for row in rows if row is not None])
+    if results.empty:
+        return results
+    return results.sort_values('sharpe', ascending=False, ignore_index=True)
+
+def main():
+    from data_fetch import get_price_panel
+
+    parser = argparse.ArgumentParser(description="Sweep MA crossover parameters over stored history")
+    parser.add_argument('--coins', nargs='+', default=['bitcoin', 'ethereum', 'solana'])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--fast', type=int, nargs='+', default=[5, 7, 10, 14, 20])
+    parser.add_argument('--slow', type=int, nargs='+', default=[20, 30, 50, 100])
+    parser.add_argument('--fee', type=float, default=0.001, help="cost per traded notional")
+    parser.add_argument('--sizing', choices=SIZING_METHODS, default='equal')
+    parser.add_argument('--short', action='store_true', help="allow short positions")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    prices = get_price_panel(args.coins, args.days, freq='1D')
+    if prices.empty:
+        print("No price history available.")
+        return
+
+    results = parameter_sweep(prices, 'ma_crossover',
+                              {'fast': args.fast, 'slow': args.slow, 'allow_short': [args.short]},
+                              workers=args.workers, fee=args.fee, sizing=args.sizing)
+    columns = ['fast', 'slow', 'total_return', 'sharpe', 'max_drawdown', 'trades', 'fees_paid']
+    print(results[columns].head(10).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
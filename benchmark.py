@@ -0,0 +1,212 @@
+# Pipeline benchmark: fetch -> analysis -> plots against the offline replay server
+#
+#   python benchmark.py                       full grid, results appended to .benchmarks/results.jsonl
+#   python benchmark.py --coins 1 10 --days 7 --repeat 1
+#   python benchmark.py --compare             show the change against the previous commit's results
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+# The data layer reads these on import: no rate limit and a throwaway store.
+# The data dir is always replaced, since every case clears the store.
+BENCH_DATA_DIR = tempfile.mkdtemp(prefix="crypto-bench-")
+os.environ.setdefault("COINGECKO_RATE_LIMIT", "1000000")
+os.environ["CRYPTO_DASHBOARD_DATA_DIR"] = BENCH_DATA_DIR
+
+import numpy as np
+import pandas as pd
+
+import data_fetch
+from analysis import (build_price_panel, calculate_indicators, calculate_correlation_matrix,
+                      indicator_frame)
+from plots import (create_price_chart, create_volatility_chart, create_correlation_heatmap,
+                   payload_report)
+from replay_server import ReplayServer
+
+DEFAULT_COINS = [1, 10, 50, 100, 500]
+DEFAULT_DAYS = [7, 30, 90, 365]
+RESULTS_PATH = os.path.join(".benchmarks", "results.jsonl")
+
+def git_commit():
+    """
+    Returns:
+        str: Short hash of HEAD (with '+dirty' for local changes), or 'unknown'
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                         stderr=subprocess.DEVNULL, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], stderr=subprocess.DEVNULL)
+        return commit + ('+dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run_case(server, n_coins, days, max_workers=8, chart_coins=None):
+    """
+    Time one fetch -> analysis -> plots pass
+
+    Args:
+        server (ReplayServer): Running replay server
+        n_coins (int): Number of coins
+        days (int): History window in days
+        max_workers (int): Concurrent fetches
+        chart_coins (int): Coins to build price/volatility charts for (default: all)
+
+    Returns:
+        dict: Seconds per stage plus data sizes
+    """
+    data_fetch.clear_cache()
+    store = data_fetch.get_price_store()
+    if store is not None:
+        # Never wipe a store the benchmark did not create
+        bench_dir = os.path.realpath(BENCH_DATA_DIR)
+        if os.path.commonpath([os.path.realpath(store.root), bench_dir]) != bench_dir:
+            raise RuntimeError(f"Refusing to clear {store.root}: not the benchmark's data dir")
+        store.clear()
+    coins = server.universe[:n_coins]
+    timings = {}
+
+    start = time.perf_counter()
+    history = data_fetch.get_historical_prices_bulk(coins, days, max_workers=max_workers)
+    timings['fetch'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel = build_price_panel(history)
+    timings['panel'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indicators = calculate_indicators(panel)
+    corr = calculate_correlation_matrix(panel)
+    timings['analysis'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    payload = 0
+    for coin in list(panel.columns)[:chart_coins]:
+        frame = indicator_frame(indicators, coin)
+        payload += len(create_price_chart(frame, coin).to_json())
+        payload += len(create_volatility_chart(frame, coin).to_json())
+    payload += len(create_correlation_heatmap(corr).to_json())
+    timings['plots'] = time.perf_counter() - start
+
+    # What downsampling saves on one price chart, outside the timed stages
+    # since it builds the chart again at full resolution
+    downsampling = None
+    if len(panel.columns):
+        coin = panel.columns[0]
+        downsampling = payload_report(create_price_chart, indicator_frame(indicators, coin), coin)
+
+    timings['total'] = sum(timings.values())
+    return {
+        'coins': n_coins,
+        'days': days,
+        'rows': len(panel),
+        'coins_fetched': len(history),
+        'payload_bytes': payload,
+        'downsampling': downsampling,
+        'seconds': {stage: round(value, 4) for stage, value in timings.items()}
+    }
+
+def load_results(path=RESULTS_PATH):
+    """
+    Returns:
+        list: Stored benchmark records, oldest first
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare(records, threshold=0.2):
+    """
+    Print the change between the two most recent commits with results
+
+    Args:
+        records (list): Stored benchmark records
+        threshold (float): Relative slowdown reported as a regression
+    """
+    commits = list(dict.fromkeys(record['commit'] for record in records))
+    if len(commits) < 2:
+        print("Need results from at least two commits to compare.")
+        return
+
+    previous, current = commits[-2], commits[-1]
+    latest = {}
+    for record in records:
+        latest[(record['commit'], record['coins'], record['days'])] = record
+
+    print(f"Comparing {previous} -> {current}")
+    print(f"{'coins':>6} {'days':>5} {'before':>9} {'after':>9} {'change':>8}")
+    for (commit, coins, days), record in sorted(latest.items(), key=lambda item: item[0][1:]):
+        if commit != current or (previous, coins, days) not in latest:
+            continue
+        before = latest[(previous, coins, days)]['seconds']['total']
+        after = record['seconds']['total']
+        change = after / before - 1 if before else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{coins:>6} {days:>5} {before:>8.3f}s {after:>8.3f}s {change:>+7.1%}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline offline")
+    parser.add_argument('--coins', type=int, nargs='+', default=DEFAULT_COINS)
+    parser.add_argument('--days', type=int, nargs='+', default=DEFAULT_DAYS)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case (best is kept)")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent fetches")
+    parser.add_argument('--latency', type=float, default=0.0, help="replay server latency (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="replay server error rate")
+    parser.add_argument('--chart-coins', type=int, default=None,
+                        help="limit per-coin charts to the first N coins")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--compare', action='store_true', help="compare stored results and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(load_results(args.output))
+        return
+
+    commit = git_commit()
+    environment = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine()
+    }
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+
+    with ReplayServer(latency=args.latency, error_rate=args.error_rate,
+                      universe_size=max(args.coins)) as server:
+        data_fetch.set_base_url(server.base_url)
+        data_fetch.get_api().backoff = 0.05
+
+        print(f"Benchmarking commit {commit} against {server.base_url}")
+        print(f"{'coins':>6} {'days':>5} {'fetch':>8} {'panel':>8} {'analysis':>9} {'plots':>8} "
+              f"{'total':>8} {'chart points':>15} {'saved':>6}")
+
+        for n_coins in args.coins:
+            for days in args.days:
+                runs = [run_case(server, n_coins, days, args.workers, args.chart_coins)
+                        for _ in range(args.repeat)]
+                best = min(runs, key=lambda run: run['seconds']['total'])
+                seconds = best['seconds']
+                downsampling = best['downsampling'] or {
+                    'points_before': 0, 'points_after': 0, 'reduction': 0.0}
+                points = f"{downsampling['points_before']}->{downsampling['points_after']}"
+                print(f"{n_coins:>6} {days:>5} {seconds['fetch']:>7.3f}s {seconds['panel']:>7.3f}s "
+                      f"{seconds['analysis']:>8.3f}s {seconds['plots']:>7.3f}s {seconds['total']:>7.3f}s "
+                      f"{points:>15} {downsampling['reduction']:>6.0%}")
+
+                record = dict(best, commit=commit, repeat=args.repeat, workers=args.workers,
+                              latency=args.latency, error_rate=args.error_rate,
+                              recorded_at=datetime.now().isoformat(timespec='seconds'),
+                              environment=environment)
+                with open(args.output, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+    print(f"Results appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+# Bounded-memory indicators for long histories, computed chunk by chunk into .npy files
+#
+#   python chunked.py --coins bitcoin ethereum solana --days 365 --step 5m --out analysis/
+#   python chunked.py --coins bitcoin --days 730 --indicators sma_50 rsi_14 macd --memory-budget 64
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from fx import BASE_CURRENCY
+from indicators import IndicatorGraph, parse_request, warmup_rows
+from metrics import timed
+from price_store import MS_PER_DAY
+
+# Peak memory allowed for the working set of one chunk (input rows, graph
+# intermediates and output conversion), in MiB
+MEMORY_BUDGET_MB = float(os.environ.get("CRYPTO_DASHBOARD_MEMORY_BUDGET_MB", 256))
+
+# Indicators computed when none are requested; the same outputs as
+# analysis.calculate_indicators
+DEFAULT_REQUESTS = ('sma_7', 'sma_30', 'sma_50', 'returns', 'volatility_30')
+
+# Grid steps accepted by the command line
+STEPS = {'1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000, '4h': 14_400_000,
+         '1d': MS_PER_DAY}
+
+_MANIFEST = 'manifest.json'
+
+_cell_bytes = {}
+
+class NpyRows:
+    """
+    Row-range reads and writes of a 2D .npy file through plain file I/O
+
+    Unlike a memory map, nothing read or written stays mapped into the
+    process, so resident memory does not grow with the file; a range of
+    rows of a C-ordered matrix is one contiguous run of bytes.
+    """
+
+    def __init__(self, path, shape=None, dtype=None):
+        """
+        Args:
+            path (str): .npy file
+            shape (tuple): Create (or overwrite) the file with this
+                (rows, columns) shape; open an existing file without it
+            dtype (str): dtype of a new file
+        """
+        if shape is not None:
+            with open(path, 'wb') as f:
+                np.lib.format.write_array_header_1_0(f, {
+                    'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                    'fortran_order': False,
+                    'shape': tuple(shape)
+                })
+                f.truncate(f.tell() + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self.path = path
+        self._file = open(path, 'r+b' if shape is not None else 'rb')
+        version = np.lib.format.read_magic(self._file)
+        if version == (1, 0):
+            self.shape, fortran_order, self.dtype = np.lib.format.read_array_header_1_0(self._file)
+        else:
+            self.shape, fortran_order, self.dtype = np.lib.format.read_array_header_2_0(self._file)
+        if len(self.shape) != 2 or fortran_order:
+            raise ValueError(f"{path} is not a C-ordered 2D array")
+        self.ndim = 2
+        self._offset = self._file.tell()
+        self._row_bytes = self.shape[1] * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, rows):
+        start, stop, _ = rows.indices(self.shape[0])
+        self._file.seek(self._offset + start * self._row_bytes)
+        count = max(stop - start, 0) * self.shape[1]
+        return np.fromfile(self._file, dtype=self.dtype, count=count).reshape(-1, self.shape[1])
+
+    def write(self, start, block):
+        """
+        Overwrite the rows from `start` on with a (rows x columns) block
+        """
+        self._file.seek(self._offset + start * self._row_bytes)
+        np.ascontiguousarray(block, dtype=self.dtype).tofile(self._file)
+
+    def close(self):
+        self._file.close()
+
+def _chunk_graph(prices, high, low, lo, start, end, state):
+    """
+    Indicator graph over rows [lo, end) of the inputs, resumed at row start
+    """
+    def window(values):
+        return None if values is None else pd.DataFrame(np.asarray(values[lo:end], dtype=np.float64))
+    return IndicatorGraph(window(prices), window(high), window(low), warmup=start - lo, state=state)
+
+def _output_names(requests):
+    sample = pd.DataFrame(np.ones((2, 1)))
+    return list(IndicatorGraph(sample, sample, sample).compute(requests))
+
+def _open_outputs(requests, out_dir, shape, dtype):
+    return {name: NpyRows(os.path.join(out_dir, f"{name}.npy"), shape, dtype)
+            for name in _output_names(requests)}
+
+def _write_chunk(graph, requests, outputs, start):
+    # Write every output's rows after the warmup to its file
+    for name, frame in graph.compute(requests).items():
+        outputs[name].write(start, frame.to_numpy()[graph.warmup:])
+
+def bytes_per_cell(requests, dtype='float32', with_high_low=False, rows=2048, columns=8):
+    """
+    Measure the peak memory one (row, coin) cell of a chunk costs
+
+    A random-walk sample is run through the same graph and output
+    conversion as a real chunk under tracemalloc; the peak includes the
+    float64 input copy, every graph intermediate and NumPy/pandas
+    temporaries. Results are cached per request set.
+
+    Args:
+        requests (list): Indicator requests (see indicators.parse_request)
+        dtype (str): Output dtype ('float32' or 'float64')
+        with_high_low (bool): Whether bar highs and lows are passed (ATR)
+        rows (int): Sample rows
+        columns (int): Sample coins
+
+    Returns:
+        float: Peak bytes per cell
+    """
+    key = (tuple(requests), np.dtype(dtype).name, with_high_low)
+    if key not in _cell_bytes:
+        rng = np.random.default_rng(0)
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, columns)), axis=0))
+        high = low = None
+        if with_high_low:
+            high, low = prices * 1.01, prices * 0.99
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            outputs = _open_outputs(requests, out_dir, prices.shape, dtype)
+            # Nest inside an outer tracemalloc session instead of ending it
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                graph = _chunk_graph(prices, high, low, 0, 0, rows, None)
+                _write_chunk(graph, requests, outputs, 0)
+                del graph
+                peak = tracemalloc.get_traced_memory()[1] - before
+            finally:
+                if not tracing:
+                    tracemalloc.stop()
+                for output in outputs.values():
+                    output.close()
+        _cell_bytes[key] = peak / (rows * columns)
+    return _cell_bytes[key]
+
+def plan_chunk_rows(n_columns, requests, dtype='float32', memory_budget_mb=None, with_high_low=False):
+    """
+    Largest chunk that keeps one chunk's working set within the memory budget
+
+    Args:
+        n_columns (int): Number of coins
+        requests (list): Indicator requests
+        dtype (str): Output dtype
+        memory_budget_mb (float): Budget in MiB (default: MEMORY_BUDGET_MB)
+        with_high_low (bool): Whether bar highs and lows are passed
+
+    Returns:
+        int: Rows per chunk, not counting the warmup rows shared with the
+            previous chunk
+
+    Raises:
+        ValueError: If not even the warmup plus one row fits in the budget
+    """
+    budget = (MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb) * 2 ** 20
+    cell = bytes_per_cell(requests, dtype, with_high_low)
+    warmup = warmup_rows(requests)
+    rows = int(budget // (cell * max(n_columns, 1))) - warmup
+    if rows < 1:
+        needed = cell * max(n_columns, 1) * (warmup + 1) / 2 ** 20
+        raise ValueError(f"A memory budget of {budget / 2 ** 20:.1f} MiB is too small for "
+                         f"{n_columns} coins and {list(requests)}; at least {needed:.1f} MiB is needed")
+    return rows
+
+class ChunkedResult:
+    """
+    Indicator matrices written by compute_indicators_chunked
+
+    Every output is a (time x coins) .npy file in `out_dir`, opened
+    memory-mapped, so reading a window or one coin only touches those
+    pages. A manifest next to them records the coins and the time index.
+    """
+
+    def __init__(self, out_dir):
+        """
+        Args:
+            out_dir (str): Directory written by compute_indicators_chunked
+        """
+        with open(os.path.join(out_dir, _MANIFEST)) as f:
+            manifest = json.load(f)
+        self.out_dir = out_dir
+        self.columns = manifest['columns']
+        self.names = manifest['names']
+        self.dtype = manifest['dtype']
+        self.chunk_rows = manifest['chunk_rows']
+        timestamps = np.load(os.path.join(out_dir, 'index.npy'), mmap_mode='r')
+        self.index = pd.to_datetime(np.asarray(timestamps), unit='ms') if manifest['datetime'] else None
+        self.arrays = {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode='r')
+                       for name in self.names}
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def _rows(self, start, end):
+        # Row positions pass through; timestamps are looked up in the index
+        def position(value, side):
+            if value is None or isinstance(value, (int, np.integer)):
+                return value
+            return int(self.index.searchsorted(pd.Timestamp(value), side=side))
+        return slice(position(start, 'left'), position(end, 'right'))
+
+    def _index(self, rows):
+        return self.index[rows] if self.index is not None else pd.RangeIndex(len(self))[rows]
+
+    def frame(self, name, start=None, end=None):
+        """
+        Read one output for every coin within a time range
+
+        Args:
+            name (str): Output name (see IndicatorGraph.compute)
+            start: First row (int) or timestamp (inclusive)
+            end: End row (int, exclusive) or last timestamp (inclusive)
+
+        Returns:
+            pd.DataFrame: (time x coins) frame
+        """
+        rows = self._rows(start, end)
+        return pd.DataFrame(np.asarray(self.arrays[name][rows]), index=self._index(rows),
+                            columns=self.columns)
+
+    def coin_frame(self, coin_id, names=None, start=None, end=None):
+        """
+        Read one coin's outputs as columns
+
+        Args:
+            coin_id (str): Coin to extract
+            names (list): Outputs to include (default: all)
+            start: First row (int) or timestamp (inclusive)
+            end: End row (int, exclusive) or last timestamp (inclusive)
+
+        Returns:
+            pd.DataFrame: Frame with one column per output
+        """
+        col = self.columns.index(coin_id)
+        rows = self._rows(start, end)
+        return pd.DataFrame({name: np.asarray(self.arrays[name][rows, col])
+                             for name in (names or self.names)}, index=self._index(rows))
+
+@timed('chunked.compute_indicators_chunked')
+def compute_indicators_chunked(prices, requests=DEFAULT_REQUESTS, out_dir='analysis', index=None,
+                               columns=None, high=None, low=None, dtype='float32',
+                               memory_budget_mb=None, chunk_rows=None):
+    """
+    Compute indicators over a long price matrix in bounded memory
+
+    The rows are processed in chunks that overlap the previous chunk by the
+    longest lookback of the requested rolling windows; EMAs and running
+    extremes resume from the state carried over from the previous chunk,
+    so the output matches indicators.compute_indicators on the whole
+    matrix. Each chunk is appended to the output .npy files with plain
+    file writes, so neither the inputs nor the outputs are ever held in
+    memory in full.
+
+    Args:
+        prices: (time x coins) close prices: a DataFrame, an array, or the
+            path of a .npy file such as build_price_matrix writes (read one
+            chunk at a time)
+        requests (list): Indicator requests (see indicators.INDICATORS)
+        out_dir (str): Directory for the output .npy files and manifest
+        index: Row timestamps, a DatetimeIndex or an array of ms since epoch
+            (default: the DataFrame's index, or the index.npy next to a
+            .npy input); outputs are indexed by row without one
+        columns (list): Coin IDs (default: the DataFrame's columns or
+            'coin_<n>')
+        high: Optional bar highs shaped like prices (for ATR)
+        low: Optional bar lows shaped like prices (for ATR)
+        dtype (str): Output dtype, 'float32' (half the disk and page cache)
+            or 'float64'
+        memory_budget_mb (float): Peak working memory per chunk in MiB
+            (default: MEMORY_BUDGET_MB)
+        chunk_rows (int): Rows per chunk (default: the most that fit in
+            the memory budget, see plan_chunk_rows)
+
+    Returns:
+        ChunkedResult: The written outputs, memory-mapped
+    """
+    if isinstance(prices, str):
+        sidecar = os.path.join(os.path.dirname(prices), 'index.npy')
+        if index is None and os.path.exists(sidecar):
+            index = np.load(sidecar)
+        prices = NpyRows(prices)
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame()
+    if isinstance(prices, pd.DataFrame):
+        index = prices.index if index is None else index
+        columns = list(prices.columns) if columns is None else columns
+        prices = prices.to_numpy()
+    if isinstance(high, pd.DataFrame):
+        high = high.to_numpy()
+    if isinstance(low, pd.DataFrame):
+        low = low.to_numpy()
+    if prices.ndim == 1:
+        prices = prices.reshape(-1, 1)
+
+    n_rows, n_columns = prices.shape
+    columns = [str(c) for c in columns] if columns is not None else [f"coin_{i}" for i in range(n_columns)]
+    requests = list(requests)
+    for request in requests:
+        parse_request(request)
+    warmup = warmup_rows(requests)
+    if chunk_rows is None:
+        chunk_rows = plan_chunk_rows(n_columns, requests, dtype, memory_budget_mb,
+                                     high is not None and low is not None)
+
+    os.makedirs(out_dir, exist_ok=True)
+    if isinstance(index, pd.DatetimeIndex):
+        timestamps, datetime_index = index.values.astype('datetime64[ms]').astype(np.int64), True
+    elif isinstance(index, np.ndarray):
+        timestamps, datetime_index = index.astype(np.int64), True
+    else:
+        timestamps, datetime_index = np.arange(n_rows, dtype=np.int64), False
+    np.save(os.path.join(out_dir, 'index.npy'), timestamps)
+
+    outputs = _open_outputs(requests, out_dir, (n_rows, n_columns), dtype)
+    try:
+        state = None
+        for start in range(0, n_rows, chunk_rows):
+            end = min(start + chunk_rows, n_rows)
+            graph = _chunk_graph(prices, high, low, max(start - warmup, 0), start, end, state)
+            _write_chunk(graph, requests, outputs, start)
+            state = graph.carry()
+            del graph
+    finally:
+        for output in outputs.values():
+            output.close()
+        if isinstance(prices, NpyRows):
+            prices.close()
+
+    with open(os.path.join(out_dir, _MANIFEST + '.tmp'), 'w') as f:
+        json.dump({'columns': columns, 'names': list(outputs), 'dtype': np.dtype(dtype).name,
+                   'requests': requests, 'chunk_rows': chunk_rows, 'warmup': warmup,
+                   'datetime': datetime_index}, f)
+    os.replace(os.path.join(out_dir, _MANIFEST + '.tmp'), os.path.join(out_dir, _MANIFEST))
+    return ChunkedResult(out_dir)
+
+def _last_in_bucket(timestamps, prices, first_ms, step_ms, start, end):
+    # Positions (relative to row `start` of the grid) and values of the last
+    # finite tick in each grid step within rows [start, end)
+    lo = np.searchsorted(timestamps, first_ms + start * step_ms, side='left')
+    hi = np.searchsorted(timestamps, first_ms + end * step_ms, side='left')
+    ticks = np.asarray(timestamps[lo:hi])
+    values = np.asarray(prices[lo:hi])
+    finite = np.isfinite(values)
+    ticks, values = ticks[finite], values[finite]
+    rows = ((ticks - first_ms) // step_ms).astype(np.int64) - start
+    last = np.append(rows[1:] != rows[:-1], True) if len(rows) else np.zeros(0, dtype=bool)
+    return rows[last], values[last]
+
+@timed('chunked.build_price_matrix')
+def build_price_matrix(coin_ids, start_ms, end_ms, step_ms, path, store=None, vs_currency=BASE_CURRENCY,
+                       dtype='float32', memory_budget_mb=None):
+    """
+    Align stored price histories on a regular grid, written straight to disk
+
+    The out-of-core counterpart of analysis.build_price_panel with
+    fill='ffill': each grid step takes the last price within it and gaps
+    carry the previous price forward, also across chunk edges. The raw
+    histories are read memory-mapped from the price store.
+
+    Args:
+        coin_ids (list): Coins, one column each
+        start_ms (int): First grid step (ms since epoch, rounded down to step_ms)
+        end_ms (int): Last grid step (ms since epoch, inclusive)
+        step_ms (int): Grid step in milliseconds
+        path (str): Output .npy file; the grid timestamps are saved as
+            index.npy next to it
+        store (PriceStore): Source of the raw histories (default:
+            data_fetch.get_price_store())
+        vs_currency (str): Quote currency
+        dtype (str): 'float32' or 'float64'
+        memory_budget_mb (float): Working memory in MiB (default:
+            MEMORY_BUDGET_MB); sets the grid rows filled per step
+
+    Returns:
+        np.ndarray: Memory-mapped (steps x coins) matrix, NaN before a
+            coin's first stored price
+    """
+    if store is None:
+        from data_fetch import get_price_store
+        store = get_price_store()
+        if store is None:
+            raise ValueError("No price store available")
+
+    first_ms = start_ms // step_ms * step_ms
+    n_rows = max(int((end_ms - first_ms) // step_ms) + 1, 0)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(os.path.join(os.path.dirname(os.path.abspath(path)), 'index.npy'),
+            first_ms + np.arange(n_rows, dtype=np.int64) * step_ms)
+    matrix = NpyRows(path, (n_rows, len(coin_ids)), dtype)
+
+    # Four float64 (rows x coins) temporaries per block
+    budget = (MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb) * 2 ** 20
+    chunk_rows = max(int(budget // (32 * max(len(coin_ids), 1))), 1)
+
+    histories = [store.load(coin_id, vs_currency) for coin_id in coin_ids]
+    for coin_id, rows in zip(coin_ids, histories):
+        if not len(rows):
+            print(f"No stored history for {coin_id}; its column stays empty")
+    carried = np.full(len(coin_ids), np.nan)
+    for start in range(0, n_rows, chunk_rows):
+        end = min(start + chunk_rows, n_rows)
+        block = np.full((end - start, len(coin_ids)), np.nan)
+        for col, rows in enumerate(histories):
+            if len(rows):
+                positions, values = _last_in_bucket(rows[:, 0], rows[:, 1], first_ms, step_ms, start, end)
+                block[positions, col] = values
+
+        # Forward fill within the block, starting from the previous block's last prices
+        latest = np.maximum.accumulate(
+            np.where(np.isnan(block), -1, np.arange(len(block))[:, np.newaxis]), axis=0)
+        filled = np.take_along_axis(block, np.maximum(latest, 0), axis=0)
+        block = np.where(latest >= 0, filled, carried)
+        carried = block[-1]
+
+        matrix.write(start, block)
+    matrix.close()
+    return np.load(path, mmap_mode='r')
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute indicators for long stored histories in bounded memory")
+    parser.add_argument('--coins', nargs='+', required=True, help="coin IDs in the local price store")
+    parser.add_argument('--days', type=float, default=365)
+    parser.add_argument('--step', choices=list(STEPS), default='5m', help="grid step (default: %(default)s)")
+    parser.add_argument('--indicators', nargs='+', default=list(DEFAULT_REQUESTS),
+                        help="indicator requests, e.g. sma_50 rsi_14 macd (default: %(default)s)")
+    parser.add_argument('--out', default='analysis', help="output directory (default: %(default)s)")
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float32')
+    parser.add_argument('--memory-budget', type=float, default=MEMORY_BUDGET_MB,
+                        help="MiB of working memory per chunk (default: %(default)s)")
+    parser.add_argument('--vs-currency', default=BASE_CURRENCY)
+    args = parser.parse_args()
+
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - int(args.days * MS_PER_DAY)
+    step_ms = STEPS[args.step]
+    started = time.perf_counter()
+    prices_path = os.path.join(args.out, 'prices.npy')
+    build_price_matrix(args.coins, start_ms, end_ms, step_ms, prices_path, vs_currency=args.vs_currency,
+                       dtype=args.dtype, memory_budget_mb=args.memory_budget)
+    result = compute_indicators_chunked(prices_path, args.indicators, args.out, columns=args.coins,
+                                        dtype=args.dtype, memory_budget_mb=args.memory_budget)
+    print(f"{len(result)} rows x {len(result.columns)} coins, {len(result.names)} outputs "
+          f"in chunks of {result.chunk_rows} rows -> {args.out} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+if __name__ == "__main__":
+    main()
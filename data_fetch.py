@@ -1,124 +1,1168 @@
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import os
+import random
+import re
+import threading
 import time
 
-class CoinGeckoAPI:
+from analysis import build_price_panel
+from fx import (BASE_CURRENCY, BAR_MONEY_COLUMNS, HISTORY_MONEY_COLUMNS, MARKET_MONEY_COLUMNS,
+                RateTable, convert_frame)
+from metrics import get_registry, timed, BYTES_BUCKETS
+from ohlcv import BarStore, RESOLUTIONS, aggregate_ticks, bars_to_frame, resolution_for
+from price_store import (PriceStore, array_to_chart, chart_to_array, chart_step_ms, default_store_dir,
+                         MS_PER_DAY)
+from rate_limit import RequestScheduler, INTERACTIVE
+from snapshot_store import SnapshotStore, SNAPSHOT_COLUMNS
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiry and LRU eviction
+
+    A single instance lives at module level, so entries are shared across
+    dashboard tabs, Streamlit reruns and browser sessions served by the
+    same process. Expired entries are kept until evicted so they can still
+    be served as stale data when the API is unavailable.
+    """
+
+    def __init__(self, maxsize=128, ttl=300):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept before evicting
+                the least recently used one
+            ttl (float): Seconds an entry stays fresh
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """
+        Return the fresh value for key without touching counters or LRU order
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def get_stale(self, key):
+        """
+        Return the last value stored for key, even if it has expired
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[1] if entry is not None else None
+
+    def set(self, key, value):
+        """
+        Store value under key, evicting the oldest entries if over capacity
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def replace(self, key, value):
+        """
+        Store value under key only if key is already cached
+
+        Returns:
+            bool: True if the entry was replaced
+        """
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            return True
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entry count, capacity, hit/miss/eviction counters and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block and receive the same result (or exception).
+    """
+
     def __init__(self):
-        self.base_url = "https://api.coingecko.com/api/v3"
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
 
-    def fetch_coin_prices(self, coins, vs_currency="usd"):
+    def do(self, key, fn):
         """
-        Fetch current prices for specified coins from CoinGecko API
+        Run fn once for all concurrent callers of key
 
         Args:
-            coins (list): List of coin IDs (e.g., ['bitcoin', 'ethereum'])
-            vs_currency (str): Target currency (default: 'usd')
+            key: Hashable request identity
+            fn (callable): Zero-argument function producing the result
+
+        Returns:
+            The result of fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Calls in flight, executed calls and calls served by another caller
+        """
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'shared': self.shared
+            }
+
+# Market scans (top N coins) keyed by (top_n, vs_currency)
+_scan_cache = TTLCache(maxsize=8, ttl=120)
+
+# Parsed historical frames keyed by (coin_id, days, vs_currency)
+_historical_cache = TTLCache(maxsize=128, ttl=300)
+
+# Per-coin /coins/markets rows keyed by (coin_id, vs_currency); short-lived so
+# prices stay current
+_markets_cache = TTLCache(maxsize=1024, ttl=30)
+
+# The /exchange_rates table; other quote currencies are derived from
+# BASE_CURRENCY data with it instead of being fetched separately
+_fx_cache = TTLCache(maxsize=1, ttl=600)
+
+# In-flight API requests shared by concurrent sessions
+_inflight = SingleFlight()
+
+# On-disk history store shared by every helper below (created on first use)
+_price_store = None
+_price_store_lock = threading.Lock()
+
+def store_dir(base_url=None):
+    """
+    Get the price store directory for an API root
+
+    Data from anything but CoinGecko itself (a replay server, a mirror) is
+    kept apart from real history, in a subdirectory named after its host.
+
+    Args:
+        base_url (str): API root (default: $COINGECKO_BASE_URL or the
+            public API)
+
+    Returns:
+        str: Store directory
+    """
+    base_url = (base_url or os.environ.get("COINGECKO_BASE_URL", DEFAULT_BASE_URL)).rstrip('/')
+    if base_url == DEFAULT_BASE_URL:
+        return default_store_dir()
+    host = re.sub(r'[^A-Za-z0-9_.-]', '_', urlparse(base_url).hostname or 'unknown')
+    return os.path.join(default_store_dir(), 'sources', host)
+
+def get_price_store():
+    """
+    Get the shared on-disk price store
+
+    Returns:
+        PriceStore: Store rooted at store_dir(), or None if that directory
+            cannot be created
+    """
+    global _price_store
+    with _price_store_lock:
+        if _price_store is None:
+            store = PriceStore(store_dir())
+            try:
+                os.makedirs(store.root, exist_ok=True)
+            except OSError as e:
+                print(f"Price store disabled, cannot create {store.root}: {e}")
+                return None
+            _price_store = store
+        return _price_store
+
+# OHLCV pyramid built from the price store (created on first use)
+_bar_store = None
+
+def get_bar_store():
+    """
+    Get the shared OHLCV bar pyramid
+
+    Returns:
+        BarStore: Pyramid kept next to the price store, or None if the
+            price store is disabled
+    """
+    global _bar_store
+    store = get_price_store()
+    with _price_store_lock:
+        if _bar_store is None and store is not None:
+            _bar_store = BarStore(store)
+        return _bar_store
+
+# Intraday history of every /coins/markets response, capped at a day and
+# at a row budget (about 92 bytes per row)
+_snapshot_store = SnapshotStore(
+    retention=86400,
+    max_rows=int(os.environ.get("CRYPTO_DASHBOARD_SNAPSHOT_MAX_ROWS", 1_000_000))
+)
+
+def get_snapshot_store():
+    """
+    Get the shared market snapshot history
+
+    Returns:
+        SnapshotStore: Process-wide store fed by fetch_coin_prices
+    """
+    return _snapshot_store
+
+# Fields of a /coins/markets row kept in the market cache; nested and
+# image fields are dropped
+MARKET_ROW_FIELDS = ('id', 'symbol', 'name', 'last_updated') + tuple(SNAPSHOT_COLUMNS)
+
+# Largest page /coins/markets returns
+MARKETS_PAGE_SIZE = 250
+
+DEFAULT_BASE_URL = "https://api.coingecko.com/api/v3"
+
+# Connection pool and request quota shared by every CoinGeckoAPI instance
+_session = None
+_scheduler = RequestScheduler(
+    rate_per_minute=float(os.environ.get("COINGECKO_RATE_LIMIT", 30))
+)
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Get the shared keep-alive HTTP session
+
+    Returns:
+        requests.Session: Session with a pooled connection adapter
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept": "application/json"})
+            _session = session
+        return _session
+
+def get_scheduler():
+    """
+    Get the request scheduler that enforces the CoinGecko quota
+
+    Returns:
+        RequestScheduler: Process-wide scheduler
+    """
+    return _scheduler
+
+def get_scheduler_stats():
+    """
+    Get queue depth, wait time and throttle counters of the request scheduler
+
+    Returns:
+        dict: Scheduler statistics (see RequestScheduler.stats)
+    """
+    return _scheduler.stats()
+
+# Request instrumentation, labelled by endpoint with coin IDs collapsed
+_metrics = get_registry()
+_request_seconds = _metrics.histogram(
+    'coingecko_request_seconds', 'CoinGecko HTTP round-trip time', ('endpoint', 'status'))
+_response_bytes = _metrics.histogram(
+    'coingecko_response_bytes', 'CoinGecko response body size', ('endpoint',), BYTES_BUCKETS)
+_request_errors = _metrics.counter(
+    'coingecko_errors_total', 'Failed CoinGecko requests by reason', ('endpoint', 'reason'))
+_scheduler_wait = _metrics.histogram(
+    'coingecko_scheduler_wait_seconds', 'Time spent waiting for a rate-limit token', ('priority',))
+
+def _endpoint_label(path):
+    return re.sub(r'^/coins/(?!markets$)[^/]+', '/coins/{id}', path)
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class CoinGeckoAPI:
+    def __init__(self, store=None, refresh_interval=60, session=None, scheduler=None,
+                 max_retries=3, backoff=1.0, timeout=10, base_url=None, snapshots=None):
+        """
+        Args:
+            store (PriceStore): Optional local store for historical data.
+                When set, fetch_historical_data only requests the ranges
+                the store does not cover yet.
+            refresh_interval (float): Seconds before the stored tail is
+                considered stale and the newest points are fetched again
+            session (requests.Session): HTTP session (default: shared pool)
+            scheduler (RequestScheduler): Rate limiter (default: shared one)
+            max_retries (int): Retries for throttled, failed or 5xx requests
+            backoff (float): Base delay in seconds for exponential backoff
+            timeout (float): Per-request timeout in seconds
+            base_url (str): API root (default: $COINGECKO_BASE_URL or the
+                public CoinGecko API); point it at a ReplayServer for
+                offline runs
+            snapshots (SnapshotStore): Optional history that every
+                successful fetch_coin_prices response is appended to
+        """
+        self.base_url = base_url or os.environ.get("COINGECKO_BASE_URL", DEFAULT_BASE_URL)
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.session = session or get_session()
+        self.scheduler = scheduler or get_scheduler()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.snapshots = snapshots
+
+    def _get(self, path, params, priority=INTERACTIVE):
+        """
+        Send a rate-limited GET request, retrying transient failures
+
+        429 responses pause the shared scheduler for the Retry-After period;
+        connection errors and 5xx responses are retried with exponential
+        backoff.
+
+        Args:
+            path (str): Endpoint path below base_url
+            params (dict): Query parameters
+            priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
 
         Returns:
-            list: Market data for each coin
+            Parsed JSON response
+
+        Raises:
+            requests.exceptions.RequestException: Once retries are exhausted
+        """
+        url = f"{self.base_url}{path}"
+        endpoint = _endpoint_label(path)
+
+        for attempt in range(self.max_retries + 1):
+            waited = self.scheduler.acquire(priority)
+            _scheduler_wait.observe(waited, priority=priority)
+            last_attempt = attempt == self.max_retries
+            delay = min(30.0, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                reason = 'timeout' if isinstance(e, requests.exceptions.Timeout) else 'connection'
+                _request_errors.inc(endpoint=endpoint, reason=reason)
+                if last_attempt:
+                    raise
+            else:
+                _request_seconds.observe(time.perf_counter() - started,
+                                         endpoint=endpoint, status=response.status_code)
+                _response_bytes.observe(len(response.content), endpoint=endpoint)
+                if response.status_code >= 400:
+                    _request_errors.inc(endpoint=endpoint, reason=f"http_{response.status_code}")
+
+                if response.status_code == 429:
+                    retry_after = _retry_after_seconds(response)
+                    self.scheduler.throttle(retry_after if retry_after is not None else delay)
+                    if last_attempt:
+                        response.raise_for_status()
+                    self.scheduler.record_retry()
+                    # The scheduler holds every caller until the pause ends
+                    continue
+                if response.status_code >= 500 and not last_attempt:
+                    delay = _retry_after_seconds(response) or delay
+                else:
+                    response.raise_for_status()
+                    with timed('api.parse_json'):
+                        return response.json()
+
+            self.scheduler.record_retry()
+            time.sleep(delay)
+
+    def fetch_markets_page(self, page=1, per_page=MARKETS_PAGE_SIZE, vs_currency="usd",
+                           ids=None, priority=INTERACTIVE):
+        """
+        Fetch one page of /coins/markets, ordered by market cap
+
+        Args:
+            page (int): 1-based page number
+            per_page (int): Rows per page (CoinGecko allows at most 250)
+            vs_currency (str): Target currency
+            ids (list): Restrict the listing to these coin IDs
+            priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+
+        Returns:
+            list: Market rows, or None if the request failed
         """
         try:
-            url = f"{self.base_url}/coins/markets"
             params = {
                 "vs_currency": vs_currency,
-                "ids": ",".join(coins),
                 "order": "market_cap_desc",
-                "per_page": len(coins),
-                "page": 1,
+                "per_page": min(per_page, MARKETS_PAGE_SIZE),
+                "page": page,
                 "sparkline": False,
                 "price_change_percentage": "1h,24h,7d"
             }
+            if ids is not None:
+                params["ids"] = ",".join(ids)
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            market_data = self._get("/coins/markets", params, priority)
 
         except requests.exceptions.RequestException as e:
             print(f"Error fetching coin prices: {e}")
             return None
 
-    def fetch_historical_data(self, coin_id, days=30, vs_currency="usd"):
+        if self.snapshots is not None:
+            self.snapshots.append(market_data, vs_currency)
+        return market_data
+
+    def fetch_coin_prices(self, coins, vs_currency="usd", priority=INTERACTIVE):
+        """
+        Fetch current prices for specified coins from CoinGecko API
+
+        More than MARKETS_PAGE_SIZE coins are split into several requests,
+        sent concurrently through the shared rate limiter.
+
+        Args:
+            coins (list): List of coin IDs (e.g., ['bitcoin', 'ethereum'])
+            vs_currency (str): Target currency (default: 'usd')
+            priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+
+        Returns:
+            list: Market data for each coin, or None if every request failed
+        """
+        coins = list(coins)
+        chunks = [coins[i:i + MARKETS_PAGE_SIZE] for i in range(0, len(coins), MARKETS_PAGE_SIZE)]
+        if len(chunks) <= 1:
+            return self.fetch_markets_page(1, max(len(coins), 1), vs_currency, coins, priority)
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 4)) as pool:
+            pages = list(pool.map(
+                lambda chunk: self.fetch_markets_page(1, len(chunk), vs_currency, chunk, priority),
+                chunks))
+        if all(page is None for page in pages):
+            return None
+        return [row for page in pages if page for row in page]
+
+    def fetch_historical_data(self, coin_id, days=30, vs_currency="usd", priority=INTERACTIVE):
         """
         Fetch historical market data for a specific coin
 
+        With a store attached, ranges already on disk at the window's
+        sampling step (or finer) are served locally and only the uncovered
+        head (a longer or finer window than before) and the stale tail are
+        requested, then merged into the store. If only the tail
+        cannot be fetched, the stored data is returned with 'stale' set.
+
         Args:
             coin_id (str): Coin ID (e.g., 'bitcoin')
             days (int): Number of days of historical data
             vs_currency (str): Target currency
+            priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+
+        Returns:
+            dict: Historical price data
+        """
+        if self.store is None:
+            return self._fetch_market_chart(coin_id, days, vs_currency, priority)
+
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - int(days * MS_PER_DAY)
+        step_ms = chart_step_ms(days)
+        # Ranges stored at a coarser step (e.g. daily rows from a 365-day
+        # fetch) cannot serve a finer window and count as missing
+        coverage = self.store.coverage(coin_id, vs_currency, step_ms)
+        stale = False
+
+        if coverage is None or coverage[1] < start_ms:
+            # Nothing usable on disk: fetch the whole window once
+            data = self._fetch_market_chart(coin_id, days, vs_currency, priority)
+            if not data:
+                return None
+            self.store.merge(coin_id, vs_currency, data, start_ms, now_ms, step_ms)
+        else:
+            covered_start, covered_end = coverage
+            if start_ms < covered_start:
+                head = self.fetch_historical_range(coin_id, start_ms, covered_start,
+                                                   vs_currency, priority)
+                if not head:
+                    return None
+                self.store.merge(coin_id, vs_currency, head, start_ms, covered_start)
+
+            if now_ms - covered_end > self.refresh_interval * 1000:
+                tail = self.fetch_historical_range(coin_id, covered_end, now_ms,
+                                                   vs_currency, priority)
+                if tail:
+                    self.store.merge(coin_id, vs_currency, tail, covered_end, now_ms)
+                else:
+                    stale = True
+
+        rows = self.store.query(coin_id, vs_currency, start_ms, now_ms, step_ms=step_ms)
+        data = array_to_chart(rows)
+        data['stale'] = stale
+        return data
+
+    def fetch_historical_range(self, coin_id, start_ms, end_ms, vs_currency="usd",
+                               priority=INTERACTIVE):
+        """
+        Fetch historical market data for a specific coin between two timestamps
+
+        Args:
+            coin_id (str): Coin ID (e.g., 'bitcoin')
+            start_ms (int): Range start (ms since epoch)
+            end_ms (int): Range end (ms since epoch)
+            vs_currency (str): Target currency
+            priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
 
         Returns:
             dict: Historical price data
         """
         try:
-            url = f"{self.base_url}/coins/{coin_id}/market_chart"
+            params = {
+                "vs_currency": vs_currency,
+                "from": start_ms // 1000,
+                "to": end_ms // 1000
+            }
+
+            return self._get(f"/coins/{coin_id}/market_chart/range", params, priority)
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching historical range for {coin_id}: {e}")
+            return None
+
+    def fetch_exchange_rates(self, priority=INTERACTIVE):
+        """
+        Fetch BTC-denominated exchange rates for every supported currency
+
+        Args:
+            priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+
+        Returns:
+            dict: Currency code -> {'name', 'unit', 'value', 'type'}, or
+                None if the request failed
+        """
+        try:
+            data = self._get("/exchange_rates", {}, priority)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching exchange rates: {e}")
+            return None
+
+        if not isinstance(data, dict) or not isinstance(data.get('rates'), dict):
+            print("Error fetching exchange rates: unexpected response")
+            return None
+        return data['rates']
+
+    def _fetch_market_chart(self, coin_id, days, vs_currency, priority=INTERACTIVE):
+        try:
             params = {
                 "vs_currency": vs_currency,
                 "days": days
             }
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get(f"/coins/{coin_id}/market_chart", params, priority)
 
         except requests.exceptions.RequestException as e:
             print(f"Error fetching historical data for {coin_id}: {e}")
             return None
 
-def get_price_data(coins, start_date=None, end_date=None):
+# Long-lived client used by the module-level helpers
+_api = None
+_api_lock = threading.Lock()
+
+def set_base_url(base_url):
+    """
+    Point the shared client and stores at another API root
+
+    Used to switch to the local replay server. The client, the price and
+    bar stores (see store_dir) and the in-memory caches are rebuilt, so
+    no data from one source is served or persisted as the other's.
+
+    Args:
+        base_url (str): API root, e.g. ReplayServer.base_url
+    """
+    global _api, _price_store, _bar_store
+    os.environ["COINGECKO_BASE_URL"] = base_url
+    with _api_lock, _price_store_lock:
+        _api = None
+        _price_store = None
+        _bar_store = None
+    clear_cache()
+    _snapshot_store.clear()
+
+def get_api():
+    """
+    Get the shared CoinGeckoAPI client used by the helper functions
+
+    Returns:
+        CoinGeckoAPI: Client backed by the shared session, scheduler and
+            price store
+    """
+    global _api
+    with _api_lock:
+        if _api is None:
+            _api = CoinGeckoAPI(store=get_price_store(), snapshots=get_snapshot_store())
+        return _api
+
+@timed('data_fetch.get_price_data')
+def get_price_data(coins, start_date=None, end_date=None, priority=INTERACTIVE, refresh=False,
+                   vs_currency=BASE_CURRENCY):
     """
     Main function to fetch price data with error handling and data formatting
 
+    Market rows are cached per coin, so any selection can be assembled from
+    rows fetched for other selections or by the background prefetcher, and
+    only the missing coins are requested. If the API fails, the last known
+    rows are returned with df.attrs['stale'] set to True.
+
     Args:
         coins (list): List of cryptocurrency IDs
         start_date (str): Start date (optional)
         end_date (str): End date (optional)
+        priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+        refresh (bool): Ignore fresh cache entries and refetch every coin
+        vs_currency (str): Quote currency, converted from BASE_CURRENCY
+            rows when an exchange rate is available
 
     Returns:
         pd.DataFrame: Formatted price data
     """
-    api = CoinGeckoAPI()
+    rate, vs_currency = _conversion(vs_currency)
+    coins = list(dict.fromkeys(coins))
+    rows = {} if refresh else {
+        coin: row for coin in coins
+        if (row := _markets_cache.get((coin, vs_currency))) is not None
+    }
 
-    # Fetch current market data
-    market_data = api.fetch_coin_prices(coins)
-    if not market_data:
+    missing = tuple(sorted(coin for coin in coins if coin not in rows))
+    stale = False
+    if missing:
+        fetched = _inflight.do(('markets', missing, vs_currency, refresh),
+                               lambda: _load_market_rows(missing, vs_currency, priority, refresh))
+        rows.update(fetched)
+
+        # Fall back to the last known rows for coins the API did not return
+        for coin in missing:
+            if coin not in rows:
+                row = _markets_cache.get_stale((coin, vs_currency))
+                if row is not None:
+                    rows[coin] = row
+                    stale = True
+
+    if not rows:
         return pd.DataFrame()
 
     # Convert to DataFrame
-    df = pd.DataFrame(market_data)
-
-    # Add timestamp
-    df['timestamp'] = pd.to_datetime('now')
+    df = pd.DataFrame(list(rows.values()))
+    df = df.sort_values('market_cap', ascending=False, na_position='last', ignore_index=True)
+    if rate is not None:
+        df = convert_frame(df, rate, MARKET_MONEY_COLUMNS)
 
     # Calculate additional metrics
     df['market_cap_billions'] = df['market_cap'] / 1e9
     df['volume_millions'] = df['total_volume'] / 1e6
 
+    df.attrs['stale'] = stale
+    df.attrs['fetched_at'] = df['timestamp'].min()
+    # Rate from BASE_CURRENCY rows; None when the currency was requested directly
+    df.attrs['fx_rate'] = rate if rate is not None else (1.0 if vs_currency == BASE_CURRENCY else None)
+
     return df
 
-def get_historical_prices(coin_id, days=30):
+def get_exchange_rates(priority=INTERACTIVE, refresh=False):
+    """
+    Get the exchange-rate table used to derive other quote currencies
+
+    The table is fetched at most once per cache lifetime and shared by
+    every session; if the API fails, the last known table is returned.
+
+    Args:
+        priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+        refresh (bool): Ignore a fresh cached table
+
+    Returns:
+        RateTable: Rates for every currency CoinGecko supports, or None if
+            none could be fetched
+    """
+    table = None if refresh else _fx_cache.get('rates')
+    if table is None:
+        table = _inflight.do(('exchange_rates', refresh), lambda: _load_exchange_rates(priority))
+    return table
+
+def _load_exchange_rates(priority):
+    rates = get_api().fetch_exchange_rates(priority)
+    if not rates:
+        return _fx_cache.get_stale('rates')
+    table = RateTable(rates)
+    _fx_cache.set('rates', table)
+    return table
+
+def _conversion(vs_currency, history=False):
+    """
+    How to serve a quote currency
+
+    Args:
+        vs_currency (str): Requested quote currency
+        history (bool): The data spans past prices. Only fiat-to-fiat
+            histories are converted at the current rate; a crypto quote
+            currency (or base) moves too much for that, e.g. Bitcoin in BTC
+            would not stay at 1, so those histories are requested natively.
+
+    Returns:
+        tuple: (rate, currency to request). Currencies derived from base
+            data give (rate from BASE_CURRENCY, BASE_CURRENCY); the base
+            itself and currencies without a known rate give (None, the
+            currency) and are requested as they are.
+    """
+    vs_currency = vs_currency.lower()
+    if vs_currency == BASE_CURRENCY:
+        return None, BASE_CURRENCY
+    table = get_exchange_rates()
+    if table is None or vs_currency not in table or BASE_CURRENCY not in table:
+        return None, vs_currency
+    if history and not (table.is_fiat(BASE_CURRENCY) and table.is_fiat(vs_currency)):
+        return None, vs_currency
+    return table.rate(BASE_CURRENCY, vs_currency), BASE_CURRENCY
+
+def _cache_market_rows(market_data, vs_currency, fetched_at, add=True):
+    # Keep the flat fields only, with missing numbers as NaN, and add a timestamp.
+    # With add=False only coins already in the per-coin cache are refreshed
+    rows = {}
+    for row in market_data:
+        if not isinstance(row, dict) or not row.get('id'):
+            continue
+        row = {field: row.get(field) for field in MARKET_ROW_FIELDS}
+        for field in SNAPSHOT_COLUMNS:
+            if row[field] is None:
+                row[field] = float('nan')
+        row['timestamp'] = fetched_at
+        if add:
+            _markets_cache.set((row['id'], vs_currency), row)
+        else:
+            _markets_cache.replace((row['id'], vs_currency), row)
+        rows[row['id']] = row
+    return rows
+
+def _load_market_rows(coins, vs_currency, priority, refresh):
+    # Another session may have filled the cache while we waited for the flight
+    rows = {}
+    if not refresh:
+        rows = {
+            coin: row for coin in coins
+            if (row := _markets_cache.peek((coin, vs_currency))) is not None
+        }
+        coins = [coin for coin in coins if coin not in rows]
+        if not coins:
+            return rows
+
+    api = get_api()
+
+    # Fetch current market data
+    market_data = api.fetch_coin_prices(list(coins), vs_currency, priority)
+    if not market_data:
+        return rows
+
+    rows.update(_cache_market_rows(market_data, vs_currency, pd.Timestamp.now()))
+    return rows
+
+@timed('data_fetch.scan_markets')
+def scan_markets(top_n=1000, vs_currency=BASE_CURRENCY, max_workers=4, priority=INTERACTIVE,
+                 refresh=False):
+    """
+    Fetch the top N coins by market cap across /coins/markets pages
+
+    Pages are requested concurrently; the shared rate limiter spaces them
+    to stay inside the quota. Scans are cached briefly and refresh the
+    per-coin market cache for coins it already holds; other scanned coins
+    are not added, so a scan of thousands of coins cannot evict the rows
+    (and stale fallbacks) of the coins sessions display.
+    Pages that fail are left out and the result is flagged with
+    df.attrs['stale'] (the last complete scan is returned instead when
+    one exists).
+
+    Args:
+        top_n (int): Number of coins to list
+        vs_currency (str): Target currency
+        max_workers (int): Maximum number of pages fetched concurrently
+        priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+        refresh (bool): Ignore a fresh cached scan
+
+    Returns:
+        pd.DataFrame: One row per coin with MARKET_ROW_FIELDS and
+            'timestamp', ordered by market cap rank
+    """
+    rate, source = _conversion(vs_currency)
+    key = (top_n, source)
+    cached = None if refresh else _scan_cache.get(key)
+    if cached is None:
+        cached = _inflight.do(('scan', refresh) + key,
+                              lambda: _load_market_scan(key, max_workers, priority))
+    return cached.copy() if rate is None else convert_frame(cached, rate, MARKET_MONEY_COLUMNS)
+
+def _load_market_scan(key, max_workers, priority):
+    top_n, vs_currency = key
+    api = get_api()
+    n_pages = -(-top_n // MARKETS_PAGE_SIZE)
+
+    workers = max(1, min(max_workers, n_pages))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pages = list(pool.map(
+            lambda page: api.fetch_markets_page(page, MARKETS_PAGE_SIZE, vs_currency,
+                                                priority=priority),
+            range(1, n_pages + 1)))
+
+    failed = [page for page, data in enumerate(pages, start=1) if data is None]
+    if failed:
+        stale = _scan_cache.get_stale(key)
+        if stale is not None:
+            stale = stale.copy()
+            stale.attrs['stale'] = True
+            return stale
+
+    fetched_at = pd.Timestamp.now()
+    rows = _cache_market_rows([row for data in pages if data for row in data], vs_currency,
+                              fetched_at, add=False)
+    df = pd.DataFrame(list(rows.values()), columns=list(MARKET_ROW_FIELDS) + ['timestamp'])
+    df = df.sort_values('market_cap_rank', na_position='last', ignore_index=True).head(top_n)
+    df.attrs['stale'] = bool(failed)
+    df.attrs['fetched_at'] = fetched_at
+    df.attrs['failed_pages'] = failed
+    if not failed:
+        _scan_cache.set(key, df)
+    return df
+
+@timed('data_fetch.get_historical_prices')
+def get_historical_prices(coin_id, days=30, vs_currency=BASE_CURRENCY, priority=INTERACTIVE,
+                          refresh=False):
     """
     Get historical price data and format for analysis
 
+    Results are served from a shared TTL cache, so repeated calls for the
+    same coin and range only hit the API once per cache lifetime. Concurrent
+    misses for the same key, e.g. when a popular entry expires, wait on a
+    single in-flight request. If the API fails, the last known frame is
+    returned with df.attrs['stale'] set to True.
+
+    Other fiat quote currencies than BASE_CURRENCY are converted from the
+    base history at the current exchange rate, so they share its cache
+    entry, stored history and API calls; past values are not adjusted for
+    historical exchange rates (df.attrs['fx_rate'] is set). Crypto quote
+    currencies are requested natively.
+
     Args:
         coin_id (str): Cryptocurrency ID
         days (int): Number of days of history
+        vs_currency (str): Target currency
+        priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+        refresh (bool): Ignore a fresh cache entry and refetch
 
     Returns:
         pd.DataFrame: Historical price data with timestamps
     """
-    api = CoinGeckoAPI()
+    rate, source = _conversion(vs_currency, history=True)
+    key = (coin_id, days, source)
+    cached = None if refresh else _historical_cache.get(key)
+    if cached is None:
+        cached = _inflight.do(('history', refresh) + key,
+                              lambda: _load_historical_prices(key, priority, refresh))
+    return cached.copy() if rate is None else convert_frame(cached, rate, HISTORY_MONEY_COLUMNS)
+
+def _load_historical_prices(key, priority, refresh=False):
+    cached = None if refresh else _historical_cache.peek(key)
+    if cached is not None:
+        return cached
 
-    data = api.fetch_historical_data(coin_id, days)
+    coin_id, days, vs_currency = key
+    api = get_api()
+
+    data = api.fetch_historical_data(coin_id, days, vs_currency, priority)
     if not data:
+        stale = _historical_cache.get_stale(key)
+        if stale is None:
+            return pd.DataFrame()
+        stale = stale.copy()
+        stale.attrs['stale'] = True
+        return stale
+
+    # Prices with the market cap and 24h volume reported at the same times
+    rows = chart_to_array(data)
+    df = pd.DataFrame(rows[:, 1:], columns=['price', 'market_cap', 'total_volume'],
+                      index=pd.to_datetime(rows[:, 0].astype('int64'), unit='ms'))
+    df.index.name = 'timestamp'
+
+    df.attrs['stale'] = bool(data.get('stale'))
+    df.attrs['fetched_at'] = pd.Timestamp.now()
+    if not df.attrs['stale']:
+        _historical_cache.set(key, df)
+
+    return df
+
+@timed('data_fetch.get_historical_prices_bulk')
+def get_historical_prices_bulk(coin_ids, days=30, vs_currency=BASE_CURRENCY, max_workers=4):
+    """
+    Get historical price data for several coins in parallel
+
+    Each coin goes through get_historical_prices on a bounded thread pool,
+    so page latency follows the slowest coin instead of the sum of all.
+
+    Args:
+        coin_ids (list): Cryptocurrency IDs
+        days (int): Number of days of history
+        vs_currency (str): Target currency
+        max_workers (int): Maximum number of concurrent requests
+
+    Returns:
+        dict: coin_id -> pd.DataFrame, in input order, omitting coins
+            whose data could not be fetched
+    """
+    coin_ids = list(dict.fromkeys(coin_ids))
+    if not coin_ids:
+        return {}
+
+    workers = max(1, min(max_workers, len(coin_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = pool.map(lambda coin_id: get_historical_prices(coin_id, days, vs_currency),
+                          coin_ids)
+        results = dict(zip(coin_ids, frames))
+
+    return {coin_id: df for coin_id, df in results.items() if not df.empty}
+
+@timed('data_fetch.get_price_panel')
+def get_price_panel(coins, days=30, vs_currency=BASE_CURRENCY, freq=None, dtype="float64",
+                    fill="ffill", limit=None, how="outer", max_workers=4):
+    """
+    Get time-aligned price histories for several coins as one matrix
+
+    Args:
+        coins (list): Cryptocurrency IDs
+        days (int): Number of days of history
+        vs_currency (str): Target currency
+        freq (str): Resampling frequency (default: CoinGecko's granularity
+            for the window - 5min up to 1 day, hourly up to 90, else daily)
+        dtype (str): 'float64' or 'float32'
+        fill (str): 'ffill', 'interpolate' or None (see build_price_panel)
+        limit (int): Maximum number of consecutive missing periods to fill
+        how (str): 'outer' or 'inner' index span (see build_price_panel)
+        max_workers (int): Maximum number of concurrent requests
+
+    Returns:
+        pd.DataFrame: Price matrix (time x coins); coins without data are omitted
+    """
+    if freq is None:
+        freq = pd.Timedelta(milliseconds=chart_step_ms(days))
+
+    frames = get_historical_prices_bulk(coins, days, vs_currency, max_workers)
+    return build_price_panel(frames, freq=freq, dtype=dtype, fill=fill,
+                             limit=limit, how=how)
+
+@timed('data_fetch.get_ohlcv')
+def get_ohlcv(coin_id, days=30, resolution=None, vs_currency=BASE_CURRENCY, priority=INTERACTIVE):
+    """
+    Get OHLCV bars for a coin from the precomputed pyramid
+
+    The raw history is brought up to date through get_historical_prices
+    (so the usual caching and stale fallback apply), then only the bars
+    after the last aggregated tick are rebuilt. Without a price store the
+    bars are aggregated from the fetched history instead. Other fiat quote
+    currencies are converted from the BASE_CURRENCY bars at the current
+    rate; crypto quote currencies get bars of their own.
+
+    Args:
+        coin_id (str): Cryptocurrency ID
+        days (int): Number of days of history
+        resolution (str): '5m', '1h', '4h' or '1d' (default: the finest
+            level the window's raw data supports within ohlcv.MAX_BARS)
+        vs_currency (str): Target currency
+        priority (int): Scheduler priority (INTERACTIVE or BACKGROUND)
+
+    Returns:
+        pd.DataFrame: 'open', 'high', 'low', 'close', 'volume' (24h),
+            'market_cap' and 'count' per bar, indexed by bar start time
+    """
+    resolution = resolution or resolution_for(days)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}, expected one of {list(RESOLUTIONS)}")
+
+    rate, vs_currency = _conversion(vs_currency, history=True)
+    history = get_historical_prices(coin_id, days, vs_currency, priority)
+    if history.empty:
         return pd.DataFrame()
 
-    # Convert price data to DataFrame
-    prices = data.get('prices', [])
-    df = pd.DataFrame(prices, columns=['timestamp', 'price'])
+    bar_store = get_bar_store()
+    if bar_store is None or get_api().store is None:
+        rows = np.column_stack([history.index.values.astype('datetime64[ms]').astype(np.int64),
+                                history[['price', 'market_cap', 'total_volume']].to_numpy()])
+        bars = aggregate_ticks(rows, RESOLUTIONS[resolution])
+    else:
+        bar_store.update(coin_id, vs_currency)
+        start_ms = int(history.index[0].value // 1_000_000)
+        start_ms -= start_ms % RESOLUTIONS[resolution]
+        bars = bar_store.query(coin_id, vs_currency, resolution, start_ms)
+
+    df = bars_to_frame(bars)
+    if rate is not None:
+        df = convert_frame(df, rate, BAR_MONEY_COLUMNS)
+    df.attrs['stale'] = bool(history.attrs.get('stale'))
+    df.attrs['resolution'] = resolution
+    return df
+
+def get_market_history(coins, column='current_price', vs_currency=BASE_CURRENCY, hours=24):
+    """
+    Get intraday history of one market field from recorded snapshots
+
+    No API request is made; the history grows as market data is fetched
+    by the dashboard, the live poller and the prefetcher. Snapshots are
+    recorded in BASE_CURRENCY, so other fiat currencies are converted at
+    the current rate and crypto quote currencies usually have none.
+
+    Args:
+        coins (list): Coin IDs
+        column (str): Snapshot field (see SNAPSHOT_COLUMNS)
+        vs_currency (str): Quote currency
+        hours (float): How far back to look
+
+    Returns:
+        pd.DataFrame: Snapshot time x coin ID matrix
+    """
+    start = pd.Timestamp.now() - pd.Timedelta(hours=hours)
+    rate, source = _conversion(vs_currency, history=True)
+    history = _snapshot_store.series(column, coins, source, start=start)
+    if rate is not None and column in MARKET_MONEY_COLUMNS:
+        history = convert_frame(history, rate)
+    return history
+
+def get_cache_stats():
+    """
+    Get hit/miss counters for the historical data cache
+
+    Returns:
+        dict: Cache statistics (see TTLCache.stats)
+    """
+    return _historical_cache.stats()
+
+def get_coalescing_stats():
+    """
+    Get counters for requests coalesced across concurrent callers
+
+    Returns:
+        dict: Single-flight statistics (see SingleFlight.stats)
+    """
+    return _inflight.stats()
+
+def _collect_metrics():
+    # Copy cache, scheduler and coalescing counters into gauges for export
+    cache_gauges = {
+        field: _metrics.gauge(f'crypto_dashboard_cache_{field}',
+                              f'Cache {field.replace("_", " ")}', ('cache',))
+        for field in ('hits', 'misses', 'evictions', 'size', 'hit_ratio')
+    }
+    for name, cache in (('historical', _historical_cache), ('markets', _markets_cache)):
+        stats = cache.stats()
+        for field, gauge in cache_gauges.items():
+            gauge.set(stats[field], cache=name)
+
+    for field, value in get_scheduler_stats().items():
+        _metrics.gauge(f'coingecko_scheduler_{field}',
+                       f'Request scheduler {field.replace("_", " ")}').set(value)
+    snapshot_stats = _snapshot_store.stats()
+    for field in ('rows', 'coins', 'memory_bytes'):
+        _metrics.gauge(f'crypto_dashboard_snapshot_{field}',
+                       f'Market snapshot store {field.replace("_", " ")}').set(snapshot_stats[field])
+    for field, value in get_coalescing_stats().items():
+        _metrics.gauge(f'crypto_dashboard_coalesced_{field}',
+                       f'Single-flight {field.replace("_", " ")} calls').set(value)
 
-    # Convert timestamp to datetime
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df.set_index('timestamp', inplace=True)
+_metrics.add_collector(_collect_metrics)
 
-    return df
\ No newline at end of file
+def clear_cache():
+    """Empty the historical data, market snapshot, market scan and exchange-rate caches"""
+    _historical_cache.clear()
+    _fx_cache.clear()
+    _markets_cache.clear()
+    _scan_cache.clear()
\ No newline at end of file
@@ -1,11 +1,12 @@
 # Demo Script for Crypto Dashboard
 # This script demonstrates the functionality of the crypto dashboard modules
 
-from data_fetch import get_price_data, get_historical_prices
+from data_fetch import get_price_data, get_historical_prices, set_base_url
 from analysis import calculate_moving_averages, calculate_volatility, calculate_correlation_matrix
 from plots import create_price_chart, create_volatility_chart, create_correlation_heatmap
 from sentiment import generate_mock_sentiment_data, get_sentiment_signal
 import pandas as pd
+import sys
 
 def demo_data_fetching():
     """Demonstrate data fetching capabilities"""
@@ -87,6 +88,13 @@ def main():
     print("CRYPTO DASHBOARD DEMO")
     print("=" * 50)
 
+    if "--offline" in sys.argv:
+        # Serve synthetic data locally instead of calling CoinGecko
+        from replay_server import ReplayServer
+        server = ReplayServer().start()
+        set_base_url(server.base_url)
+        print(f"Using offline replay server at {server.base_url}\n")
+
     demo_data_fetching()
     demo_analysis() 
     demo_sentiment()
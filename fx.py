@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Currency every market and history request is made in; other quote
+# currencies are derived from it with the exchange-rate table
+BASE_CURRENCY = os.environ.get("CRYPTO_DASHBOARD_BASE_CURRENCY", "usd").lower()
+
+# Money columns of each frame layout. Percent changes, ranks, supply and
+# tick counts do not depend on the quote currency.
+MARKET_MONEY_COLUMNS = ('current_price', 'market_cap', 'total_volume', 'high_24h', 'low_24h',
+                        'price_change_24h', 'market_cap_billions', 'volume_millions')
+HISTORY_MONEY_COLUMNS = ('price', 'market_cap', 'total_volume')
+BAR_MONEY_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'market_cap')
+
+# Currencies offered by the dashboard's selector (when the rate table lists them)
+DISPLAY_CURRENCIES = ('usd', 'eur', 'gbp', 'jpy', 'chf', 'cad', 'aud', 'cny', 'inr', 'krw',
+                      'brl', 'btc', 'eth')
+
+class RateTable:
+    """
+    Exchange rates from CoinGecko's /exchange_rates endpoint
+
+    CoinGecko quotes every currency, fiat and crypto, as its value of one
+    BTC, so the rate between any two currencies is the ratio of their
+    values.
+    """
+
+    def __init__(self, rates, fetched_at=None):
+        """
+        Args:
+            rates (dict): The payload's 'rates' mapping, currency code ->
+                {'name', 'unit', 'value', 'type'}
+            fetched_at (pd.Timestamp): When the rates were fetched
+        """
+        self.values = {}
+        self.units = {}
+        self.names = {}
+        self.types = {}
+        for code, rate in rates.items():
+            value = rate.get('value') if isinstance(rate, dict) else None
+            if not isinstance(value, (int, float)) or not value > 0:
+                continue
+            code = code.lower()
+            self.values[code] = float(value)
+            self.units[code] = rate.get('unit') or code.upper()
+            self.names[code] = rate.get('name') or code.upper()
+            self.types[code] = rate.get('type')
+        self.fetched_at = fetched_at or pd.Timestamp.now()
+
+    def __contains__(self, currency):
+        return currency.lower() in self.values
+
+    def rate(self, from_currency, to_currency):
+        """
+        Units of to_currency per unit of from_currency
+
+        Raises:
+            ValueError: If either currency is not in the table
+        """
+        missing = [c for c in (from_currency, to_currency) if c not in self]
+        if missing:
+            raise ValueError(f"No exchange rate for {', '.join(missing)}")
+        return self.values[to_currency.lower()] / self.values[from_currency.lower()]
+
+    def is_fiat(self, currency):
+        """
+        Returns:
+            bool: True if the table lists currency as a fiat currency
+        """
+        return self.types.get(currency.lower()) == 'fiat'
+
+    def currencies(self, kinds=('fiat', 'crypto')):
+        """
+        Returns:
+            list: Currency codes of the given types, in table order
+        """
+        return [code for code, kind in self.types.items() if kind in kinds]
+
+def currency_prefix(currency, rates=None):
+    """
+    Prefix for amounts in a currency, e.g. '$', '€' or 'BTC '
+
+    Args:
+        currency (str): Currency code
+        rates (RateTable): Source of currency symbols (optional)
+
+    Returns:
+        str: The currency's symbol, or its code followed by a space
+    """
+    unit = rates.units.get(currency.lower()) if rates is not None else None
+    if unit is None:
+        unit = '$' if currency.lower() == 'usd' else currency.upper()
+    return unit if len(unit) == 1 else unit + ' '
+
+def convert_frame(df, rate, columns=None, vs_currency=None):
+    """
+    Scale the money columns of a frame by an exchange rate
+
+    All columns are multiplied at once; the input is left unchanged.
+
+    Args:
+        df (pd.DataFrame): Frame in the source currency
+        rate (float): Units of the target currency per source unit (see
+            RateTable.rate)
+        columns (tuple): Columns to scale, e.g. HISTORY_MONEY_COLUMNS
+            (default: every column, as for a price panel); columns the
+            frame lacks are skipped
+        vs_currency (str): Target currency, recorded in df.attrs
+
+    Returns:
+        pd.DataFrame: Converted copy with attrs['fx_rate'] (and
+            attrs['vs_currency']) set
+    """
+    out = df.copy()
+    columns = list(df.columns) if columns is None else [c for c in columns if c in df.columns]
+    if columns and rate != 1.0:
+        out[columns] = df[columns].to_numpy(dtype=np.float64, na_value=np.nan) * rate
+    out.attrs['fx_rate'] = rate
+    if vs_currency is not None:
+        out.attrs['vs_currency'] = vs_currency
+    return out
@@ -0,0 +1,343 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from analysis import _as_matrix, _window_sums, compute_returns
+from metrics import timed
+
+# Indicators accepted by compute_indicators, with their default parameters.
+# Requests are '<name>' or '<name>_<param>[_<param>...]', e.g. 'rsi_14',
+# 'macd_12_26_9' or 'bollinger_20_2.5'.
+INDICATORS = {
+    'returns': (),
+    'sma': (20,),
+    'ema': (20,),
+    'volatility': (30,),
+    'rsi': (14,),
+    'macd': (12, 26, 9),
+    'bollinger': (20, 2),
+    'atr': (14,),
+    'drawdown': ()
+}
+
+# Nodes whose value depends on every earlier row; IndicatorGraph.carry()
+# hands their last row to the graph of the next chunk
+RECURSIVE_NODES = ('ema', 'running_max', 'running_min')
+
+_REQUEST = re.compile(r'^([a-z]+)((?:_\d+(?:\.\d+)?)*)$')
+
+def parse_request(request):
+    """
+    Split an indicator request into its name and parameters
+
+    Args:
+        request (str): Indicator request, e.g. 'macd' or 'bollinger_20_2'
+
+    Returns:
+        tuple: (name, parameter tuple with defaults filled in)
+    """
+    match = _REQUEST.match(request.strip().lower())
+    if not match or match.group(1) not in INDICATORS:
+        raise ValueError(f"Unknown indicator {request!r}, expected one of {list(INDICATORS)}")
+
+    name = match.group(1)
+    defaults = INDICATORS[name]
+    given = [float(p) for p in match.group(2).split('_')[1:]]
+    if len(given) > len(defaults):
+        raise ValueError(f"{name} takes at most {len(defaults)} parameters, got {request!r}")
+    params = tuple(int(p) if p.is_integer() else p for p in given) + defaults[len(given):]
+    return name, params
+
+def warmup_rows(requests):
+    """
+    Rows before a chunk that its rolling windows and price changes look back on
+
+    Recursive nodes (EMAs, running extremes) need no warmup rows: they are
+    resumed from the previous chunk's carried state instead.
+
+    Args:
+        requests (list): Indicator requests (see parse_request)
+
+    Returns:
+        int: Rows of overlap needed between consecutive chunks
+    """
+    lookback = {
+        'returns': lambda: 1,
+        'sma': lambda window: window - 1,
+        'volatility': lambda window: window,
+        'rsi': lambda window: 1,
+        'bollinger': lambda window, width: window - 1,
+        'atr': lambda window: 1
+    }
+    rows = 0
+    for request in requests:
+        name, params = parse_request(request)
+        if name in lookback:
+            rows = max(rows, int(np.ceil(lookback[name](*params))))
+    return rows
+
+class IndicatorGraph:
+    """
+    Lazily evaluated graph of indicator intermediates for a price matrix
+
+    Every node (an input, returns, price changes, rolling sums, an EMA, ...)
+    is identified by a key tuple such as ('ema', ('input', 'price'), alpha)
+    and computed at most once, the first time any indicator asks for it.
+    MACD and EMA requests therefore share their EMAs, Bollinger Bands share
+    the rolling sums of an SMA with the same window, RSI and the ATR
+    fallback share one series of price changes, and returns are computed
+    once for volatility and any other consumer.
+
+    Recursive nodes (EMAs and running extremes) can be resumed from a
+    previous graph's carry(), so a long history can be evaluated chunk by
+    chunk (see chunked.py): each chunk starts with `warmup` rows of the
+    previous one for the rolling windows, and the recursive nodes start
+    after them from the carried state.
+    """
+
+    def __init__(self, prices, high=None, low=None, warmup=0, state=None):
+        """
+        Args:
+            prices (pd.DataFrame): Close prices, one column per coin
+            high (pd.DataFrame): Optional bar highs shaped like prices (for ATR)
+            low (pd.DataFrame): Optional bar lows shaped like prices (for ATR)
+            warmup (int): Leading rows that only feed rolling windows;
+                recursive nodes are NaN there
+            state (dict): Output of the previous chunk's carry()
+        """
+        self.index = prices.index
+        self.columns = prices.columns
+        self._inputs = {'price': _as_matrix(prices.to_numpy(dtype=np.float64, na_value=np.nan))}
+        for name, frame in (('high', high), ('low', low)):
+            if frame is not None:
+                aligned = frame.reindex(index=prices.index, columns=prices.columns)
+                self._inputs[name] = aligned.to_numpy(dtype=np.float64, na_value=np.nan)
+        self.warmup = warmup
+        self.state = state or {}
+        self._cache = {}
+        self.computed = []
+
+    def node(self, *key):
+        """
+        Evaluate a node, reusing the result of an earlier evaluation
+
+        Args:
+            *key: Node type followed by its arguments
+
+        Returns:
+            np.ndarray: The node's (time x coins) matrix, or a tuple of them
+        """
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = getattr(self, f"_{key[0]}")(*key[1:])
+            self.computed.append(key)
+        return value
+
+    def frame(self, matrix):
+        return pd.DataFrame(matrix, index=self.index, columns=self.columns)
+
+    def carry(self):
+        """
+        State needed to resume the recursive nodes after this graph's last row
+
+        Returns:
+            dict: Node key -> last row of the node's matrix
+        """
+        return {key: self._cache[key][-1].copy() for key in self.computed if key[0] in RECURSIVE_NODES}
+
+    def _resume(self, key, values, accumulate):
+        # Run a recursive node over the rows after the warmup, starting from
+        # the carried state (one extra leading row) when there is one
+        values = values[self.warmup:]
+        previous = self.state.get(key)
+        if previous is not None:
+            values = np.vstack([previous[np.newaxis], values])
+        result = accumulate(values)
+        if previous is not None:
+            result = result[1:]
+        out = np.full((self.warmup + len(result), result.shape[1]), np.nan)
+        out[self.warmup:] = result
+        return out
+
+    # Intermediates
+
+    def _input(self, name):
+        if name not in self._inputs:
+            raise ValueError(f"Input {name!r} was not provided")
+        return self._inputs[name]
+
+    def _returns(self, source):
+        return compute_returns(self.node(*source))
+
+    def _delta(self, source):
+        values = self.node(*source)
+        out = np.full_like(values, np.nan)
+        out[1:] = values[1:] - values[:-1]
+        return out
+
+    def _gain(self, source):
+        delta = self.node('delta', source)
+        return np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+
+    def _loss(self, source):
+        delta = self.node('delta', source)
+        return np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+
+    def _moments(self, source, window):
+        # Rolling count, sum and sum of squares of the column-centered values,
+        # shared by the rolling mean and standard deviation of one window
+        values = self.node(*source)
+        # Column means, 0 for columns without values (common within a chunk)
+        valid = np.count_nonzero(~np.isnan(values), axis=0)
+        offset = np.nansum(values, axis=0) / np.maximum(valid, 1)
+        centered = values - offset
+        sums, counts = _window_sums(centered, window)
+        squares, _ = _window_sums(centered * centered, window)
+        return offset, sums, squares, counts
+
+    def _sma(self, source, window):
+        offset, sums, _, counts = self.node('moments', source, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = sums / counts + offset
+        out[counts < 1] = np.nan
+        return out
+
+    def _std(self, source, window, ddof):
+        _, sums, squares, counts = self.node('moments', source, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (squares - sums * sums / counts) / (counts - ddof)
+        out = np.sqrt(np.maximum(variance, 0.0))
+        out[(counts < 1) | (counts <= ddof)] = np.nan
+        return out
+
+    def _ema(self, source, alpha):
+        # Recursive smoothing y[t] = alpha * x[t] + (1 - alpha) * y[t-1],
+        # starting at each column's first value and skipping missing values
+        def smooth(values):
+            return pd.DataFrame(values).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+        return self._resume(('ema', source, alpha), self.node(*source), smooth)
+
+    def _difference(self, left, right):
+        return self.node(*left) - self.node(*right)
+
+    def _true_range(self):
+        close = self.node('input', 'price')
+        if 'high' not in self._inputs or 'low' not in self._inputs:
+            # Close-to-close range when no bar highs and lows are available
+            return np.abs(self.node('delta', ('input', 'price')))
+        high, low = self.node('input', 'high'), self.node('input', 'low')
+        previous = np.full_like(close, np.nan)
+        previous[1:] = close[:-1]
+        # fmax skips the missing previous close on the first bar
+        ranges = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+        return np.where(np.isnan(high - low), np.nan, ranges)
+
+    def _running_max(self, source):
+        return self._resume(('running_max', source), self.node(*source),
+                            lambda values: np.fmax.accumulate(values, axis=0))
+
+    def _running_min(self, source):
+        return self._resume(('running_min', source), self.node(*source),
+                            lambda values: np.fmin.accumulate(values, axis=0))
+
+    def _drawdown(self, source):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.node(*source) / self.node('running_max', source) - 1.0
+
+    # Indicators: each returns {output suffix: matrix}
+
+    def returns(self):
+        return {'': self.node('returns', ('input', 'price'))}
+
+    def sma(self, window):
+        return {'': self.node('sma', ('input', 'price'), window)}
+
+    def ema(self, span):
+        return {'': self.node('ema', ('input', 'price'), 2.0 / (span + 1))}
+
+    def volatility(self, window):
+        returns = ('returns', ('input', 'price'))
+        return {'': self.node('std', returns, window, 1)}
+
+    def rsi(self, window):
+        # Wilder's smoothing is an EMA with alpha = 1 / window
+        price = ('input', 'price')
+        gain = self.node('ema', ('gain', price), 1.0 / window)
+        loss = self.node('ema', ('loss', price), 1.0 / window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        rsi = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), rsi)
+        return {'': np.where(np.isnan(gain) | np.isnan(loss), np.nan, rsi)}
+
+    def macd(self, fast, slow, signal):
+        price = ('input', 'price')
+        line_key = ('difference', ('ema', price, 2.0 / (fast + 1)), ('ema', price, 2.0 / (slow + 1)))
+        line = self.node(*line_key)
+        signal_line = self.node('ema', line_key, 2.0 / (signal + 1))
+        return {'': line, '_signal': signal_line, '_hist': line - signal_line}
+
+    def bollinger(self, window, width):
+        price = ('input', 'price')
+        mid = self.node('sma', price, window)
+        std = self.node('std', price, window, 0)
+        upper, lower = mid + width * std, mid - width * std
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percent_b = (self.node(*price) - lower) / (upper - lower)
+            bandwidth = (upper - lower) / mid
+        return {'_mid': mid, '_upper': upper, '_lower': lower,
+                '_percent_b': percent_b, '_bandwidth': bandwidth}
+
+    def atr(self, window):
+        return {'': self.node('ema', ('true_range',), 1.0 / window)}
+
+    def drawdown(self):
+        drawdown = ('drawdown', ('input', 'price'))
+        return {'': self.node(*drawdown), '_max': self.node('running_min', drawdown)}
+
+    def compute(self, requests):
+        """
+        Evaluate several indicator requests over the shared graph
+
+        Args:
+            requests (list): Indicator requests (see parse_request)
+
+        Returns:
+            dict: Output name -> pd.DataFrame shaped like the prices. Single
+                outputs are named after the request ('rsi_14'); indicators
+                with several outputs add a suffix ('macd_signal',
+                'bollinger_20_2_upper', 'drawdown_max')
+        """
+        results = {}
+        for request in requests:
+            name, params = parse_request(request)
+            for suffix, matrix in getattr(self, name)(*params).items():
+                results[f"{request}{suffix}"] = self.frame(matrix)
+        return results
+
+@timed('indicators.compute_indicators')
+def compute_indicators(prices, requests, high=None, low=None):
+    """
+    Compute a set of technical indicators for many coins in one call
+
+    Intermediates shared between the requested indicators (returns, price
+    changes, rolling sums, EMAs) are computed once; every indicator is
+    evaluated for the whole (time x coins) matrix at once.
+
+    Args:
+        prices (pd.DataFrame): Close prices, one column per coin (see
+            build_price_panel); a Series is treated as one coin
+        requests (list): Indicator requests, e.g. ['rsi_14', 'macd',
+            'bollinger_20_2', 'atr', 'drawdown'] (see INDICATORS)
+        high (pd.DataFrame): Optional bar highs shaped like prices; ATR
+            falls back to close-to-close ranges without high and low
+        low (pd.DataFrame): Optional bar lows shaped like prices
+
+    Returns:
+        dict: Output name -> pd.DataFrame shaped like prices (see
+            IndicatorGraph.compute); use analysis.indicator_frame to get
+            one coin's indicators as columns
+    """
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame()
+    return IndicatorGraph(prices, high, low).compute(requests)
@@ -0,0 +1,347 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis import IncrementalCovariance, IncrementalIndicators
+from data_fetch import get_api
+from fx import BASE_CURRENCY
+from rate_limit import BACKGROUND
+
+# Fields kept for every tick, in column order
+TICK_FIELDS = ('price', 'market_cap', 'total_volume', 'price_change_percentage_24h')
+
+# Mapping from /coins/markets fields to tick fields
+MARKET_FIELDS = {
+    'current_price': 'price',
+    'market_cap': 'market_cap',
+    'total_volume': 'total_volume',
+    'price_change_percentage_24h': 'price_change_percentage_24h'
+}
+
+class TickBuffer:
+    """
+    Fixed-size ring buffer of market ticks for one coin
+
+    Memory stays constant however long the poller runs; once full, each
+    new tick overwrites the oldest one.
+    """
+
+    def __init__(self, capacity=2880):
+        """
+        Args:
+            capacity (int): Number of ticks kept
+        """
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype='datetime64[ms]')
+        self._values = np.full((capacity, len(TICK_FIELDS)), np.nan)
+        self._pos = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, values):
+        """
+        Add one tick
+
+        Args:
+            timestamp (datetime64 | pd.Timestamp): Tick time
+            values (dict): Field name -> value for TICK_FIELDS
+        """
+        with self._lock:
+            self._timestamps[self._pos] = np.datetime64(timestamp, 'ms')
+            self._values[self._pos] = [values.get(field, np.nan) for field in TICK_FIELDS]
+            self._pos = (self._pos + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def latest(self):
+        """
+        Returns:
+            dict: Most recent tick (with 'timestamp'), or None if empty
+        """
+        with self._lock:
+            if not self._size:
+                return None
+            last = (self._pos - 1) % self.capacity
+            tick = dict(zip(TICK_FIELDS, self._values[last].tolist()))
+            tick['timestamp'] = pd.Timestamp(self._timestamps[last])
+            return tick
+
+    def to_frame(self):
+        """
+        Returns:
+            pd.DataFrame: Ticks in time order, indexed by timestamp
+        """
+        with self._lock:
+            order = (np.arange(self._size) + self._pos - self._size) % self.capacity
+            timestamps = self._timestamps[order]
+            values = self._values[order]
+
+        return pd.DataFrame(values, columns=TICK_FIELDS,
+                            index=pd.DatetimeIndex(timestamps, name='timestamp'))
+
+class TickPoller:
+    """
+    Background thread that polls /coins/markets into per-coin tick buffers
+
+    Requests go through the shared scheduler at BACKGROUND priority, so
+    live polling never delays interactive page loads. Coins nobody has
+    watched or read for idle_timeout seconds are dropped, and the thread
+    stops once no coins are left, so an abandoned live view stops using
+    API quota. Sessions request a polling interval through watch(); the
+    poller runs at the shortest interval any active session asked for.
+    Every tick also advances per-coin IncrementalIndicators (moving
+    averages and volatility over the last ticks, annualized for the
+    polling interval) and an IncrementalCovariance of tick returns across
+    all polled coins.
+    """
+
+    def __init__(self, coins=(), interval=15, capacity=2880, vs_currency=BASE_CURRENCY,
+                 idle_timeout=120, corr_window=30):
+        """
+        Args:
+            coins (list): Coin IDs to poll
+            interval (float): Seconds between polls while no session has
+                requested an interval
+            capacity (int): Ticks kept per coin
+            vs_currency (str): Target currency
+            idle_timeout (float): Seconds a coin keeps being polled after it
+                was last watched or read
+            corr_window (int): Ticks in the live return correlation window
+        """
+        self.default_interval = interval
+        self.interval = interval
+        self.capacity = capacity
+        self.vs_currency = vs_currency
+        self.idle_timeout = idle_timeout
+        self.corr_window = corr_window
+        self._coins = list(coins)
+        self._last_seen = dict.fromkeys(self._coins, time.monotonic())
+        self._buffers = {}
+        self._indicators = {}
+        self._latest_indicators = {}
+        self._covariance = None
+        # Session -> (requested interval, last watch time)
+        self._intervals = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.errors = 0
+        self.last_poll = None
+
+    def watch(self, coins, interval=None, session=None):
+        """
+        Add coins to the polled set, triggering an immediate poll for new ones
+
+        The poller is shared by every session; each session reads the
+        subset it displays, and a coin stays polled while any session
+        keeps watching or reading it. Call it on every refresh to keep
+        the session's interval request alive.
+
+        Args:
+            coins (list): Coin IDs the session displays
+            interval (float): Polling interval the session asks for, in
+                seconds (None: no request)
+            session (str): Key identifying the requesting session
+        """
+        now = time.monotonic()
+        with self._lock:
+            added = [coin for coin in coins if coin not in self._coins]
+            self._coins.extend(added)
+            for coin in coins:
+                self._last_seen[coin] = now
+            if interval is not None:
+                self._intervals[session] = (interval, now)
+            faster = self._update_interval()
+        if added or faster:
+            self._wake.set()
+
+    def _update_interval(self):
+        # Shortest interval requested by a session within idle_timeout
+        # (caller holds _lock); returns True if polling got faster
+        cutoff = time.monotonic() - self.idle_timeout
+        self._intervals = {session: request for session, request in self._intervals.items()
+                           if request[1] >= cutoff}
+        previous = self.interval
+        self.interval = min((interval for interval, _ in self._intervals.values()),
+                            default=self.default_interval)
+        return self.interval < previous
+
+    def start(self):
+        """Start the polling thread if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="tick-poller", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread"""
+        self._stop.set()
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                # Give up the thread in the same step as finding nothing to
+                # poll, so a concurrent watch() + start() starts a new one
+                if not self._drop_idle():
+                    self._thread = None
+                    return
+            self.poll()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _drop_idle(self):
+        """
+        Forget coins not watched or read within idle_timeout (caller holds _lock)
+
+        Returns:
+            list: Coins still polled
+        """
+        self._update_interval()
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [coin for coin in self._coins if self._last_seen.get(coin, 0) < cutoff]
+        for coin in idle:
+            self._coins.remove(coin)
+            self._last_seen.pop(coin, None)
+            self._buffers.pop(coin, None)
+            self._indicators.pop(coin, None)
+            self._latest_indicators.pop(coin, None)
+        return self._coins
+
+    def _touch(self, coin_id):
+        if coin_id in self._last_seen:
+            self._last_seen[coin_id] = time.monotonic()
+
+    def poll(self):
+        """
+        Fetch one round of ticks for all coins
+
+        Returns:
+            int: Number of coins updated
+        """
+        with self._lock:
+            coins = list(self._coins)
+        if not coins:
+            return 0
+
+        market_data = get_api().fetch_coin_prices(coins, self.vs_currency, priority=BACKGROUND)
+        self.polls += 1
+        if not market_data:
+            self.errors += 1
+            return 0
+
+        now = pd.Timestamp.now()
+        periods_per_year = 365 * 86400 / self.interval
+        for row in market_data:
+            values = {tick_field: row.get(field) for field, tick_field in MARKET_FIELDS.items()}
+            values = {k: np.nan if v is None else v for k, v in values.items()}
+            with self._lock:
+                if row['id'] not in self._last_seen:
+                    continue
+                buffer = self._buffers.setdefault(row['id'], TickBuffer(self.capacity))
+                indicators = self._indicators.setdefault(row['id'], IncrementalIndicators())
+            buffer.append(now, values)
+            # Ticks arrive every interval seconds, not daily
+            indicators.periods_per_year = periods_per_year
+            self._latest_indicators[row['id']] = indicators.update(values['price'], now)
+
+        self._update_covariance()
+        self.last_poll = now
+        return len(market_data)
+
+    def _update_covariance(self):
+        # Fold the newest tick of every coin into the return covariance;
+        # a changed coin set starts a new one, warmed up from the buffers
+        with self._lock:
+            buffers = dict(self._buffers)
+        columns = sorted(buffers)
+        if self._covariance is None or self._covariance.columns != columns:
+            covariance = IncrementalCovariance(columns, self.corr_window)
+            panel = pd.DataFrame({coin: buffers[coin].to_frame()['price'] for coin in columns})
+            covariance.seed(panel.dropna().tail(self.corr_window + 1))
+            self._covariance = covariance
+        else:
+            self._covariance.update([buffers[coin].latest()['price'] for coin in columns])
+
+    def latest(self, coin_id):
+        """
+        Returns:
+            dict: Most recent tick for coin_id, or None if none yet
+        """
+        self._touch(coin_id)
+        buffer = self._buffers.get(coin_id)
+        return buffer.latest() if buffer is not None else None
+
+    def indicators(self, coin_id):
+        """
+        Returns:
+            dict: Moving averages and volatility over the latest ticks (see
+                IncrementalIndicators.update), or None if none yet
+        """
+        self._touch(coin_id)
+        return self._latest_indicators.get(coin_id)
+
+    def correlation(self, coin_ids):
+        """
+        Args:
+            coin_ids (list): Coins to include
+
+        Returns:
+            pd.DataFrame: Correlation of tick returns over the last
+                corr_window ticks, or None until there are two returns
+        """
+        for coin_id in coin_ids:
+            self._touch(coin_id)
+        covariance = self._covariance
+        if covariance is None:
+            return None
+        coin_ids = [coin_id for coin_id in coin_ids if coin_id in covariance.columns]
+        corr = covariance.correlation().loc[coin_ids, coin_ids]
+        if len(coin_ids) < 2 or corr.isna().all().all():
+            return None
+        return corr
+
+    def ticks(self, coin_id):
+        """
+        Returns:
+            pd.DataFrame: Buffered ticks for coin_id (empty if none yet)
+        """
+        self._touch(coin_id)
+        buffer = self._buffers.get(coin_id)
+        if buffer is None:
+            return pd.DataFrame(columns=TICK_FIELDS)
+        return buffer.to_frame()
+
+# One poller per process, shared by every session
+_poller = None
+_poller_lock = threading.Lock()
+
+def get_poller(interval=15, capacity=2880, idle_timeout=120):
+    """
+    Get the shared tick poller, creating it on first use
+
+    Args:
+        interval (float): Polling interval for a newly created poller
+        capacity (int): Ticks kept per coin for a newly created poller
+        idle_timeout (float): Seconds an unread coin keeps being polled, for
+            a newly created poller
+
+    Returns:
+        TickPoller: Process-wide poller (not started)
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = TickPoller(interval=interval, capacity=capacity, idle_timeout=idle_timeout)
+        return _poller
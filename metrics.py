@@ -0,0 +1,447 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Histogram buckets for durations in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histogram buckets for payload sizes in bytes (1 KiB to 16 MiB)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(8))
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return repr(value)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+class _Metric:
+    """
+    Base class for a named metric with a fixed set of label names
+
+    Values are kept per label combination; every update takes a small lock
+    so metrics can be recorded from worker threads.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Args:
+            name (str): Metric name in Prometheus syntax
+            documentation (str): HELP text
+            labelnames (tuple): Label names every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return OrderedDict(zip(self.labelnames, key))
+
+    def clear(self):
+        """Drop all recorded values"""
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        """
+        Returns:
+            list: Lines in the Prometheus text exposition format
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing count (requests, errors, bytes)"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Add amount to the counter for the given labels
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """
+        Returns:
+            float: Current count for the given labels
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in items]
+
+class Gauge(_Metric):
+    """Value that can go up and down (queue depth, cache hit ratio)"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """
+        Set the gauge for the given labels
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        """
+        Returns:
+            float: Current value for the given labels, or None if never set
+        """
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in items]
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values over fixed buckets
+
+    Each label combination keeps per-bucket counts plus the sum and count
+    of observations, which is enough for Prometheus to derive rates,
+    averages and quantiles.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            name (str): Metric name in Prometheus syntax
+            documentation (str): HELP text
+            labelnames (tuple): Label names every sample carries
+            buckets (tuple): Increasing upper bounds; +Inf is added automatically
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """
+        Record one observation for the given labels
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1),
+                                             'sum': 0.0, 'count': 0}
+            state['counts'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def summary(self, **labels):
+        """
+        Returns:
+            dict: Observation count, sum, mean and bucket-interpolated
+                p50/p95 for the given labels (None if nothing was observed)
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return None
+            counts = list(state['counts'])
+            total, count = state['sum'], state['count']
+
+        return {
+            'count': count,
+            'sum': total,
+            'mean': total / count,
+            'p50': self._quantile(counts, count, 0.5),
+            'p95': self._quantile(counts, count, 0.95)
+        }
+
+    def _quantile(self, counts, count, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return 0.0
+
+    def label_sets(self):
+        """
+        Returns:
+            list: Label dicts with at least one observation
+        """
+        with self._lock:
+            keys = sorted(self._values)
+        return [dict(self._labels(key)) for key in keys]
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state['counts'])))
+                           for key, state in self._values.items())
+
+        samples = []
+        for key, state in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), state['counts']):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", OrderedDict(labels, le=_format_value(float(bound))),
+                                cumulative))
+            samples.append((f"{self.name}_sum", labels, state['sum']))
+            samples.append((f"{self.name}_count", labels, state['count']))
+        return samples
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together in the Prometheus text format
+
+    Collectors are callables run before every render, used to copy
+    counters kept elsewhere (cache and scheduler statistics) into gauges.
+    """
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """
+        Returns:
+            Counter: The registered counter, created on first use
+        """
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """
+        Returns:
+            Gauge: The registered gauge, created on first use
+        """
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Returns:
+            Histogram: The registered histogram, created on first use
+        """
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name):
+        """
+        Returns:
+            The metric registered under name, or None
+        """
+        return self._metrics.get(name)
+
+    def add_collector(self, collector):
+        """
+        Register a zero-argument callable run before every render
+
+        Args:
+            collector (callable): Updates gauges from an external source
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def collect(self):
+        """Run all collectors"""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+
+    def render(self):
+        """
+        Returns:
+            str: All metrics in the Prometheus text exposition format
+        """
+        self.collect()
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """Drop all recorded values, keeping the registered metrics"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+# One registry per process, shared by every session
+_registry = MetricsRegistry()
+
+STAGE_SECONDS = _registry.histogram(
+    'crypto_dashboard_stage_seconds', 'Wall time spent in each pipeline stage', ('stage',))
+STAGE_ERRORS = _registry.counter(
+    'crypto_dashboard_stage_errors_total', 'Pipeline stages that raised an exception', ('stage',))
+
+def get_registry():
+    """
+    Get the process-wide metrics registry
+
+    Returns:
+        MetricsRegistry: Shared registry
+    """
+    return _registry
+
+class timed:
+    """
+    Record the wall time of a pipeline stage in STAGE_SECONDS
+
+    Works as a context manager::
+
+        with timed('app.tab.price_trends'):
+            ...
+
+    and as a decorator::
+
+        @timed('analysis.calculate_indicators')
+        def calculate_indicators(...):
+            ...
+
+    Exceptions are counted in STAGE_ERRORS and re-raised.
+    """
+
+    def __init__(self, stage):
+        """
+        Args:
+            stage (str): Stage label, '<module>.<function>' by convention
+        """
+        self.stage = stage
+        self.elapsed = None
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        STAGE_SECONDS.observe(self.elapsed, stage=self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage)
+        return False
+
+    def __call__(self, fn):
+        stage = self.stage
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # A fresh context per call keeps concurrent calls independent
+            with timed(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+def stage_summary():
+    """
+    Summarize recorded stage timings
+
+    Returns:
+        list: One dict per stage with 'stage', 'count', 'errors', 'total',
+            'mean', 'p50' and 'p95' (seconds), slowest total first
+    """
+    rows = []
+    for labels in STAGE_SECONDS.label_sets():
+        summary = STAGE_SECONDS.summary(**labels)
+        rows.append({
+            'stage': labels['stage'],
+            'count': summary['count'],
+            'errors': STAGE_ERRORS.value(**labels),
+            'total': summary['sum'],
+            'mean': summary['mean'],
+            'p50': summary['p50'],
+            'p95': summary['p95']
+        })
+    return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+def render_prometheus():
+    """
+    Returns:
+        str: The shared registry in the Prometheus text exposition format
+    """
+    return _registry.render()
+
+# Background /metrics endpoint, started at most once per process
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serve the shared registry at http://host:port/metrics for Prometheus
+
+    Args:
+        port (int): Port to bind
+        host (str): Interface to bind
+
+    Returns:
+        ThreadingHTTPServer: The running server (the existing one if already started)
+    """
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+
+        # Only needed when metrics are served, so kept off the startup path
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _metrics_server = ThreadingHTTPServer((host, port), Handler)
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-server",
+                         daemon=True).start()
+        return _metrics_server
@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from price_store import MS_PER_DAY, chart_step_ms
+
+# Bar resolutions of the pyramid, finest first; each step divides the next
+RESOLUTIONS = {
+    '5m': 5 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '1d': MS_PER_DAY
+}
+
+# Column layout of every stored bar array. 'volume' and 'market_cap' are
+# CoinGecko's rolling 24h volume and market cap at the bar's last tick;
+# 'count' is the number of raw ticks in the bar.
+BAR_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'market_cap', 'count')
+
+# Default bar budget for a chart (see resolution_for)
+MAX_BARS = 500
+
+def resolution_for(days, max_bars=MAX_BARS):
+    """
+    Pick the pyramid level for a time window
+
+    The level is never finer than the raw data CoinGecko returns for the
+    window, and as fine as possible within the bar budget.
+
+    Args:
+        days (float): Window length in days
+        max_bars (int): Maximum number of bars wanted
+
+    Returns:
+        str: Key of RESOLUTIONS
+    """
+    min_step = chart_step_ms(days)
+    for resolution, step in RESOLUTIONS.items():
+        if step >= min_step and days * MS_PER_DAY / step <= max_bars:
+            return resolution
+    return '1d'
+
+def _bucket_bounds(timestamps, step_ms):
+    buckets = timestamps // step_ms * step_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+    return buckets[starts], starts, ends
+
+def _last_valid(values, starts, ends):
+    # Index of the latest finite value at or before each row, -1 if none
+    latest = np.maximum.accumulate(np.where(np.isfinite(values), np.arange(len(values)), -1))
+    idx = latest[ends]
+    return np.where(idx >= starts, values[np.maximum(idx, 0)], np.nan)
+
+def aggregate_ticks(rows, step_ms):
+    """
+    Aggregate raw store rows into OHLCV bars
+
+    Args:
+        rows (np.ndarray): (n, 4) array with price_store.COLUMNS, sorted by timestamp
+        step_ms (int): Bar length in milliseconds (bars start at multiples of it)
+
+    Returns:
+        np.ndarray: (bars, 8) float64 array with BAR_COLUMNS
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    rows = rows[np.isfinite(rows[:, 1])] if len(rows) else rows
+    if not len(rows):
+        return np.empty((0, len(BAR_COLUMNS)))
+
+    price = rows[:, 1]
+    bucket, starts, ends = _bucket_bounds(rows[:, 0], step_ms)
+    out = np.empty((len(starts), len(BAR_COLUMNS)))
+    out[:, 0] = bucket
+    out[:, 1] = price[starts]
+    out[:, 2] = np.maximum.reduceat(price, starts)
+    out[:, 3] = np.minimum.reduceat(price, starts)
+    out[:, 4] = price[ends]
+    out[:, 5] = _last_valid(rows[:, 3], starts, ends)
+    out[:, 6] = _last_valid(rows[:, 2], starts, ends)
+    out[:, 7] = ends - starts + 1
+    return out
+
+def rollup_bars(bars, step_ms):
+    """
+    Merge finer bars into coarser ones
+
+    Because every resolution divides the next, rolling up bars gives the
+    same result as aggregating the underlying ticks directly.
+
+    Args:
+        bars (np.ndarray): (n, 8) array with BAR_COLUMNS, sorted by timestamp
+        step_ms (int): Coarser bar length in milliseconds
+
+    Returns:
+        np.ndarray: (bars, 8) array with BAR_COLUMNS
+    """
+    if not len(bars):
+        return np.empty((0, len(BAR_COLUMNS)))
+
+    bucket, starts, ends = _bucket_bounds(bars[:, 0], step_ms)
+    out = np.empty((len(starts), len(BAR_COLUMNS)))
+    out[:, 0] = bucket
+    out[:, 1] = bars[starts, 1]
+    out[:, 2] = np.maximum.reduceat(bars[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(bars[:, 3], starts)
+    out[:, 4] = bars[ends, 4]
+    out[:, 5] = _last_valid(bars[:, 5], starts, ends)
+    out[:, 6] = _last_valid(bars[:, 6], starts, ends)
+    out[:, 7] = np.add.reduceat(bars[:, 7], starts)
+    return out
+
+def bars_to_frame(bars):
+    """
+    Convert a bar array into a DataFrame
+
+    Args:
+        bars (np.ndarray): Array with BAR_COLUMNS
+
+    Returns:
+        pd.DataFrame: Columns 'open', 'high', 'low', 'close', 'volume',
+            'market_cap' and 'count' indexed by bar start time
+    """
+    bars = np.asarray(bars, dtype=np.float64).reshape(-1, len(BAR_COLUMNS))
+    df = pd.DataFrame(bars[:, 1:], columns=list(BAR_COLUMNS[1:]),
+                      index=pd.to_datetime(bars[:, 0].astype(np.int64), unit='ms'))
+    df.index.name = 'timestamp'
+    df['count'] = df['count'].astype(np.int64)
+    return df
+
+class BarStore:
+    """
+    On-disk OHLCV pyramid built from a PriceStore
+
+    Every (coin, currency) pair gets one float64 array per resolution in
+    RESOLUTIONS, memory-mapped on read, and a JSON sidecar remembering
+    which raw rows have been aggregated. update() only re-aggregates the
+    bars from the last one onwards; coarser levels are rolled up from the
+    level below instead of from raw ticks.
+    """
+
+    def __init__(self, prices, root=None):
+        """
+        Args:
+            prices (PriceStore): Raw history the bars are built from
+            root (str): Storage directory (default: 'bars' inside the price store)
+        """
+        self.prices = prices
+        self.root = root or os.path.join(prices.root, 'bars')
+        self._lock = threading.RLock()
+
+    def _base(self, coin_id, vs_currency):
+        safe_coin = re.sub(r'[^A-Za-z0-9_.-]', '_', coin_id)
+        safe_currency = re.sub(r'[^A-Za-z0-9_.-]', '_', vs_currency.lower())
+        return os.path.join(self.root, safe_currency, safe_coin)
+
+    def _path(self, coin_id, vs_currency, resolution):
+        return f"{self._base(coin_id, vs_currency)}.{resolution}.npy"
+
+    def _meta_path(self, coin_id, vs_currency):
+        return self._base(coin_id, vs_currency) + '.json'
+
+    def _read_meta(self, coin_id, vs_currency):
+        try:
+            with open(self._meta_path(coin_id, vs_currency)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, coin_id, vs_currency="usd", resolution='1d'):
+        """
+        Load every stored bar of one resolution
+
+        Returns:
+            np.ndarray: Read-only memory-mapped (n, 8) array (empty if none)
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution!r}, expected one of {list(RESOLUTIONS)}")
+        path = self._path(coin_id, vs_currency, resolution)
+        with self._lock:
+            if not os.path.exists(path):
+                return np.empty((0, len(BAR_COLUMNS)))
+            return np.load(path, mmap_mode='r')
+
+    def _save(self, path, bars):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+
+    def update(self, coin_id, vs_currency="usd"):
+        """
+        Bring a coin's pyramid up to date with its raw history
+
+        New ticks at the end of the raw history only rebuild the bars from
+        the last aggregated one onwards. Earlier history that was added or
+        changed since the last update (a longer window backfilled at the
+        head) triggers a full rebuild.
+
+        Args:
+            coin_id (str): Coin ID
+            vs_currency (str): Quote currency
+
+        Returns:
+            int: Number of bars written across all resolutions (0 if
+                already up to date)
+        """
+        with self._lock:
+            raw = self.prices.load(coin_id, vs_currency)
+            meta = self._read_meta(coin_id, vs_currency)
+            if not len(raw):
+                return 0
+
+            first, last = int(raw[0, 0]), int(raw[-1, 0])
+            if meta and (meta['first'], meta['last'], meta['rows']) == (first, last, len(raw)):
+                return 0
+
+            # Incremental only if every previously aggregated row is still there
+            # unchanged in position, i.e. new ticks were only appended
+            since = None
+            if (meta and meta['first'] == first and last >= meta['last']
+                    and np.searchsorted(raw[:, 0], meta['last'], side='right') == meta['rows']):
+                since = meta['last']
+
+            os.makedirs(os.path.dirname(self._base(coin_id, vs_currency)), exist_ok=True)
+            written = 0
+            finer = None
+            for resolution, step in RESOLUTIONS.items():
+                start = None if since is None else since // step * step
+                if finer is None:
+                    lo = 0 if start is None else int(np.searchsorted(raw[:, 0], start, side='left'))
+                    tail = aggregate_ticks(raw[lo:], step)
+                else:
+                    lo = 0 if start is None else int(np.searchsorted(finer[:, 0], start, side='left'))
+                    tail = rollup_bars(finer[lo:], step)
+
+                if start is None:
+                    bars = tail
+                else:
+                    old = self.load(coin_id, vs_currency, resolution)
+                    keep = int(np.searchsorted(old[:, 0], start, side='left'))
+                    bars = np.concatenate([old[:keep], tail])
+
+                self._save(self._path(coin_id, vs_currency, resolution), bars)
+                written += len(tail)
+                finer = bars
+
+            with open(self._meta_path(coin_id, vs_currency) + '.tmp', 'w') as f:
+                json.dump({'first': first, 'last': last, 'rows': len(raw)}, f)
+            os.replace(self._meta_path(coin_id, vs_currency) + '.tmp',
+                       self._meta_path(coin_id, vs_currency))
+            return written
+
+    def query(self, coin_id, vs_currency="usd", resolution='1d', start_ms=None, end_ms=None):
+        """
+        Read bars of one resolution within a time range
+
+        Args:
+            coin_id (str): Coin ID
+            vs_currency (str): Quote currency
+            resolution (str): Key of RESOLUTIONS
+            start_ms (int): Earliest bar start (ms since epoch, inclusive)
+            end_ms (int): Latest bar start (ms since epoch, inclusive)
+
+        Returns:
+            np.ndarray: (n, 8) array with BAR_COLUMNS
+        """
+        bars = self.load(coin_id, vs_currency, resolution)
+        lo = 0 if start_ms is None else np.searchsorted(bars[:, 0], start_ms, side='left')
+        hi = len(bars) if end_ms is None else np.searchsorted(bars[:, 0], end_ms, side='right')
+        return np.array(bars[lo:hi])
+
+    def clear(self, coin_id=None, vs_currency="usd"):
+        """
+        Remove bars for one coin, or for every coin if coin_id is None
+        """
+        with self._lock:
+            if coin_id is None:
+                for dirpath, _, filenames in os.walk(self.root):
+                    for name in filenames:
+                        if name.endswith(('.npy', '.json')):
+                            os.remove(os.path.join(dirpath, name))
+                return
+
+            paths = [self._path(coin_id, vs_currency, resolution) for resolution in RESOLUTIONS]
+            for path in paths + [self._meta_path(coin_id, vs_currency)]:
+                if os.path.exists(path):
+                    os.remove(path)
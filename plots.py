@@ -1,9 +1,150 @@
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import pandas as pd
+import numpy as np
 
-def create_price_chart(df, coin_name="Cryptocurrency", show_ma=True):
+from fx import currency_prefix
+from metrics import timed
+
+# Default point budget per trace (about two points per horizontal pixel)
+MAX_POINTS = 2000
+
+# Traces with more points than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 5000
+
+def lttb_downsample(x, y, threshold):
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm
+
+    LTTB keeps the first and last points and, for every bucket in between,
+    the point forming the largest triangle with its neighbours, which
+    preserves peaks, troughs and the overall shape of the line.
+
+    Args:
+        x (np.ndarray): Numeric x values in ascending order
+        y (np.ndarray): y values (no NaN)
+        threshold (int): Number of points to keep
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
+
+def _line_trace(x, y, max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD, **kwargs):
+    # Build a line trace, downsampled to max_points and switched to WebGL
+    # when it is still larger than webgl_threshold
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~np.isnan(y)
+    x, y = x[keep], y[keep]
+
+    if max_points and len(y) > max_points:
+        x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+        idx = lttb_downsample(x_numeric, y, max_points)
+        x, y = x[idx], y[idx]
+
+    trace_type = go.Scattergl if webgl_threshold and len(y) > webgl_threshold else go.Scatter
+    return trace_type(x=x, y=y, **kwargs)
+
+def _bar_trace(x, y, max_points=MAX_POINTS, **kwargs):
+    # Build a bar trace (e.g. a MACD histogram) with at most max_points bars:
+    # x is split into equal buckets and each keeps its largest bar by
+    # magnitude, so peaks and sign changes of the histogram survive
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~np.isnan(y)
+    x, y = x[keep], y[keep]
+
+    if max_points and len(y) > max_points:
+        buckets = np.arange(len(y)) * max_points // len(y)
+        order = np.lexsort((-np.abs(y), buckets))
+        first = np.flatnonzero(np.diff(buckets[order], prepend=-1))
+        idx = np.sort(order[first])
+        x, y = x[idx], y[idx]
+
+    return go.Bar(x=x, y=y, marker_color=np.where(y >= 0, '#00d4aa', '#ff4b4b'), **kwargs)
+
+def _window_label(index, window):
+    # Describe a rolling window in the index's sampling interval, e.g.
+    # '30-day' for daily data or '30 x 1h' for hourly data
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return f'{window}-period'
+    step = pd.Series(index).diff().median()
+    if step == pd.Timedelta(days=1):
+        return f'{window}-day'
+    for unit, size in (('d', pd.Timedelta(days=1)), ('h', pd.Timedelta(hours=1)),
+                       ('min', pd.Timedelta(minutes=1))):
+        if step >= size:
+            return f'{window} x {step / size:g}{unit}'
+    return f'{window}-period'
+
+def count_points(fig):
+    """
+    Count the data points across all traces of a figure
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to inspect
+
+    Returns:
+        int: Total number of x values
+    """
+    return sum(len(trace.x) for trace in fig.data if trace.x is not None)
+
+def payload_report(chart_fn, df, *args, **kwargs):
+    """
+    Compare the browser payload of a chart with and without downsampling
+
+    Args:
+        chart_fn (callable): Chart builder such as create_price_chart
+        df (pd.DataFrame): Data passed to the builder
+        *args, **kwargs: Extra builder arguments (max_points, ...)
+
+    Returns:
+        dict: Point counts and JSON payload sizes in bytes before and after
+    """
+    raw = chart_fn(df, *args, **{**kwargs, 'max_points': None, 'webgl_threshold': None})
+    reduced = chart_fn(df, *args, **kwargs)
+
+    raw_bytes = len(raw.to_json())
+    reduced_bytes = len(reduced.to_json())
+    return {
+        'points_before': count_points(raw),
+        'points_after': count_points(reduced),
+        'bytes_before': raw_bytes,
+        'bytes_after': reduced_bytes,
+        'reduction': 1 - reduced_bytes / raw_bytes if raw_bytes else 0.0,
+        'webgl': any(trace.type == 'scattergl' for trace in reduced.data)
+    }
+
+@timed('plots.create_price_chart')
+def create_price_chart(df, coin_name="Cryptocurrency", show_ma=True,
+                       max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD, currency="usd"):
     """
     Create an interactive price chart with moving averages
 
@@ -11,22 +152,28 @@ def create_price_chart(df, coin_name="Cryptocurrency", show_ma=True):
         df (pd.DataFrame): Price data with timestamp index
         coin_name (str): Name of the cryptocurrency
         show_ma (bool): Whether to show moving averages
+        max_points (int): Per-trace point budget for LTTB downsampling (None: all points)
+        webgl_threshold (int): Point count above which traces use WebGL (None: never)
+        currency (str): Quote currency of the prices
 
     Returns:
         plotly.graph_objects.Figure: Interactive price chart
     """
     fig = go.Figure()
+    price_hover = 'Price: ' + currency_prefix(currency) + '%{y:,.2f}<extra></extra>'
 
     # Add price line
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['price'],
+    fig.add_trace(_line_trace(
+        df.index,
+        df['price'],
+        max_points,
+        webgl_threshold,
         mode='lines',
         name=f'{coin_name} Price',
         line=dict(color='#00d4aa', width=2),
         hovertemplate='<b>%{fullData.name}</b><br>' +
                      'Date: %{x}<br>' +
-                     'Price: $%{y:,.2f}<extra></extra>'
+                     price_hover
     ))
 
     # Add moving averages if available and requested
@@ -36,23 +183,25 @@ def create_price_chart(df, coin_name="Cryptocurrency", show_ma=True):
 
         for i, ma_col in enumerate(ma_columns):
             if i < len(ma_colors):
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=df[ma_col],
+                fig.add_trace(_line_trace(
+                    df.index,
+                    df[ma_col],
+                    max_points,
+                    webgl_threshold,
                     mode='lines',
                     name=f'{ma_col.replace("_", " ")}',
                     line=dict(color=ma_colors[i], width=1.5),
                     opacity=0.8,
                     hovertemplate=f'<b>{ma_col.replace("_", " ")}</b><br>' +
                                  'Date: %{x}<br>' +
-                                 'Price: $%{y:,.2f}<extra></extra>'
+                                 price_hover
                 ))
 
     # Update layout
     fig.update_layout(
         title=f'{coin_name} Price Chart',
         xaxis_title='Date',
-        yaxis_title='Price (USD)',
+        yaxis_title=f'Price ({currency.upper()})',
         template='plotly_dark',
         hovermode='x unified',
         showlegend=True,
@@ -61,13 +210,132 @@ def create_price_chart(df, coin_name="Cryptocurrency", show_ma=True):
 
     return fig
 
-def create_volatility_chart(df, coin_name="Cryptocurrency"):
+@timed('plots.create_candlestick_chart')
+def create_candlestick_chart(bars, coin_name="Cryptocurrency", ma_df=None,
+                             max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD, currency="usd"):
+    """
+    Create a candlestick chart from OHLCV bars
+
+    Args:
+        bars (pd.DataFrame): Bars with 'open', 'high', 'low', 'close'
+            columns and a timestamp index (see data_fetch.get_ohlcv)
+        coin_name (str): Name of the cryptocurrency
+        ma_df (pd.DataFrame): Optional frame whose 'MA_<window>' columns
+            are drawn on top of the candles
+        max_points (int): Per-trace point budget for the moving averages
+        webgl_threshold (int): Point count above which MA traces use WebGL
+        currency (str): Quote currency of the bars
+
+    Returns:
+        plotly.graph_objects.Figure: Candlestick chart
+    """
+    fig = go.Figure()
+
+    fig.add_trace(go.Candlestick(
+        x=bars.index,
+        open=bars['open'],
+        high=bars['high'],
+        low=bars['low'],
+        close=bars['close'],
+        name=f'{coin_name} ({bars.attrs.get("resolution", "bars")})',
+        increasing_line_color='#00d4aa',
+        decreasing_line_color='#ff4b4b'
+    ))
+
+    if ma_df is not None:
+        ma_colors = ['#ff6b6b', '#4ecdc4', '#45b7d1']
+        ma_columns = [col for col in ma_df.columns if col.startswith('MA_')]
+        for ma_col, color in zip(ma_columns, ma_colors):
+            fig.add_trace(_line_trace(
+                ma_df.index,
+                ma_df[ma_col],
+                max_points,
+                webgl_threshold,
+                mode='lines',
+                name=f'{ma_col.replace("_", " ")}',
+                line=dict(color=color, width=1.5),
+                opacity=0.8
+            ))
+
+    fig.update_layout(
+        title=f'{coin_name} Price Chart',
+        xaxis_title='Date',
+        yaxis_title=f'Price ({currency.upper()})',
+        template='plotly_dark',
+        xaxis_rangeslider_visible=False,
+        showlegend=True,
+        height=500
+    )
+
+    return fig
+
+@timed('plots.create_indicator_chart')
+def create_indicator_chart(df, columns, title, reference_lines=(), height=300,
+                           max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD):
+    """
+    Create a chart of technical indicator series
+
+    Args:
+        df (pd.DataFrame): Indicator values with a timestamp index
+            (e.g. from indicators.compute_indicators via indicator_frame)
+        columns (list): Columns to draw; columns ending in '_hist' are drawn
+            as bars (the largest bar per bucket within max_points), the rest
+            as lines
+        title (str): Chart title
+        reference_lines (tuple): Y values marked with dashed lines (e.g. 30 and 70 for RSI)
+        height (int): Chart height in pixels
+        max_points (int): Per-trace point budget for LTTB downsampling (None: all points)
+        webgl_threshold (int): Point count above which traces use WebGL (None: never)
+
+    Returns:
+        plotly.graph_objects.Figure: Indicator chart
+    """
+    fig = go.Figure()
+    colors = ['#00d4aa', '#ff6b6b', '#4ecdc4', '#45b7d1', '#f7b731']
+
+    for i, column in enumerate(columns):
+        if column not in df.columns:
+            continue
+        if column.endswith('_hist'):
+            fig.add_trace(_bar_trace(df.index, df[column], max_points, name=column, opacity=0.6))
+        else:
+            fig.add_trace(_line_trace(
+                df.index,
+                df[column],
+                max_points,
+                webgl_threshold,
+                mode='lines',
+                name=column,
+                line=dict(color=colors[i % len(colors)], width=1.5)
+            ))
+
+    for level in reference_lines:
+        fig.add_hline(y=level, line_dash='dash', line_color='#888888', opacity=0.6)
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        template='plotly_dark',
+        hovermode='x unified',
+        showlegend=True,
+        height=height
+    )
+
+    return fig
+
+@timed('plots.create_volatility_chart')
+def create_volatility_chart(df, coin_name="Cryptocurrency",
+                            max_points=MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD, window=30):
     """
     Create volatility chart
 
     Args:
         df (pd.DataFrame): Data with volatility column
         coin_name (str): Name of the cryptocurrency
+        max_points (int): Point budget for LTTB downsampling (None: all points)
+        webgl_threshold (int): Point count above which the trace uses WebGL (None: never)
+        window (int): Rolling window the volatility was computed over, in
+            samples of df's index (shown in the title)
 
     Returns:
         plotly.graph_objects.Figure: Volatility chart
@@ -75,9 +343,11 @@ def create_volatility_chart(df, coin_name="Cryptocurrency"):
     fig = go.Figure()
 
     if 'volatility' in df.columns:
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['volatility'],
+        fig.add_trace(_line_trace(
+            df.index,
+            df['volatility'],
+            max_points,
+            webgl_threshold,
             mode='lines',
             fill='tozeroy',
             name=f'{coin_name} Volatility',
@@ -88,7 +358,7 @@ def create_volatility_chart(df, coin_name="Cryptocurrency"):
         ))
 
     fig.update_layout(
-        title=f'{coin_name} Price Volatility (30-day)',
+        title=f'{coin_name} Price Volatility ({_window_label(df.index, window)})',
         xaxis_title='Date',
         yaxis_title='Volatility',
         template='plotly_dark',
@@ -97,34 +367,45 @@ def create_volatility_chart(df, coin_name="Cryptocurrency"):
 
     return fig
 
-def create_correlation_heatmap(correlation_matrix):
+@timed('plots.create_correlation_heatmap')
+def create_correlation_heatmap(correlation_matrix, title='Cryptocurrency Return Correlations',
+                               max_annotated=20):
     """
     Create correlation heatmap
 
     Args:
         correlation_matrix (pd.DataFrame): Correlation matrix
+            (e.g. from calculate_correlation_matrix)
+        title (str): Chart title
+        max_annotated (int): Largest matrix size that still prints the
+            value in every cell
 
     Returns:
         plotly.graph_objects.Figure: Correlation heatmap
     """
+    annotate = len(correlation_matrix) <= max_annotated
+
     fig = go.Figure(data=go.Heatmap(
         z=correlation_matrix.values,
         x=correlation_matrix.columns,
         y=correlation_matrix.index,
         colorscale='RdYlBu',
         zmid=0,
-        text=correlation_matrix.round(3).values,
-        texttemplate='%{text}',
+        zmin=-1,
+        zmax=1,
+        text=correlation_matrix.round(3).values if annotate else None,
+        texttemplate='%{text}' if annotate else None,
         textfont={"size": 12},
         hovertemplate='<b>%{y} vs %{x}</b><br>' +
                      'Correlation: %{z:.3f}<extra></extra>'
     ))
 
+    size = 600 if annotate else max(600, min(1200, 12 * len(correlation_matrix)))
     fig.update_layout(
-        title='Cryptocurrency Price Correlations',
+        title=title,
         template='plotly_dark',
-        height=500,
-        width=600
+        height=size - 100,
+        width=size
     )
 
     return fig
\ No newline at end of file
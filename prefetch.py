@@ -0,0 +1,177 @@
+import heapq
+import os
+import threading
+import time
+
+from data_fetch import get_price_data, get_historical_prices, get_scheduler
+from fx import BASE_CURRENCY
+from rate_limit import BACKGROUND
+
+def get_watchlist():
+    """
+    Get extra coins to keep warm from the environment
+
+    Returns:
+        list: Coin IDs from $CRYPTO_DASHBOARD_WATCHLIST (comma-separated)
+    """
+    value = os.environ.get('CRYPTO_DASHBOARD_WATCHLIST', '')
+    return [coin.strip() for coin in value.split(',') if coin.strip()]
+
+class PrefetchScheduler:
+    """
+    Background thread that keeps market data and histories warm
+
+    Market rows for all coins are refreshed every markets_interval seconds
+    in one request. Histories are refreshed one coin at a time, spread
+    evenly over history_interval, so requests trickle out instead of
+    bursting. Jobs run at BACKGROUND priority on the shared rate limiter
+    and are additionally spaced so they use at most budget_share of the
+    per-minute quota.
+    """
+
+    def __init__(self, coins, days_options=(90, 60, 30, 14, 7), vs_currency=BASE_CURRENCY,
+                 markets_interval=25, history_interval=240, budget_share=0.5):
+        """
+        Args:
+            coins (list): Coin IDs to keep warm
+            days_options (tuple): History windows cached per coin; the
+                largest is fetched first so the others are served from the
+                local store
+            vs_currency (str): Target currency
+            markets_interval (float): Seconds between market data refreshes
+                (keep below the market cache TTL)
+            history_interval (float): Seconds between history refreshes of
+                the same coin (keep below the history cache TTL)
+            budget_share (float): Fraction of the API quota prefetching may use
+        """
+        self.coins = list(dict.fromkeys(coins))
+        self.days_options = sorted(days_options, reverse=True)
+        self.vs_currency = vs_currency
+        self.markets_interval = markets_interval
+        self.history_interval = history_interval
+        self.budget_share = budget_share
+
+        self._queue = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.failures = 0
+        self.last_run = {}
+        self.last_error = {}
+
+    def _min_spacing(self):
+        rate = get_scheduler().rate_per_minute * self.budget_share
+        return 60.0 / rate if rate > 0 else 0.0
+
+    def _schedule_initial(self):
+        now = time.monotonic()
+        self._queue = [(now, 0, 'markets', None)]
+        step = self.history_interval / max(len(self.coins), 1)
+        for i, coin in enumerate(self.coins):
+            self._queue.append((now + (i + 1) * step, i + 1, 'history', coin))
+        heapq.heapify(self._queue)
+
+    def start(self):
+        """Start the prefetch thread if it is not running"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._schedule_initial()
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the prefetch thread"""
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            due, order, kind, coin = self._queue[0]
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+
+            heapq.heappop(self._queue)
+            started = time.monotonic()
+            self.run_job(kind, coin)
+
+            interval = self.markets_interval if kind == 'markets' else self.history_interval
+            heapq.heappush(self._queue, (due + interval, order, kind, coin))
+
+            # Keep background traffic within its share of the quota
+            self._stop.wait(max(0.0, self._min_spacing() - (time.monotonic() - started)))
+
+    def run_job(self, kind, coin=None):
+        """
+        Refresh one cache entry group
+
+        Args:
+            kind (str): 'markets' (all coins at once) or 'history' (one coin)
+            coin (str): Coin ID for history jobs
+
+        Returns:
+            bool: True if fresh data was fetched
+        """
+        name = kind if coin is None else f"{kind}:{coin}"
+        try:
+            if kind == 'markets':
+                df = get_price_data(self.coins, priority=BACKGROUND, refresh=True)
+                ok = not df.empty and not df.attrs.get('stale')
+            else:
+                ok = True
+                for days in self.days_options:
+                    df = get_historical_prices(coin, days, self.vs_currency,
+                                               priority=BACKGROUND, refresh=True)
+                    ok = ok and not df.empty and not df.attrs.get('stale')
+        except Exception as e:
+            ok = False
+            self.last_error[name] = str(e)
+
+        self.runs += 1
+        if ok:
+            self.last_run[name] = time.time()
+        else:
+            self.failures += 1
+        return ok
+
+    def stats(self):
+        """
+        Returns:
+            dict: Job runs, failures, queued jobs and seconds since the
+                oldest successful refresh
+        """
+        now = time.time()
+        return {
+            'running': self.running,
+            'coins': len(self.coins),
+            'jobs': len(self._queue),
+            'runs': self.runs,
+            'failures': self.failures,
+            'oldest_refresh_age': max((now - t for t in self.last_run.values()), default=None)
+        }
+
+# One prefetcher per process, shared by every session
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher(coins, **kwargs):
+    """
+    Get the shared prefetch scheduler, creating and starting it on first use
+
+    Args:
+        coins (list): Coin IDs to keep warm; the watchlist is added to them
+        **kwargs: PrefetchScheduler options for a newly created scheduler
+
+    Returns:
+        PrefetchScheduler: Running process-wide scheduler
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = PrefetchScheduler(list(coins) + get_watchlist(), **kwargs)
+        _prefetcher.start()
+        return _prefetcher
@@ -0,0 +1,277 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+# Column layout of every stored array
+COLUMNS = ('timestamp', 'price', 'market_cap', 'total_volume')
+
+# Payload keys of a CoinGecko market_chart response, in column order
+CHART_KEYS = ('prices', 'market_caps', 'total_volumes')
+
+MS_PER_DAY = 86_400_000
+
+def default_store_dir():
+    """
+    Get the directory used by the default price store
+
+    Returns:
+        str: $CRYPTO_DASHBOARD_DATA_DIR, or ~/.crypto_dashboard/prices
+    """
+    return os.environ.get(
+        'CRYPTO_DASHBOARD_DATA_DIR',
+        os.path.join(os.path.expanduser('~'), '.crypto_dashboard', 'prices')
+    )
+
+def chart_step_ms(days):
+    """
+    Get the sampling step CoinGecko uses for a market_chart window
+
+    Args:
+        days (float): Window length in days
+
+    Returns:
+        int: Step in milliseconds (5 minutes, 1 hour or 1 day)
+    """
+    if days <= 1:
+        return 5 * 60 * 1000
+    if days <= 90:
+        return 60 * 60 * 1000
+    return MS_PER_DAY
+
+def chart_to_array(data):
+    """
+    Convert a market_chart payload into a (n, 4) float64 array
+
+    Rows are keyed by the price timestamps; market caps and volumes that
+    have no matching timestamp are stored as NaN.
+
+    Args:
+        data (dict): Payload with 'prices', 'market_caps', 'total_volumes'
+
+    Returns:
+        np.ndarray: Array with columns COLUMNS, sorted by timestamp
+    """
+    prices = np.asarray(data.get('prices') or [], dtype=np.float64).reshape(-1, 2)
+    out = np.full((len(prices), len(COLUMNS)), np.nan)
+    out[:, 0] = prices[:, 0]
+    out[:, 1] = prices[:, 1]
+
+    for col, key in enumerate(CHART_KEYS[1:], start=2):
+        values = np.asarray(data.get(key) or [], dtype=np.float64).reshape(-1, 2)
+        if len(values) == len(prices) and np.array_equal(values[:, 0], prices[:, 0]):
+            out[:, col] = values[:, 1]
+        elif len(values):
+            lookup = dict(zip(values[:, 0].tolist(), values[:, 1].tolist()))
+            out[:, col] = [lookup.get(ts, np.nan) for ts in prices[:, 0].tolist()]
+
+    return out[np.argsort(out[:, 0], kind='stable')]
+
+def array_to_chart(arr):
+    """
+    Convert a stored array back into a market_chart style payload
+
+    Args:
+        arr (np.ndarray): Array with columns COLUMNS
+
+    Returns:
+        dict: Payload with 'prices', 'market_caps', 'total_volumes' lists
+    """
+    return {
+        key: arr[:, [0, col]].tolist()
+        for col, key in enumerate(CHART_KEYS, start=1)
+    }
+
+def _latest_span(segments):
+    # Union of the segments connected to the one that ends last
+    span = None
+    for start, end, _ in sorted(segments, key=lambda segment: segment[1], reverse=True):
+        if span is None:
+            span = [start, end]
+        elif end >= span[0]:
+            span[0] = min(span[0], start)
+        else:
+            break
+    return tuple(span) if span else None
+
+def _add_segment(segments, new):
+    # Add a fetched range, joining overlapping ranges of the same step and
+    # dropping ranges cut off from the latest covered range
+    start, end, step = new
+    kept = []
+    for segment in segments:
+        if segment[2] == step and segment[0] <= end and segment[1] >= start:
+            start, end = min(start, segment[0]), max(end, segment[1])
+        elif not (segment[2] >= step and start <= segment[0] and segment[1] <= end):
+            kept.append(segment)
+    kept.append([start, end, step])
+    latest_start = _latest_span(kept)[0]
+    return sorted((segment for segment in kept if segment[1] >= latest_start),
+                  key=lambda segment: (segment[0], segment[2]))
+
+class PriceStore:
+    """
+    On-disk time-series store for historical market data
+
+    Each (coin, currency) pair is kept as one float64 NumPy array of
+    COLUMNS rows, memory-mapped on read, plus a small JSON sidecar that
+    records the time ranges that have been fetched from the API and their
+    sampling step. Only the gaps outside those ranges, or ranges only held
+    at a coarser step than requested, need to be requested again.
+    """
+
+    def __init__(self, root=None):
+        """
+        Args:
+            root (str): Storage directory (default: default_store_dir())
+        """
+        self.root = root or default_store_dir()
+        self._lock = threading.RLock()
+
+    def _paths(self, coin_id, vs_currency):
+        safe_coin = re.sub(r'[^A-Za-z0-9_.-]', '_', coin_id)
+        safe_currency = re.sub(r'[^A-Za-z0-9_.-]', '_', vs_currency.lower())
+        base = os.path.join(self.root, safe_currency, safe_coin)
+        return base + '.npy', base + '.json'
+
+    def load(self, coin_id, vs_currency="usd"):
+        """
+        Load all stored rows for a coin
+
+        Args:
+            coin_id (str): Coin ID (e.g., 'bitcoin')
+            vs_currency (str): Quote currency
+
+        Returns:
+            np.ndarray: Read-only memory-mapped (n, 4) array (empty if none)
+        """
+        data_path, _ = self._paths(coin_id, vs_currency)
+        with self._lock:
+            if not os.path.exists(data_path):
+                return np.empty((0, len(COLUMNS)))
+            return np.load(data_path, mmap_mode='r')
+
+    def _segments(self, meta_path):
+        # Fetched ranges as [start_ms, end_ms, step_ms]; sidecars written
+        # before steps were recorded get the step CoinGecko uses for their span
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if 'segments' in meta:
+            return [list(segment) for segment in meta['segments']]
+        return [[meta['start'], meta['end'], chart_step_ms((meta['end'] - meta['start']) / MS_PER_DAY)]]
+
+    def coverage(self, coin_id, vs_currency="usd", step_ms=None):
+        """
+        Get the time range already fetched for a coin
+
+        Args:
+            coin_id (str): Coin ID
+            vs_currency (str): Quote currency
+            step_ms (int): Finest sampling needed; ranges stored at a
+                coarser step do not count as covered (default: any step)
+
+        Returns:
+            tuple: (start_ms, end_ms) of the contiguous covered range that
+                reaches furthest towards the present, or None if nothing
+                usable is stored
+        """
+        _, meta_path = self._paths(coin_id, vs_currency)
+        with self._lock:
+            segments = [s for s in self._segments(meta_path) if step_ms is None or s[2] <= step_ms]
+        return _latest_span(segments)
+
+    def merge(self, coin_id, vs_currency, data, start_ms, end_ms, step_ms=None):
+        """
+        Merge freshly fetched data into the store
+
+        Rows with a timestamp already present are replaced by the new
+        values. [start_ms, end_ms] is recorded as covered at step_ms, so a
+        later request for finer data over the same range is not served
+        from these rows; ranges that no longer touch the latest covered
+        range are forgotten.
+
+        Args:
+            coin_id (str): Coin ID
+            vs_currency (str): Quote currency
+            data (dict): market_chart payload for the fetched range
+            start_ms (int): Start of the fetched range (ms since epoch)
+            end_ms (int): End of the fetched range (ms since epoch)
+            step_ms (int): Sampling step of the payload (default: the step
+                CoinGecko uses for a range of this length, see chart_step_ms)
+        """
+        data_path, meta_path = self._paths(coin_id, vs_currency)
+        new_rows = chart_to_array(data)
+        if step_ms is None:
+            step_ms = chart_step_ms((end_ms - start_ms) / MS_PER_DAY)
+
+        with self._lock:
+            os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+            old_rows = np.array(self.load(coin_id, vs_currency))
+            combined = np.concatenate([old_rows, new_rows])
+            # Sort by timestamp, keeping the newest row for duplicate timestamps
+            order = np.argsort(combined[:, 0], kind='stable')[::-1]
+            _, first = np.unique(combined[order, 0], return_index=True)
+            merged = combined[order[first]]
+
+            segments = _add_segment(self._segments(meta_path),
+                                    [int(start_ms), int(end_ms), int(step_ms)])
+
+            tmp_path = data_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, merged)
+            os.replace(tmp_path, data_path)
+
+            start_ms, end_ms = _latest_span(segments)
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump({'start': start_ms, 'end': end_ms, 'segments': segments}, f)
+            os.replace(meta_path + '.tmp', meta_path)
+
+    def query(self, coin_id, vs_currency, start_ms, end_ms, step_ms=None):
+        """
+        Read stored rows within a time range
+
+        Args:
+            coin_id (str): Coin ID
+            vs_currency (str): Quote currency
+            start_ms (int): Range start (ms since epoch, inclusive)
+            end_ms (int): Range end (ms since epoch, inclusive)
+            step_ms (int): Optional sampling step; keeps the last row of
+                each step-sized bucket so the result matches the
+                granularity CoinGecko would return for the same window
+
+        Returns:
+            np.ndarray: (n, 4) array with columns COLUMNS
+        """
+        rows = self.load(coin_id, vs_currency)
+        lo = np.searchsorted(rows[:, 0], start_ms, side='left')
+        hi = np.searchsorted(rows[:, 0], end_ms, side='right')
+        window = np.array(rows[lo:hi])
+
+        if step_ms and len(window) > 1:
+            buckets = (window[:, 0] // step_ms).astype(np.int64)
+            last_in_bucket = np.append(buckets[1:] != buckets[:-1], True)
+            window = window[last_in_bucket]
+
+        return window
+
+    def clear(self, coin_id=None, vs_currency="usd"):
+        """
+        Remove stored data for one coin, or for every coin if coin_id is None
+        """
+        with self._lock:
+            if coin_id is None:
+                for dirpath, _, filenames in os.walk(self.root):
+                    for name in filenames:
+                        if name.endswith(('.npy', '.json')):
+                            os.remove(os.path.join(dirpath, name))
+                return
+
+            for path in self._paths(coin_id, vs_currency):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import threading
+import time
+
+# Request priorities (lower runs first)
+INTERACTIVE = 0
+BACKGROUND = 10
+
+class RequestScheduler:
+    """
+    Token-bucket rate limiter with a priority queue of waiting requests
+
+    Tokens refill continuously at rate_per_minute and at most burst can be
+    saved up. Waiting callers are served strictly by (priority, arrival),
+    so interactive requests overtake queued background work. A throttle
+    response from the API pauses the whole bucket for the advertised time.
+    """
+
+    def __init__(self, rate_per_minute=30, burst=5):
+        """
+        Args:
+            rate_per_minute (float): Sustained request quota
+            burst (int): Maximum number of requests sent back to back
+        """
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self._rate = rate_per_minute / 60.0
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+        self._granted = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._throttled = 0
+        self._retries = 0
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._tokens = min(self.burst, self._tokens + elapsed * self._rate)
+        self._last_refill = now
+
+    def acquire(self, priority=INTERACTIVE):
+        """
+        Block until the caller may send one request
+
+        Args:
+            priority (int): INTERACTIVE, BACKGROUND or any int (lower first)
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        entry = (priority, next(self._sequence))
+        enqueued = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    at_head = self._waiters[0] == entry
+
+                    if at_head and self._tokens >= 1 and now >= self._paused_until:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        break
+
+                    timeout = None
+                    if at_head:
+                        timeout = max(self._paused_until - now,
+                                      (1 - self._tokens) / self._rate)
+                    self._cond.wait(timeout)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                raise
+            finally:
+                self._cond.notify_all()
+
+            waited = time.monotonic() - enqueued
+            self._granted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            return waited
+
+    def throttle(self, seconds):
+        """
+        Pause all requests after the API reported a rate-limit hit
+
+        Args:
+            seconds (float): How long to hold off (e.g. from Retry-After)
+        """
+        with self._cond:
+            self._throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def record_retry(self):
+        """Count one retried request"""
+        with self._cond:
+            self._retries += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Queue depth, available tokens, wait times, throttle and
+                retry counters
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'queue_depth': len(self._waiters),
+                'tokens': round(self._tokens, 2),
+                'rate_per_minute': self.rate_per_minute,
+                'granted': self._granted,
+                'avg_wait': self._total_wait / self._granted if self._granted else 0.0,
+                'max_wait': self._max_wait,
+                'throttled': self._throttled,
+                'retries': self._retries,
+                'paused_for': max(0.0, self._paused_until - now)
+            }
@@ -0,0 +1,304 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from price_store import chart_step_ms, MS_PER_DAY
+
+# Exchange rates served by /exchange_rates: code -> (name, unit, value of
+# 1 BTC, type). Synthetic payloads in other currencies than USD are scaled
+# by the same rates, so derived and directly requested data agree.
+SYNTHETIC_EXCHANGE_RATES = {
+    'btc': ('Bitcoin', 'BTC', 1.0, 'crypto'),
+    'eth': ('Ether', 'ETH', 20.5, 'crypto'),
+    'usd': ('US Dollar', '$', 65000.0, 'fiat'),
+    'eur': ('Euro', '€', 60125.0, 'fiat'),
+    'gbp': ('British Pound Sterling', '£', 51350.0, 'fiat'),
+    'jpy': ('Japanese Yen', '¥', 9_750_000.0, 'fiat'),
+    'chf': ('Swiss Franc', 'Fr.', 57200.0, 'fiat'),
+    'cad': ('Canadian Dollar', 'CA$', 88400.0, 'fiat'),
+    'aud': ('Australian Dollar', 'A$', 98150.0, 'fiat'),
+    'cny': ('Chinese Yuan', '¥', 470_600.0, 'fiat'),
+    'inr': ('Indian Rupee', '₹', 5_416_000.0, 'fiat'),
+    'krw': ('South Korean Won', '₩', 88_725_000.0, 'fiat'),
+    'brl': ('Brazil Real', 'R$', 354_250.0, 'fiat')
+}
+
+def synthetic_rate(vs_currency):
+    """
+    Units of a currency per US dollar in the synthetic rate table
+
+    Raises:
+        ValueError: If the currency is not in SYNTHETIC_EXCHANGE_RATES
+    """
+    if vs_currency.lower() not in SYNTHETIC_EXCHANGE_RATES:
+        raise ValueError(f"invalid vs_currency: {vs_currency}")
+    return SYNTHETIC_EXCHANGE_RATES[vs_currency.lower()][2] / SYNTHETIC_EXCHANGE_RATES['usd'][2]
+
+def _coin_seed(coin_id):
+    return zlib.crc32(coin_id.encode())
+
+def synthetic_prices(coin_id, timestamps):
+    """
+    Deterministic synthetic price path for a coin
+
+    Prices are a pure function of (coin_id, timestamp), so overlapping
+    ranges requested at different times always agree, like real history.
+
+    Args:
+        coin_id (str): Coin ID
+        timestamps (np.ndarray): Timestamps in ms since epoch
+
+    Returns:
+        np.ndarray: Prices for the timestamps
+    """
+    seed = _coin_seed(coin_id)
+    base = 10 ** (seed % 5) * (1 + seed % 97 / 10)
+    t = np.asarray(timestamps, dtype=np.float64) / MS_PER_DAY
+    phase = seed % 360
+    noise = np.sin(t * 12.9898 * 1e3 + seed) * 43758.5453
+    noise = noise - np.floor(noise) - 0.5
+    trend = 0.25 * np.sin(t / 45 + phase) + 0.1 * np.sin(t / 7 + 2 * phase) + 0.02 * np.sin(t * 6)
+    return base * np.exp(trend + 0.01 * noise)
+
+def synthetic_chart(coin_id, start_ms, end_ms, step_ms, vs_currency="usd"):
+    """
+    Build a market_chart payload for a time range
+
+    Returns:
+        dict: Payload with 'prices', 'market_caps', 'total_volumes'
+    """
+    first = (start_ms // step_ms + 1) * step_ms
+    timestamps = np.arange(first, end_ms, step_ms, dtype=np.int64)
+    prices = synthetic_prices(coin_id, timestamps) * synthetic_rate(vs_currency)
+    supply = 1e6 * (1 + _coin_seed(coin_id) % 1000)
+    ts = timestamps.tolist()
+    return {
+        'prices': [list(pair) for pair in zip(ts, prices.tolist())],
+        'market_caps': [list(pair) for pair in zip(ts, (prices * supply).tolist())],
+        'total_volumes': [list(pair) for pair in zip(ts, (prices * supply * 0.05).tolist())]
+    }
+
+def synthetic_market_row(coin_id, rank, vs_currency="usd", now_ms=None):
+    """
+    Build one /coins/markets row for a coin
+
+    Returns:
+        dict: Row with the fields the dashboard reads
+    """
+    now_ms = now_ms or int(time.time() * 1000)
+    day_ago = now_ms - MS_PER_DAY
+    price, price_24h = (synthetic_prices(coin_id, [now_ms, day_ago]) * synthetic_rate(vs_currency)).tolist()
+    supply = 1e6 * (1 + _coin_seed(coin_id) % 1000)
+    return {
+        'id': coin_id,
+        'symbol': re.sub(r'[^a-z]', '', coin_id)[:4] or 'coin',
+        'name': coin_id.replace('-', ' ').title(),
+        'current_price': price,
+        'market_cap': price * supply,
+        'market_cap_rank': rank,
+        'total_volume': price * supply * 0.05,
+        'high_24h': max(price, price_24h),
+        'low_24h': min(price, price_24h),
+        'price_change_24h': price - price_24h,
+        'price_change_percentage_24h': (price / price_24h - 1) * 100,
+        'circulating_supply': supply,
+        'last_updated': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(now_ms / 1000)),
+        'price_change_percentage_1h_in_currency': 0.0,
+        'price_change_percentage_24h_in_currency': (price / price_24h - 1) * 100,
+        'price_change_percentage_7d_in_currency': 0.0
+    }
+
+class ReplayServer:
+    """
+    Local stand-in for the CoinGecko endpoints used by the dashboard
+
+    Serves /coins/markets, /coins/{id}/market_chart,
+    /coins/{id}/market_chart/range and /exchange_rates under /api/v3 with
+    deterministic synthetic data. Latency, error rate and payload density are
+    configurable so fetch paths can be tested and benchmarked offline.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 points_per_day=None, universe_size=1000, seed=0):
+        """
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            latency (float | tuple): Seconds added to each response, or a
+                (min, max) range drawn uniformly
+            error_rate (float): Fraction of requests answered with 429 or 503
+            points_per_day (int): Sampling density of market_chart payloads
+                (default: CoinGecko's granularity for the window)
+            universe_size (int): Number of coins listed by /coins/markets
+                when no ids are given
+            seed (int): Seed for latency and error sampling
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.points_per_day = points_per_day
+        self.universe = ['bitcoin', 'ethereum'] + [
+            f'coin-{i:05d}' for i in range(max(universe_size - 2, 0))
+        ]
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def start(self):
+        """Start serving in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever,
+                                            name="replay-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _sample(self):
+        # Pick the delay and whether this request fails
+        with self._lock:
+            self.requests += 1
+            if isinstance(self.latency, (tuple, list)):
+                delay = self._random.uniform(*self.latency)
+            else:
+                delay = self.latency
+            failure = None
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                failure = self._random.choice([429, 503])
+        return delay, failure
+
+    def _step_ms(self, days):
+        if self.points_per_day:
+            return max(1, MS_PER_DAY // self.points_per_day)
+        return chart_step_ms(days)
+
+    def handle(self, path, query):
+        """
+        Produce the JSON payload for a request path
+
+        Returns:
+            tuple: (status code, payload)
+        """
+        now_ms = int(time.time() * 1000)
+        parts = path.rstrip('/').split('/')
+        if parts[:3] != ['', 'api', 'v3']:
+            return 404, {'error': 'not found'}
+        parts = parts[3:]
+        vs_currency = query.get('vs_currency', 'usd')
+
+        if parts == ['exchange_rates']:
+            return 200, {'rates': {
+                code: {'name': name, 'unit': unit, 'value': value, 'type': kind}
+                for code, (name, unit, value, kind) in SYNTHETIC_EXCHANGE_RATES.items()
+            }}
+
+        if parts == ['coins', 'markets']:
+            per_page = int(query.get('per_page', 100))
+            page = int(query.get('page', 1))
+            if 'ids' in query:
+                coins = [c for c in query['ids'].split(',') if c]
+            else:
+                coins = self.universe
+            coins = coins[(page - 1) * per_page:page * per_page]
+            rank_offset = (page - 1) * per_page
+            return 200, [
+                synthetic_market_row(coin, rank_offset + i + 1, vs_currency, now_ms)
+                for i, coin in enumerate(coins)
+            ]
+
+        if len(parts) == 4 and parts[0] == 'coins' and parts[2:] == ['market_chart', 'range']:
+            start_ms = int(float(query['from']) * 1000)
+            end_ms = int(float(query['to']) * 1000)
+            days = (end_ms - start_ms) / MS_PER_DAY
+            return 200, synthetic_chart(parts[1], start_ms, end_ms, self._step_ms(days), vs_currency)
+
+        if len(parts) == 3 and parts[0] == 'coins' and parts[2] == 'market_chart':
+            days = float(query.get('days', 30))
+            start_ms = now_ms - int(days * MS_PER_DAY)
+            return 200, synthetic_chart(parts[1], start_ms, now_ms, self._step_ms(days), vs_currency)
+
+        return 404, {'error': 'not found'}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                delay, failure = server._sample()
+                if delay:
+                    time.sleep(delay)
+
+                if failure is not None:
+                    status, payload = failure, {'error': 'simulated failure'}
+                else:
+                    try:
+                        status, payload = server.handle(url.path, query)
+                    except (KeyError, ValueError) as e:
+                        status, payload = 400, {'error': str(e)}
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic CoinGecko data locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of failed responses")
+    parser.add_argument('--points-per-day', type=int, default=None, help="market_chart density")
+    parser.add_argument('--universe-size', type=int, default=1000, help="coins listed by /coins/markets")
+    args = parser.parse_args()
+
+    server = ReplayServer(args.host, args.port, args.latency, args.error_rate,
+                          args.points_per_day, args.universe_size)
+    print(f"Serving synthetic CoinGecko API at {server.base_url}")
+    print(f"Run the dashboard against it with COINGECKO_BASE_URL={server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+if __name__ == "__main__":
+    main()
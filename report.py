@@ -0,0 +1,331 @@
+# Headless report generator: fetch -> analysis -> CSV / Parquet / HTML, one chunk of coins at a time
+#
+#   python report.py --coins bitcoin ethereum solana --days 365
+#   python report.py --top 300 --days 1095 --out reports/ --workers 8
+#   python report.py --top 50 --formats csv html --offline
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import (build_price_panel, calculate_correlation_matrix, calculate_indicators,
+                      indicator_frame)
+from data_fetch import get_historical_prices_bulk, get_price_data, scan_markets
+from fx import BASE_CURRENCY
+from metrics import timed
+
+REPORT_FORMATS = ('csv', 'parquet', 'html')
+
+# Coins fetched and analysed per round; bounds the histories held in memory
+DEFAULT_CHUNK_SIZE = 25
+
+# How HTML charts get plotly.js: embedded in every file (standalone, ~4.8 MB
+# each), one shared plotly.min.js next to them (small pages that only render
+# alongside it) or loaded from the CDN (small, needs network access)
+PLOTLYJS_MODES = ('inline', 'directory', 'cdn')
+
+INDICATOR_COLUMNS = ['coin', 'timestamp', 'price', 'MA_7', 'MA_30', 'MA_50', 'returns',
+                     'volatility', 'volatility_annualized']
+
+def _max_drawdown(prices):
+    peaks = np.fmax.accumulate(prices)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        drawdowns = prices / peaks - 1
+    return float(np.nanmin(drawdowns)) if np.isfinite(drawdowns).any() else np.nan
+
+def _chart_html(figures, title, plotlyjs):
+    """
+    Render several figures into one HTML document
+
+    Args:
+        figures (list): plotly Figures, in page order
+        title (str): Document title
+        plotlyjs (str): One of PLOTLYJS_MODES
+
+    Returns:
+        str: Complete HTML page
+    """
+    include = {'directory': 'directory', 'inline': True, 'cdn': 'cdn'}[plotlyjs]
+    divs = [fig.to_html(full_html=False, include_plotlyjs=include if i == 0 else False)
+            for i, fig in enumerate(figures)]
+    return (f"<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>{title}</title></head>\n"
+            f"<body style=\"background-color:#111111\">\n" + "\n".join(divs) + "\n</body>\n</html>\n")
+
+def analyze_coin(coin_id, name, history, chart_dir=None, plotlyjs='inline', max_points=None):
+    """
+    Indicators, summary statistics and (optionally) an HTML chart page for one coin
+
+    Runs in a worker process; only the indicator frame and the summary row
+    travel back to the parent.
+
+    Args:
+        coin_id (str): Cryptocurrency ID
+        name (str): Display name
+        history (pd.DataFrame): Historical prices with a 'price' column
+        chart_dir (str): Directory for '<coin_id>.html' (None: no chart)
+        plotlyjs (str): One of PLOTLYJS_MODES
+        max_points (int): Per-trace point budget for the charts (None: all points)
+
+    Returns:
+        tuple: (indicator frame in INDICATOR_COLUMNS order, summary dict)
+    """
+    panel = history[['price']].rename(columns={'price': coin_id})
+    indicators = calculate_indicators(panel)
+    df = indicator_frame(indicators, coin_id)
+
+    prices = df['price'].to_numpy(dtype=np.float64)
+    valid = prices[np.isfinite(prices)]
+    summary = {
+        'coin': coin_id,
+        'name': name,
+        'start': df.index[0] if len(df) else pd.NaT,
+        'end': df.index[-1] if len(df) else pd.NaT,
+        'points': len(df),
+        'first_price': valid[0] if len(valid) else np.nan,
+        'last_price': valid[-1] if len(valid) else np.nan,
+        'total_return': valid[-1] / valid[0] - 1 if len(valid) > 1 and valid[0] else np.nan,
+        'volatility_annualized': df['volatility_annualized'].iloc[-1] if len(df) else np.nan,
+        'max_drawdown': _max_drawdown(prices) if len(valid) else np.nan,
+        'above_MA_50': bool(valid[-1] > df['MA_50'].iloc[-1]) if len(valid) else False,
+        'stale': bool(history.attrs.get('stale'))
+    }
+
+    if chart_dir is not None and len(df):
+        from plots import create_price_chart, create_volatility_chart
+        figures = [create_price_chart(df, name, True, max_points),
+                   create_volatility_chart(df, name, max_points)]
+        with open(os.path.join(chart_dir, f"{coin_id}.html"), 'w', encoding='utf-8') as f:
+            f.write(_chart_html(figures, f"{name} report", plotlyjs))
+
+    df = df.rename_axis('timestamp').reset_index()
+    df.insert(0, 'coin', coin_id)
+    return df.reindex(columns=INDICATOR_COLUMNS), summary
+
+class ReportWriter:
+    """
+    Append indicator frames to one CSV and one Parquet file as they arrive
+
+    Each coin's frame is written and dropped immediately, so output size is
+    not limited by memory. Parquet needs pyarrow; without it that format is
+    skipped with a message.
+    """
+
+    def __init__(self, out_dir, formats=REPORT_FORMATS):
+        """
+        Args:
+            out_dir (str): Output directory
+            formats (tuple): Subset of REPORT_FORMATS
+        """
+        self.out_dir = out_dir
+        self.formats = set(formats)
+        self.files = []
+        self.rows = 0
+        self._csv_path = os.path.join(out_dir, 'indicators.csv')
+        self._parquet_path = os.path.join(out_dir, 'indicators.parquet')
+        self._parquet = None
+        self._csv_started = False
+
+        if 'parquet' in self.formats:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+                self._pa = pyarrow
+            except ImportError:
+                print("pyarrow is not installed; skipping Parquet output (pip install pyarrow)")
+                self.formats.discard('parquet')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Indicator rows in INDICATOR_COLUMNS order
+        """
+        if df.empty:
+            return
+        if 'csv' in self.formats:
+            df.to_csv(self._csv_path, mode='a' if self._csv_started else 'w',
+                      header=not self._csv_started, index=False)
+            if not self._csv_started:
+                self._csv_started = True
+                self.files.append(self._csv_path)
+        if 'parquet' in self.formats:
+            table = self._pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = self._pa.parquet.ParquetWriter(self._parquet_path, table.schema)
+                self.files.append(self._parquet_path)
+            # One row group per coin keeps per-coin reads cheap
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+@timed('report.generate_report')
+def generate_report(coins, days=365, out_dir='reports', formats=REPORT_FORMATS,
+                    chunk_size=DEFAULT_CHUNK_SIZE, workers=None, fetch_workers=4,
+                    plotlyjs='inline', max_points=None, vs_currency=BASE_CURRENCY):
+    """
+    Build indicator exports, summary statistics and chart pages for many coins
+
+    Coins are processed in chunks: while a process pool analyses one chunk
+    (and renders its charts), the next chunk's histories are fetched through
+    the rate-limited data layer. Results are appended to the output files
+    as each coin finishes, so at most two chunks of histories are in memory.
+
+    Args:
+        coins (list): Cryptocurrency IDs
+        days (int): Number of days of history
+        out_dir (str): Output directory (created if missing)
+        formats (tuple): Subset of REPORT_FORMATS
+        chunk_size (int): Coins fetched and analysed per round
+        workers (int): Analysis processes (default: CPU count)
+        fetch_workers (int): Concurrent history requests
+        plotlyjs (str): One of PLOTLYJS_MODES, for HTML charts
+        max_points (int): Per-trace point budget for charts (None: all points)
+        vs_currency (str): Target currency
+
+    Returns:
+        dict: 'summary' (pd.DataFrame, one row per reported coin, also
+            written to summary.csv), 'missing' (coins without history),
+            'files' (paths written) and 'rows' (indicator rows exported)
+    """
+    coins = list(dict.fromkeys(coins))
+    formats = tuple(formats)
+    os.makedirs(out_dir, exist_ok=True)
+
+    chart_dir = None
+    if 'html' in formats:
+        chart_dir = os.path.join(out_dir, 'charts')
+        os.makedirs(chart_dir, exist_ok=True)
+        if plotlyjs == 'directory':
+            from plotly.offline import get_plotlyjs
+            with open(os.path.join(chart_dir, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+                f.write(get_plotlyjs())
+
+    market_df = get_price_data(coins)
+    names = dict(zip(market_df['id'], market_df['name'])) if not market_df.empty else {}
+
+    chunks = [coins[i:i + chunk_size] for i in range(0, len(coins), chunk_size)]
+    summaries = []
+    missing = []
+    daily_closes = {}
+
+    def drain(pending):
+        if not pending:
+            return
+        for coin_id, future in pending:
+            df, summary = future.result()
+            writer.write(df)
+            summaries.append(summary)
+            # Daily closes are small enough to keep for the cross-coin correlation
+            daily_closes[coin_id] = df.set_index('timestamp')[['price']].resample('1D').last()
+        print(f"  {len(summaries)}/{len(coins)} coins reported")
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool, ReportWriter(out_dir, formats) as writer:
+        pending = []
+        for chunk in chunks:
+            # Fetch this chunk while the pool is still busy with the previous one
+            histories = get_historical_prices_bulk(chunk, days, vs_currency, max_workers=fetch_workers)
+            missing.extend(coin_id for coin_id in chunk if coin_id not in histories)
+            drain(pending)
+            pending = [(coin_id, pool.submit(analyze_coin, coin_id, names.get(coin_id, coin_id),
+                                             history, chart_dir, plotlyjs, max_points))
+                       for coin_id, history in histories.items()]
+            del histories
+        drain(pending)
+
+    files = list(writer.files)
+    summary_df = pd.DataFrame(summaries)
+    if not summary_df.empty:
+        order = {coin_id: i for i, coin_id in enumerate(coins)}
+        summary_df = summary_df.sort_values('coin', key=lambda ids: ids.map(order),
+                                            ignore_index=True)
+        summary_path = os.path.join(out_dir, 'summary.csv')
+        summary_df.to_csv(summary_path, index=False)
+        files.append(summary_path)
+
+    if len(daily_closes) > 1:
+        panel = build_price_panel(daily_closes, freq='1D')
+        corr = calculate_correlation_matrix(panel)
+        corr_path = os.path.join(out_dir, 'correlation.csv')
+        corr.to_csv(corr_path)
+        files.append(corr_path)
+        if chart_dir is not None:
+            from plots import create_correlation_heatmap
+            corr_html = os.path.join(chart_dir, 'correlation.html')
+            with open(corr_html, 'w', encoding='utf-8') as f:
+                f.write(_chart_html([create_correlation_heatmap(corr)], "Return correlations",
+                                    plotlyjs))
+            files.append(corr_html)
+
+    if chart_dir is not None:
+        files.append(chart_dir)
+
+    return {'summary': summary_df, 'missing': missing, 'files': files, 'rows': writer.rows}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export indicator reports for many coins")
+    parser.add_argument('--coins', nargs='+', default=None, help="coin IDs to report")
+    parser.add_argument('--top', type=int, default=None,
+                        help="report the top N coins by market cap instead of --coins")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--out', default='reports', help="output directory")
+    parser.add_argument('--formats', nargs='+', choices=REPORT_FORMATS, default=list(REPORT_FORMATS))
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="analysis processes")
+    parser.add_argument('--fetch-workers', type=int, default=4, help="concurrent history requests")
+    parser.add_argument('--plotlyjs', choices=PLOTLYJS_MODES, default='inline',
+                        help="embed plotly.js in every chart page (standalone, ~4.8 MB each), "
+                             "share one plotly.min.js in the charts directory (pages only render "
+                             "next to it) or load it from the CDN (default: %(default)s)")
+    parser.add_argument('--max-points', type=int, default=None,
+                        help="downsample chart traces to this many points")
+    parser.add_argument('--offline', action='store_true',
+                        help="use the local replay server instead of CoinGecko")
+    args = parser.parse_args()
+
+    server = None
+    if args.offline:
+        import data_fetch
+        from replay_server import ReplayServer
+        server = ReplayServer(universe_size=max(args.top or 0, 1000)).start()
+        data_fetch.set_base_url(server.base_url)
+
+    try:
+        if args.top:
+            coins = list(scan_markets(args.top)['id'])
+        else:
+            coins = args.coins or ['bitcoin', 'ethereum', 'dogecoin']
+        if not coins:
+            print("No coins to report.")
+            return
+
+        start = time.perf_counter()
+        result = generate_report(coins, args.days, args.out, args.formats, args.chunk_size,
+                                 args.workers, args.fetch_workers, args.plotlyjs, args.max_points)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"Reported {len(result['summary'])} coins ({result['rows']:,} rows) "
+          f"in {time.perf_counter() - start:.1f}s")
+    if result['missing']:
+        print(f"No history for: {', '.join(result['missing'])}")
+    for path in result['files']:
+        print(f"  {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import numpy as np
+
+from metrics import timed
+
+# Screener columns: market field -> display label, in display order
+SCREENER_COLUMNS = {
+    'market_cap_rank': 'Rank',
+    'name': 'Name',
+    'symbol': 'Symbol',
+    'current_price': 'Price',
+    'price_change_percentage_1h_in_currency': '1h %',
+    'price_change_percentage_24h': '24h %',
+    'price_change_percentage_7d_in_currency': '7d %',
+    'market_cap': 'Market Cap',
+    'total_volume': 'Volume (24h)',
+    'volume_to_market_cap': 'Volume / Cap'
+}
+
+@timed('screener.screen_markets')
+def screen_markets(markets, search=None, min_market_cap=None, min_volume=None,
+                   change_range=None, sort_by='market_cap_rank', ascending=True):
+    """
+    Filter and sort a market scan
+
+    Every filter is a vectorized column comparison, so thousands of rows
+    are screened in a few milliseconds without touching the browser.
+
+    Args:
+        markets (pd.DataFrame): Rows from scan_markets
+        search (str): Case-insensitive substring of the coin ID, name or symbol
+        min_market_cap (float): Minimum market cap
+        min_volume (float): Minimum 24h volume
+        change_range (tuple): (low, high) bounds for the 24h change in percent
+        sort_by (str): Column to sort by (see SCREENER_COLUMNS)
+        ascending (bool): Sort direction; missing values always go last
+
+    Returns:
+        pd.DataFrame: Matching rows with a 'volume_to_market_cap' column added
+    """
+    df = markets
+    mask = np.ones(len(df), dtype=bool)
+
+    if search:
+        needle = search.strip().lower()
+        mask &= (df['id'].str.lower().str.contains(needle, regex=False, na=False)
+                 | df['name'].str.lower().str.contains(needle, regex=False, na=False)
+                 | df['symbol'].str.lower().str.contains(needle, regex=False, na=False)).to_numpy()
+    if min_market_cap:
+        mask &= (df['market_cap'] >= min_market_cap).to_numpy()
+    if min_volume:
+        mask &= (df['total_volume'] >= min_volume).to_numpy()
+    if change_range is not None:
+        low, high = change_range
+        change = df['price_change_percentage_24h']
+        mask &= ((change >= low) & (change <= high)).to_numpy()
+
+    df = df[mask].copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df['volume_to_market_cap'] = df['total_volume'] / df['market_cap'].where(df['market_cap'] > 0)
+
+    if sort_by:
+        df = df.sort_values(sort_by, ascending=ascending, na_position='last', kind='stable',
+                            ignore_index=True)
+    return df
+
+def paginate(df, page=1, page_size=100):
+    """
+    Slice one page of rows
+
+    Args:
+        df (pd.DataFrame): Rows to page through
+        page (int): 1-based page number (clamped to the valid range)
+        page_size (int): Rows per page
+
+    Returns:
+        tuple: (page rows, page number used, number of pages)
+    """
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(1, int(page)), n_pages)
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size], page, n_pages
+
+def format_screener(df):
+    """
+    Select and label the screener columns for display
+
+    Args:
+        df (pd.DataFrame): Output of screen_markets (or a slice of it)
+
+    Returns:
+        pd.DataFrame: Display columns with numeric values left numeric, so
+            the grid can sort and format them itself
+    """
+    out = df.reindex(columns=list(SCREENER_COLUMNS)).rename(columns=SCREENER_COLUMNS)
+    out['Symbol'] = out['Symbol'].str.upper()
+    # Scan metadata (fetch time, staleness) is not part of the table
+    out.attrs = {}
+    return out
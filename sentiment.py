@@ -1,6 +1,30 @@
 import pandas as pd
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+import glob
+import gzip
+import json
+import os
 import random
+import re
+import threading
+import time
+
+from metrics import timed
+
+# VADER's recommended compound-score cut-offs for positive/negative posts
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Per-coin partial sums returned by workers, in array order
+_PARTIAL_FIELDS = ('count', 'compound', 'positive', 'negative', 'neutral',
+                   'polarity', 'subjectivity')
+
+# Rolling summary windows in seconds (None summarizes everything ingested)
+SENTIMENT_WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400, 'all': None}
 
 def generate_mock_sentiment_data(coin_name):
     """
@@ -59,4 +83,649 @@ def get_sentiment_signal(sentiment_summary):
         'signal': signal,
         'confidence': confidence,
         'reasoning': f"Compound score: {compound_score:.3f}, Positive tweets: {positive_pct:.1f}%"
-    }
\ No newline at end of file
+    }
+
+def load_analyzers():
+    """
+    Load the VADER and TextBlob sentiment analyzers
+
+    Both lexicons are read on first use, so each process should call this
+    once and reuse the result.
+
+    Returns:
+        tuple: (vader SentimentIntensityAnalyzer, textblob PatternAnalyzer)
+
+    Raises:
+        ImportError: If vaderSentiment or textblob is not installed
+    """
+    try:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        from textblob.en.sentiments import PatternAnalyzer
+    except ImportError as e:
+        raise ImportError("Sentiment scoring requires vaderSentiment and textblob "
+                          "(pip install -r requirements.txt)") from e
+
+    vader = SentimentIntensityAnalyzer()
+    pattern = PatternAnalyzer()
+    pattern.analyze("warm up")  # loads the pattern lexicon
+    return vader, pattern
+
+def score_texts(texts, analyzers=None):
+    """
+    Score texts with VADER and TextBlob
+
+    Args:
+        texts (list): Post or tweet texts
+        analyzers (tuple): Output of load_analyzers (loaded if not given)
+
+    Returns:
+        np.ndarray: (len(texts), 3) array of compound score, polarity and
+            subjectivity
+    """
+    vader, pattern = analyzers or load_analyzers()
+    scores = np.empty((len(texts), 3))
+    for i, text in enumerate(texts):
+        polarity, subjectivity = pattern.analyze(text)
+        scores[i] = (vader.polarity_scores(text)['compound'], polarity, subjectivity)
+    return scores
+
+def corpus_paths(patterns=None):
+    """
+    Resolve corpus files from glob patterns
+
+    Args:
+        patterns (str | list): Glob patterns; defaults to the comma-separated
+            $CRYPTO_DASHBOARD_SENTIMENT_CORPUS
+
+    Returns:
+        list: Sorted matching file paths
+    """
+    if patterns is None:
+        patterns = os.environ.get('CRYPTO_DASHBOARD_SENTIMENT_CORPUS', '')
+    if isinstance(patterns, str):
+        patterns = [p.strip() for p in patterns.split(',') if p.strip()]
+    return sorted({path for pattern in patterns for path in glob.glob(os.path.expanduser(pattern))})
+
+def _iter_lines(path, start=0, end=None, position=None):
+    # Complete lines from byte offset start up to end; a trailing line
+    # without a newline is still being written and is left for next time
+    opener = gzip.open if path.endswith('.gz') else open
+    offset = start
+    with opener(path, 'rb') as f:
+        if start:
+            f.seek(start)
+        for line in f:
+            if not line.endswith(b'\n') or (end is not None and offset + len(line) > end):
+                break
+            offset += len(line)
+            if position is not None:
+                position[path] = offset
+            yield line
+
+def iter_posts(paths, text_field='text', coin_field='coin', time_field='created_at',
+               start=None, end=None, position=None):
+    """
+    Stream posts from JSONL files without loading them into memory
+
+    Files ending in .gz are decompressed on the fly. Blank lines, invalid
+    JSON and records without text are skipped.
+
+    Args:
+        paths (list): JSONL file paths
+        text_field (str): Field holding the post text
+        coin_field (str): Optional field naming the coin a post is about
+        time_field (str): Optional field with the post time (epoch seconds
+            or milliseconds, ISO 8601 or Twitter's created_at format)
+        start (dict): Path -> byte offset to resume from
+        end (dict): Path -> byte offset to stop at
+        position (dict): Updated with path -> offset after each line read
+
+    Yields:
+        tuple: (text, coin or None, raw time value or None)
+    """
+    for path in paths:
+        lines = _iter_lines(path, (start or {}).get(path, 0), (end or {}).get(path), position)
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            text = record.get(text_field)
+            if isinstance(text, str) and text:
+                coin = record.get(coin_field)
+                yield text, coin if isinstance(coin, str) else None, record.get(time_field)
+
+def _parse_timestamp(value):
+    """
+    Returns:
+        float: Epoch seconds for a raw post time, or None if unparseable
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value / 1000 if value > 1e11 else float(value)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value, '%a %b %d %H:%M:%S %z %Y')
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+    return parsed.timestamp()
+
+def _iter_batches(posts, batch_size):
+    batch = []
+    for post in posts:
+        batch.append(post)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _compile_matchers(coin_keywords):
+    # One alternation per coin; keywords match as whole words, so "$eth"
+    # and "ethereum" match but "methane" does not. None matches every post.
+    matchers = {}
+    for coin, keywords in coin_keywords.items():
+        if keywords is None:
+            matchers[coin] = None
+            continue
+        words = sorted({kw.lower() for kw in keywords if kw}, key=len, reverse=True)
+        pattern = '|'.join(re.escape(word) for word in words)
+        regex = re.compile(rf'(?<!\w)(?:{pattern})(?!\w)') if words else None
+        matchers[coin] = (regex, set(words) | {coin.lower()})
+    return matchers
+
+# Per-process worker state, set once by _init_worker
+_worker = {}
+
+def _init_worker(coin_keywords, bucket_seconds):
+    _worker['analyzers'] = load_analyzers()
+    _worker['matchers'] = _compile_matchers(coin_keywords)
+    _worker['bucket_seconds'] = bucket_seconds
+
+def _score_batch(batch):
+    """
+    Score one batch of (text, coin, time) posts in a worker
+
+    Returns:
+        dict: (coin name, bucket) -> partial sums (see _PARTIAL_FIELDS)
+    """
+    matchers = _worker['matchers']
+    bucket_seconds = _worker['bucket_seconds']
+    now = time.time()
+    texts, owners, buckets = [], [], []
+    for text, coin, posted_at in batch:
+        lowered = text.lower()
+        coin = coin.lower() if coin else None
+        coins = [name for name, matcher in matchers.items()
+                 if matcher is None or coin in matcher[1]
+                 or (matcher[0] is not None and matcher[0].search(lowered))]
+        if coins:
+            texts.append(text)
+            owners.append(coins)
+            # Posts without a usable time count as seen now
+            timestamp = _parse_timestamp(posted_at)
+            buckets.append(int((now if timestamp is None else timestamp) // bucket_seconds))
+
+    partials = {}
+    if not texts:
+        return partials
+
+    scores = score_texts(texts, _worker['analyzers'])
+    compound = scores[:, 0]
+    # Column of the positive/negative/neutral counter each post increments
+    labels = np.where(compound >= POSITIVE_THRESHOLD, 2,
+                      np.where(compound <= NEGATIVE_THRESHOLD, 3, 4))
+    for (c, polarity, subjectivity), label, coins, bucket in zip(scores, labels, owners, buckets):
+        row = np.zeros(len(_PARTIAL_FIELDS))
+        row[0], row[1], row[label], row[5], row[6] = 1, c, 1, polarity, subjectivity
+        for coin in coins:
+            key = (coin, bucket)
+            if key in partials:
+                partials[key] += row
+            else:
+                partials[key] = row
+    return partials
+
+def _score_stream(batches, coin_keywords, bucket_seconds, workers):
+    """
+    Score batches, in a process pool when workers > 1
+
+    Yields:
+        dict: Partial sums per (coin, bucket) for each batch, in batch order
+    """
+    if workers <= 1:
+        _init_worker(coin_keywords, bucket_seconds)
+        for batch in batches:
+            yield _score_batch(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(coin_keywords, bucket_seconds)) as executor:
+        # Bound the batches in flight so the reader cannot run ahead of the workers
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_score_batch, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def summarize_sentiment(coin_name, partial):
+    """
+    Turn accumulated partial sums into a sentiment summary
+
+    Args:
+        coin_name (str): Cryptocurrency name
+        partial (np.ndarray): Sums in _PARTIAL_FIELDS order (None for no posts)
+
+    Returns:
+        dict: Summary with the same keys as generate_mock_sentiment_data
+    """
+    if partial is None or partial[0] == 0:
+        partial = np.zeros(len(_PARTIAL_FIELDS))
+    sums = dict(zip(_PARTIAL_FIELDS, partial.tolist()))
+    count = sums['count']
+    means = {field: value / count if count else 0.0 for field, value in sums.items()}
+
+    avg_compound = means['compound']
+    if avg_compound >= POSITIVE_THRESHOLD:
+        trend = 'bullish'
+    elif avg_compound <= NEGATIVE_THRESHOLD:
+        trend = 'bearish'
+    else:
+        trend = 'neutral'
+
+    return {
+        'coin_name': coin_name,
+        'total_tweets': int(count),
+        'avg_compound_score': avg_compound,
+        'positive_percentage': means['positive'] * 100,
+        'negative_percentage': means['negative'] * 100,
+        'neutral_percentage': means['neutral'] * 100,
+        'avg_polarity': means['polarity'],
+        'avg_subjectivity': means['subjectivity'],
+        'sentiment_trend': trend,
+        'timestamp': datetime.now()
+    }
+
+class SentimentIndex:
+    """
+    Per-coin sentiment aggregates in fixed time buckets
+
+    Each coin owns a ring of bucket_seconds-wide buckets covering the
+    retention period, holding post counts, score sums and
+    positive/negative/neutral tallies (see _PARTIAL_FIELDS), plus an
+    all-time total. Adding scored posts is O(1) and rolling summaries
+    only sum the buckets in the window, so no post is ever rescanned.
+
+    Corpus files are tailed: the index remembers how far each file has
+    been read and only scores lines appended since, so files are treated
+    as append-only logs.
+    """
+
+    def __init__(self, bucket_seconds=300, retention=7 * 86400):
+        """
+        Args:
+            bucket_seconds (int): Width of one aggregation bucket
+            retention (float): Seconds of buckets kept for rolling windows
+        """
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.n_buckets = -(-int(retention) // bucket_seconds) + 1
+        self._bucket_ids = {}
+        self._sums = {}
+        self._totals = {}
+        self._keywords = {}
+        self._offsets = {}
+        self.posts_read = 0
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+
+    @property
+    def coins(self):
+        return list(self._totals)
+
+    def _ensure(self, coin):
+        if coin not in self._totals:
+            self._bucket_ids[coin] = np.full(self.n_buckets, -1, dtype=np.int64)
+            self._sums[coin] = np.zeros((self.n_buckets, len(_PARTIAL_FIELDS)))
+            self._totals[coin] = np.zeros(len(_PARTIAL_FIELDS))
+
+    def add_partial(self, coin, bucket, partial):
+        """
+        Merge partial sums for one coin and bucket
+
+        Args:
+            coin (str): Coin name
+            bucket (int): Bucket number (epoch seconds // bucket_seconds)
+            partial (np.ndarray): Sums in _PARTIAL_FIELDS order
+        """
+        with self._lock:
+            self._ensure(coin)
+            bucket_ids = self._bucket_ids[coin]
+            slot = bucket % self.n_buckets
+            if bucket_ids[slot] != bucket:
+                if bucket_ids[slot] > bucket:
+                    # Older than anything the ring still holds: all-time total only
+                    self._totals[coin] += partial
+                    return
+                bucket_ids[slot] = bucket
+                self._sums[coin][slot] = 0.0
+            self._sums[coin][slot] += partial
+            self._totals[coin] += partial
+
+    def add(self, coin, timestamp, compound, polarity, subjectivity):
+        """
+        Add one scored post
+
+        Args:
+            coin (str): Coin name
+            timestamp (float): Post time in epoch seconds
+            compound (float): VADER compound score
+            polarity (float): TextBlob polarity
+            subjectivity (float): TextBlob subjectivity
+        """
+        row = np.zeros(len(_PARTIAL_FIELDS))
+        label = 2 if compound >= POSITIVE_THRESHOLD else 3 if compound <= NEGATIVE_THRESHOLD else 4
+        row[0], row[1], row[label], row[5], row[6] = 1, compound, 1, polarity, subjectivity
+        self.add_partial(coin, int(timestamp // self.bucket_seconds), row)
+
+    def merge(self, partials):
+        """
+        Merge worker output
+
+        Args:
+            partials (dict): (coin, bucket) -> partial sums
+        """
+        for (coin, bucket), partial in partials.items():
+            self.add_partial(coin, bucket, partial)
+
+    def sums(self, coin, window='24h', now=None):
+        """
+        Sum a coin's buckets over a trailing window
+
+        The window is rounded to whole buckets, ending with the bucket
+        that contains now.
+
+        Args:
+            coin (str): Coin name
+            window (str | float): Key of SENTIMENT_WINDOWS or seconds
+                (None or 'all' for everything ingested)
+            now (float): Window end in epoch seconds (default: now)
+
+        Returns:
+            np.ndarray: Sums in _PARTIAL_FIELDS order, or None for an unknown coin
+        """
+        seconds = SENTIMENT_WINDOWS[window] if isinstance(window, str) else window
+        with self._lock:
+            if coin not in self._totals:
+                return None
+            if seconds is None:
+                return self._totals[coin].copy()
+            if seconds > self.retention:
+                raise ValueError(f"Window of {seconds}s exceeds the {self.retention}s retention")
+
+            current = int((time.time() if now is None else now) // self.bucket_seconds)
+            first = current - int(np.ceil(seconds / self.bucket_seconds)) + 1
+            bucket_ids = self._bucket_ids[coin]
+            in_window = (bucket_ids >= first) & (bucket_ids <= current)
+            return self._sums[coin][in_window].sum(axis=0)
+
+    def summary(self, coin, window='24h', now=None):
+        """
+        Returns:
+            dict: Sentiment summary for a coin over a window (see sums and
+                summarize_sentiment)
+        """
+        return summarize_sentiment(coin, self.sums(coin, window, now))
+
+    def summaries(self, coins=None, window='24h', now=None):
+        """
+        Returns:
+            dict: Coin name -> summary for coins (default: all indexed coins)
+        """
+        coins = self.coins if coins is None else coins
+        return {coin: self.summary(coin, window, now) for coin in coins}
+
+    def history(self, coins=None, freq=None, now=None):
+        """
+        Per-period summaries over the retention period, for backtesting
+
+        Args:
+            coins (list): Coin names (default: all indexed coins)
+            freq (str): Pandas frequency to aggregate buckets to (e.g. '1h');
+                default keeps bucket_seconds
+            now (float): Last bucket's time in epoch seconds (default: now)
+
+        Returns:
+            dict: 'total_tweets', 'avg_compound_score', 'positive_percentage',
+                'negative_percentage', 'avg_polarity' and 'avg_subjectivity'
+                -> pd.DataFrame (period start x coins); averages are NaN for
+                periods without posts
+        """
+        coins = self.coins if coins is None else coins
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        first = current - self.n_buckets + 1
+        index = pd.to_datetime(np.arange(first, current + 1) * self.bucket_seconds, unit='s')
+
+        sums = np.zeros((len(coins), self.n_buckets, len(_PARTIAL_FIELDS)))
+        with self._lock:
+            for i, coin in enumerate(coins):
+                if coin not in self._totals:
+                    continue
+                bucket_ids = self._bucket_ids[coin]
+                valid = (bucket_ids >= first) & (bucket_ids <= current)
+                sums[i, bucket_ids[valid] - first] = self._sums[coin][valid]
+
+        fields = {
+            field: pd.DataFrame(sums[:, :, j].T, index=index, columns=coins)
+            for j, field in enumerate(_PARTIAL_FIELDS)
+        }
+        if freq is not None:
+            fields = {field: frame.resample(freq).sum() for field, frame in fields.items()}
+
+        count = fields['count'].where(fields['count'] > 0)
+        return {
+            'total_tweets': fields['count'],
+            'avg_compound_score': fields['compound'] / count,
+            'positive_percentage': fields['positive'] / count * 100,
+            'negative_percentage': fields['negative'] / count * 100,
+            'avg_polarity': fields['polarity'] / count,
+            'avg_subjectivity': fields['subjectivity'] / count
+        }
+
+    def drop(self, coin):
+        """Forget a coin's aggregates"""
+        with self._lock:
+            for store in (self._bucket_ids, self._sums, self._totals):
+                store.pop(coin, None)
+
+    def ingest(self, paths, coin_keywords=None, text_field='text', coin_field='coin',
+               time_field='created_at', batch_size=2000, workers=None):
+        """
+        Score posts appended to corpus files since the last call
+
+        Coins seen for the first time (or whose keywords changed) are
+        first backfilled from the part of each file already read.
+
+        Args:
+            paths (list): JSONL files (see iter_posts)
+            coin_keywords (dict): Coin name -> keywords (names, symbols,
+                cashtags). A post counts for every coin whose keyword it
+                mentions or whose keyword equals its coin field; None as
+                keywords matches every post. When coin_keywords is None,
+                all posts are aggregated under 'all'.
+            text_field (str): Field holding the post text
+            coin_field (str): Optional field naming the coin a post is about
+            time_field (str): Optional field with the post time; posts
+                without one are bucketed at ingestion time
+            batch_size (int): Posts per batch sent to a worker
+            workers (int): Worker processes (default: CPU count); 0 or 1
+                scores in the calling process
+
+        Returns:
+            int: Number of posts read (including backfilled ones)
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if coin_keywords is None:
+            coin_keywords = {'all': None}
+        coin_keywords = {coin: None if words is None else sorted(words)
+                         for coin, words in coin_keywords.items()}
+        options = (text_field, coin_field, time_field)
+
+        with self._ingest_lock:
+            changed = {coin: words for coin, words in coin_keywords.items()
+                       if coin not in self._keywords or self._keywords[coin] != words}
+            read = 0
+            if changed and self._offsets:
+                # Lines read so far were only matched against the earlier coins
+                for coin in changed:
+                    self.drop(coin)
+                read += self._ingest_range(list(self._offsets), changed, options, batch_size,
+                                           workers, end=dict(self._offsets))
+            self._keywords.update(changed)
+
+            read += self._ingest_range(paths, self._keywords, options, batch_size, workers,
+                                       start=dict(self._offsets), position=self._offsets)
+            self.posts_read += read
+            return read
+
+    def _ingest_range(self, paths, coin_keywords, options, batch_size, workers,
+                      start=None, end=None, position=None):
+        # Offsets reach position only once every post before them is merged,
+        # so a batch that fails to score is read again by the next ingest
+        read = [0]
+        reading = {}
+        checkpoints = deque()
+
+        def counted(posts):
+            for post in posts:
+                read[0] += 1
+                yield post
+
+        def batches():
+            for batch in _iter_batches(posts, batch_size):
+                checkpoints.append(dict(reading))
+                yield batch
+
+        posts = counted(iter_posts(paths, *options, start=start, end=end, position=reading))
+        for partials in _score_stream(batches(), coin_keywords, self.bucket_seconds, workers):
+            self.merge(partials)
+            checkpoint = checkpoints.popleft()
+            if position is not None:
+                position.update(checkpoint)
+        if position is not None:
+            # Lines read after the last post (blank or invalid) hold nothing to score
+            position.update(reading)
+        return read[0]
+
+    def stats(self):
+        """
+        Returns:
+            dict: Indexed coins, files tailed and memory held by the buckets
+        """
+        with self._lock:
+            return {
+                'coins': len(self._totals),
+                'files': len(self._offsets),
+                'posts_read': self.posts_read,
+                'bytes_read': sum(self._offsets.values()),
+                'bucket_seconds': self.bucket_seconds,
+                'memory_bytes': sum(a.nbytes for a in self._sums.values())
+            }
+
+@timed('sentiment.analyze_corpus')
+def analyze_corpus(paths, coin_keywords=None, window=None, **kwargs):
+    """
+    Score a post corpus and summarize sentiment per coin
+
+    Posts are streamed from disk and scored in batches across a process
+    pool; each worker loads the analyzers once and sends back only
+    per-coin, per-bucket sums, so memory stays flat however large the
+    corpus is.
+
+    Args:
+        paths (list): JSONL files (see iter_posts)
+        coin_keywords (dict): Coin name -> keywords (see SentimentIndex.ingest)
+        window (str | float): Summary window (default: every post)
+        **kwargs: Options passed to SentimentIndex.ingest
+
+    Returns:
+        dict: Coin name -> summary (see summarize_sentiment)
+    """
+    index = SentimentIndex()
+    index.ingest(paths, coin_keywords, **kwargs)
+    names = list(coin_keywords) if coin_keywords else ['all']
+    return {name: index.summary(name, window) for name in names}
+
+def analyze_sentiment(paths, coin_name, keywords=None, **kwargs):
+    """
+    Summarize corpus sentiment for one coin
+
+    Args:
+        paths (list): JSONL files (see iter_posts)
+        coin_name (str): Cryptocurrency name
+        keywords (list): Keywords identifying the coin (default: its name)
+        **kwargs: Options passed to analyze_corpus
+
+    Returns:
+        dict: Summary with the same keys as generate_mock_sentiment_data
+    """
+    keywords = keywords or [coin_name]
+    return analyze_corpus(paths, {coin_name: keywords}, **kwargs)[coin_name]
+
+# One index per process, shared by every session
+_sentiment_index = None
+_sentiment_index_lock = threading.Lock()
+
+def get_sentiment_index():
+    """
+    Get the shared sentiment index, creating it on first use
+
+    Returns:
+        SentimentIndex: Process-wide index
+    """
+    global _sentiment_index
+    with _sentiment_index_lock:
+        if _sentiment_index is None:
+            _sentiment_index = SentimentIndex()
+        return _sentiment_index
+
+@timed('sentiment.get_corpus_sentiment')
+def get_corpus_sentiment(coin_keywords, window='24h', patterns=None, **kwargs):
+    """
+    Summarize the configured corpus per coin from the shared index
+
+    Only posts appended since the previous call are scored.
+
+    Args:
+        coin_keywords (dict): Coin name -> keywords (see SentimentIndex.ingest)
+        window (str | float): Summary window (see SentimentIndex.sums)
+        patterns (str | list): Corpus globs (default: $CRYPTO_DASHBOARD_SENTIMENT_CORPUS)
+        **kwargs: Options passed to SentimentIndex.ingest
+
+    Returns:
+        dict: Coin name -> summary, or None if no corpus files are configured
+    """
+    paths = corpus_paths(patterns)
+    if not paths:
+        return None
+
+    index = get_sentiment_index()
+    try:
+        index.ingest(paths, coin_keywords, **kwargs)
+    except (ImportError, OSError) as e:
+        print(f"Error scoring sentiment corpus: {e}")
+        return None
+    return index.summaries(list(coin_keywords), window)
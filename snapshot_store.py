@@ -0,0 +1,281 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Numeric /coins/markets fields kept per snapshot row, with their storage type.
+# Prices and totals need float64; percentages fit float32; missing ranks are -1.
+SNAPSHOT_COLUMNS = {
+    'current_price': np.float64,
+    'market_cap': np.float64,
+    'total_volume': np.float64,
+    'high_24h': np.float64,
+    'low_24h': np.float64,
+    'circulating_supply': np.float64,
+    'price_change_24h': np.float64,
+    'price_change_percentage_24h': np.float32,
+    'price_change_percentage_1h_in_currency': np.float32,
+    'price_change_percentage_24h_in_currency': np.float32,
+    'price_change_percentage_7d_in_currency': np.float32,
+    'market_cap_rank': np.int32
+}
+
+# Text fields kept once per coin (latest value) instead of per row
+SNAPSHOT_LABELS = ('symbol', 'name')
+
+class _Dictionary:
+    """Dictionary encoding of repeated strings to small integer codes"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        """
+        Returns:
+            int: Code for value, or -1 if it was never encoded
+        """
+        return self._codes.get(value, -1)
+
+class SnapshotStore:
+    """
+    Columnar in-memory history of /coins/markets snapshots
+
+    Each row is one coin at one fetch time. Timestamps (int64 ms), coin
+    and currency codes (int32, dictionary-encoded) and every field in
+    SNAPSHOT_COLUMNS live in their own typed NumPy array, grown by
+    doubling. Names and symbols are kept once per coin. Rows older than
+    the retention window, and the oldest rows beyond max_rows, are dropped
+    as new snapshots arrive, so memory is bounded by the smaller of the
+    two. Dropped rows are only skipped over; the live rows are moved to the
+    front of the arrays once the dropped prefix outgrows them, which keeps
+    appends amortized O(rows appended).
+    """
+
+    def __init__(self, retention=86400, capacity=1024, max_rows=1_000_000):
+        """
+        Args:
+            retention (float): Seconds of snapshots kept
+            capacity (int): Initial number of rows allocated
+            max_rows (int): Most rows kept, about 92 bytes each
+        """
+        self.retention = retention
+        self.max_rows = max_rows
+        self._ids = _Dictionary()
+        self._currencies = _Dictionary()
+        self._labels = {}
+        # Live rows are [_start, _size) of every array
+        self._start = 0
+        self._size = 0
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._coin_codes = np.empty(capacity, dtype=np.int32)
+        self._currency_codes = np.empty(capacity, dtype=np.int32)
+        self._columns = {name: np.empty(capacity, dtype=dtype)
+                         for name, dtype in SNAPSHOT_COLUMNS.items()}
+        self._lock = threading.Lock()
+        self.appended = 0
+
+    def __len__(self):
+        return self._size - self._start
+
+    def _arrays(self):
+        return ([self._timestamps, self._coin_codes, self._currency_codes]
+                + list(self._columns.values()))
+
+    def _compact(self):
+        # Move the live rows to the front of every array
+        keep = self._size - self._start
+        for arr in self._arrays():
+            arr[:keep] = arr[self._start:self._size]
+        self._start, self._size = 0, keep
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._timestamps)
+        if needed <= capacity:
+            return
+        if self._start:
+            self._compact()
+            needed = self._size + extra
+            if needed <= capacity:
+                return
+        while capacity < needed:
+            capacity *= 2
+
+        def grow(arr):
+            out = np.empty(capacity, dtype=arr.dtype)
+            out[:self._size] = arr[:self._size]
+            return out
+
+        self._timestamps = grow(self._timestamps)
+        self._coin_codes = grow(self._coin_codes)
+        self._currency_codes = grow(self._currency_codes)
+        self._columns = {name: grow(arr) for name, arr in self._columns.items()}
+
+    def _expire(self, now_ms, incoming=0):
+        # Snapshots arrive in time order, so expired rows form a prefix
+        cutoff = now_ms - int(self.retention * 1000)
+        self._start += int(np.searchsorted(self._timestamps[self._start:self._size], cutoff,
+                                           side='left'))
+        # Make room for the incoming rows under the row cap
+        self._start = max(self._start, self._size + incoming - self.max_rows)
+        # Compact in batches, once the skipped prefix exceeds the live rows
+        if self._start > self._size - self._start:
+            self._compact()
+
+    def append(self, rows, vs_currency="usd", fetched_at=None):
+        """
+        Append one /coins/markets response as a snapshot
+
+        Args:
+            rows (list): Market rows (dicts) from fetch_coin_prices
+            vs_currency (str): Currency the rows are quoted in
+            fetched_at (pd.Timestamp): Snapshot time (default: now, local time
+                like the timestamps get_price_data adds)
+
+        Returns:
+            int: Number of rows appended
+        """
+        rows = [row for row in rows or [] if isinstance(row, dict) and row.get('id')]
+        if not rows:
+            return 0
+        rows = rows[-self.max_rows:]
+
+        timestamp_ms = pd.Timestamp.now() if fetched_at is None else pd.Timestamp(fetched_at)
+        timestamp_ms = int(timestamp_ms.value // 1_000_000)
+
+        # Build every column before taking the lock
+        columns = {}
+        for name, dtype in SNAPSHOT_COLUMNS.items():
+            values = [row.get(name) for row in rows]
+            if np.issubdtype(dtype, np.integer):
+                columns[name] = np.array([-1 if v is None else v for v in values], dtype=dtype)
+            else:
+                columns[name] = np.array([np.nan if v is None else v for v in values], dtype=dtype)
+
+        n = len(rows)
+        with self._lock:
+            # Keep rows in time order even if a slow fetch finishes late
+            if self._size:
+                timestamp_ms = max(timestamp_ms, int(self._timestamps[self._size - 1]))
+            self._expire(timestamp_ms, n)
+            self._reserve(n)
+
+            start, end = self._size, self._size + n
+            codes = []
+            for row in rows:
+                code = self._ids.encode(row['id'])
+                codes.append(code)
+                self._labels[code] = {label: row.get(label) for label in SNAPSHOT_LABELS}
+
+            self._timestamps[start:end] = timestamp_ms
+            self._coin_codes[start:end] = codes
+            self._currency_codes[start:end] = self._currencies.encode(vs_currency.lower())
+            for name, values in columns.items():
+                self._columns[name][start:end] = values
+            self._size = end
+            self.appended += n
+        return n
+
+    def query(self, coins=None, vs_currency="usd", start=None, end=None, columns=None):
+        """
+        Read snapshot rows in long format
+
+        Args:
+            coins (list): Coin IDs (default: all)
+            vs_currency (str): Quote currency
+            start (pd.Timestamp | str): Earliest snapshot time (inclusive)
+            end (pd.Timestamp | str): Latest snapshot time (inclusive)
+            columns (list): Fields from SNAPSHOT_COLUMNS (default: all)
+
+        Returns:
+            pd.DataFrame: Columns 'timestamp', 'id', 'symbol', 'name' and the
+                requested fields, in time order, keeping their storage dtypes
+        """
+        columns = list(SNAPSHOT_COLUMNS) if columns is None else list(columns)
+        unknown = [name for name in columns if name not in SNAPSHOT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown snapshot columns: {unknown}")
+
+        with self._lock:
+            first, n = self._start, self._size
+            timestamps = self._timestamps
+            lo = first if start is None else first + int(np.searchsorted(
+                timestamps[first:n], pd.Timestamp(start).value // 1_000_000, side='left'))
+            hi = n if end is None else first + int(np.searchsorted(
+                timestamps[first:n], pd.Timestamp(end).value // 1_000_000, side='right'))
+
+            mask = self._currency_codes[lo:hi] == self._currencies.lookup(vs_currency.lower())
+            if coins is not None:
+                wanted = [self._ids.lookup(coin) for coin in coins]
+                mask &= np.isin(self._coin_codes[lo:hi], wanted)
+
+            codes = self._coin_codes[lo:hi][mask]
+            data = {
+                'timestamp': pd.to_datetime(timestamps[lo:hi][mask], unit='ms'),
+                'id': pd.Categorical.from_codes(codes, categories=list(self._ids.values))
+            }
+            labels = {code: self._labels[code] for code in np.unique(codes).tolist()}
+            for name in columns:
+                data[name] = self._columns[name][lo:hi][mask].copy()
+
+        df = pd.DataFrame(data)
+        for label in reversed(SNAPSHOT_LABELS):
+            df.insert(2, label, [labels[code][label] for code in codes.tolist()])
+        return df
+
+    def series(self, column='current_price', coins=None, vs_currency="usd", start=None, end=None):
+        """
+        One field over time for several coins
+
+        Args:
+            column (str): Field from SNAPSHOT_COLUMNS
+            coins (list): Coin IDs (default: all)
+            vs_currency (str): Quote currency
+            start (pd.Timestamp | str): Earliest snapshot time
+            end (pd.Timestamp | str): Latest snapshot time
+
+        Returns:
+            pd.DataFrame: Snapshot time x coin ID matrix
+        """
+        df = self.query(coins, vs_currency, start, end, [column])
+        if df.empty:
+            return pd.DataFrame(columns=list(coins or []))
+        wide = df.pivot_table(index='timestamp', columns='id', values=column,
+                              aggfunc='last', observed=True)
+        wide.columns = wide.columns.astype(str)
+        wide.columns.name = None
+        if coins is not None:
+            wide = wide.reindex(columns=[coin for coin in coins if coin in wide.columns])
+        return wide
+
+    def stats(self):
+        """
+        Returns:
+            dict: Rows held, distinct coins, bytes used by the columns and
+                the time span covered
+        """
+        with self._lock:
+            first, last = self._start, self._size
+            n = last - first
+            return {
+                'rows': n,
+                'coins': len(self._ids.values),
+                'appended': self.appended,
+                'memory_bytes': sum(arr.itemsize * n for arr in self._arrays()),
+                'oldest': pd.Timestamp(int(self._timestamps[first]), unit='ms') if n else None,
+                'newest': pd.Timestamp(int(self._timestamps[last - 1]), unit='ms') if n else None
+            }
+
+    def clear(self):
+        """Drop every snapshot"""
+        with self._lock:
+            self._start = 0
+            self._size = 0
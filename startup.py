@@ -0,0 +1,225 @@
+# Cold-start profile: per-module import times and time to first paint
+#
+#   python startup.py                    profile a fresh dashboard process against the replay server
+#   python startup.py --budget 3 --json  machine-readable, exit status 1 when over budget
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from metrics import get_registry
+
+# Seconds from process start to first paint a cold worker is allowed
+STARTUP_BUDGET = float(os.environ.get("CRYPTO_DASHBOARD_STARTUP_BUDGET", 5.0))
+
+def _process_start():
+    """
+    Returns:
+        float: Wall-clock time this process started (from /proc on Linux;
+            the time this module was imported elsewhere)
+    """
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+PROCESS_START = _process_start()
+
+_metrics = get_registry()
+_import_seconds = _metrics.gauge(
+    'crypto_dashboard_import_seconds',
+    'Wall time of the first import of a module, including the modules it loads', ('module',))
+_first_paint_seconds = _metrics.gauge(
+    'crypto_dashboard_first_paint_seconds', 'Seconds from process start to the first rendered page')
+
+_imports = {}
+_first_paint = None
+_lock = threading.Lock()
+
+class import_timer:
+    """
+    Record how long the first import of a module takes
+
+    Wrap an import statement, eager or deferred until a feature is enabled::
+
+        with import_timer('sentiment'):
+            from sentiment import get_corpus_sentiment
+
+    Only the import that actually loads the module is recorded; later
+    entries find it in sys.modules and cost nothing.
+    """
+
+    def __init__(self, module):
+        """
+        Args:
+            module (str): Name of the module the wrapped statement imports
+        """
+        self.module = module
+        self._cold = False
+        self._start = None
+
+    def __enter__(self):
+        self._cold = self.module not in sys.modules
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._cold and exc_type is None:
+            elapsed = time.perf_counter() - self._start
+            with _lock:
+                _imports.setdefault(self.module, elapsed)
+            _import_seconds.set(elapsed, module=self.module)
+        return False
+
+def mark_first_paint():
+    """
+    Record the time to first paint, once per process
+
+    Returns:
+        float: Seconds from process start to the first call
+    """
+    global _first_paint
+    with _lock:
+        if _first_paint is None:
+            _first_paint = time.time() - PROCESS_START
+            _first_paint_seconds.set(_first_paint)
+        return _first_paint
+
+def startup_report():
+    """
+    Returns:
+        dict: 'imports' (module -> seconds, in import order), 'import_total',
+            'first_paint' (None until the first page is rendered) and 'budget'
+    """
+    with _lock:
+        imports = dict(_imports)
+        first_paint = _first_paint
+    return {
+        'imports': imports,
+        'import_total': sum(imports.values()),
+        'first_paint': first_paint,
+        'budget': STARTUP_BUDGET
+    }
+
+# Run in a fresh interpreter: render the dashboard once and report from inside it
+_CHILD = """
+import json, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({script!r}, default_timeout={timeout!r}).run()
+elapsed = time.perf_counter() - start
+import startup
+report = startup.startup_report()
+report['script_seconds'] = elapsed
+report['exceptions'] = [e.value for e in app.exception]
+print(json.dumps(report))
+"""
+
+def _parse_importtime(stderr):
+    """
+    Cumulative time of each top-level import in `python -X importtime` output
+
+    Returns:
+        dict: Module name -> seconds, in import order
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        # Nested imports are indented under the module that loaded them
+        if name.startswith('  ') or not cumulative.strip().isdigit():
+            continue
+        modules[name.strip()] = int(cumulative) / 1e6
+    return modules
+
+def profile_startup(script='app.py', base_url=None, timeout=120):
+    """
+    Cold-start the dashboard in a fresh interpreter and profile it
+
+    Args:
+        script (str): Streamlit script to render
+        base_url (str): CoinGecko API root for the child (default: the
+            environment's); given one, the child uses an empty temporary
+            price store
+        timeout (float): Seconds allowed for the first run
+
+    Returns:
+        dict: startup_report() from the child plus 'script_seconds' (full
+            first run), 'exceptions' and 'top_level_imports' (cumulative
+            seconds per top-level import, from -X importtime)
+    """
+    env = dict(os.environ, CRYPTO_DASHBOARD_PREFETCH="0")
+    if base_url:
+        # Another API (the replay server) gets a throwaway store, so its
+        # data never lands in the user's price history
+        env["COINGECKO_BASE_URL"] = base_url
+        env["CRYPTO_DASHBOARD_DATA_DIR"] = tempfile.mkdtemp(prefix="crypto-startup-")
+    try:
+        child = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _CHILD.format(script=script, timeout=timeout)],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    finally:
+        if base_url:
+            shutil.rmtree(env["CRYPTO_DASHBOARD_DATA_DIR"], ignore_errors=True)
+    if child.returncode != 0:
+        raise RuntimeError(f"Startup profile failed:\n{child.stderr[-2000:]}")
+
+    report = json.loads(child.stdout.strip().splitlines()[-1])
+    report['top_level_imports'] = _parse_importtime(child.stderr)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the dashboard's cold start")
+    parser.add_argument('--script', default='app.py')
+    parser.add_argument('--online', action='store_true',
+                        help="use the real CoinGecko API instead of the local replay server")
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET,
+                        help="seconds to first paint allowed (default: %(default)s)")
+    parser.add_argument('--top', type=int, default=15, help="slowest imports to list")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.online:
+        report = profile_startup(args.script)
+    else:
+        from replay_server import ReplayServer
+        with ReplayServer() as server:
+            report = profile_startup(args.script, server.base_url)
+
+    first_paint = report['first_paint']
+    over_budget = first_paint is None or first_paint > args.budget
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        slowest = sorted(report['top_level_imports'].items(), key=lambda item: item[1],
+                         reverse=True)[:args.top]
+        print(f"{'module':<40} {'import ms':>10}")
+        for module, seconds in slowest:
+            print(f"{module:<40} {seconds * 1000:>10.1f}")
+        print()
+        print("Dashboard imports (first load):")
+        for module, seconds in report['imports'].items():
+            print(f"  {module:<38} {seconds * 1000:>10.1f}")
+        print()
+        print(f"Time to first paint: "
+              f"{'not reached' if first_paint is None else f'{first_paint:.2f}s'} "
+              f"(budget {args.budget:.2f}s)")
+        print(f"First full run:      {report['script_seconds']:.2f}s")
+        for exception in report['exceptions']:
+            print(f"Exception: {exception}")
+    sys.exit(1 if over_budget or report['exceptions'] else 0)
+
+if __name__ == "__main__":
+    main()
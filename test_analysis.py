@@ -0,0 +1,75 @@
+# Tests for analysis.py (run with: python -m pytest)
+import numpy as np
+import pandas as pd
+
+from analysis import (IncrementalCovariance, IncrementalIndicators, calculate_moving_averages,
+                      calculate_volatility, infer_periods_per_year, rolling_correlation)
+
+
+def test_infer_periods_per_year_needs_datetime_index():
+    assert infer_periods_per_year(pd.RangeIndex(60)) == 365.0
+    assert infer_periods_per_year(pd.DatetimeIndex(['2024-01-01'])) == 365.0
+    hourly = pd.date_range('2024-01-01', periods=48, freq='h')
+    assert infer_periods_per_year(hourly) == 365 * 24
+
+
+def test_calculate_volatility_on_range_index():
+    prices = np.linspace(1, 2, 60)
+    df = calculate_volatility(pd.DataFrame({'price': prices}))
+
+    returns = pd.Series(prices).pct_change()
+    expected = returns.rolling(30, min_periods=1).std()
+    np.testing.assert_allclose(df['volatility'], expected, equal_nan=True)
+    np.testing.assert_allclose(df['volatility_annualized'], expected * np.sqrt(365), equal_nan=True)
+
+
+def test_incremental_indicators_match_batch_functions():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-01-01', periods=200, freq='15s')
+    prices = pd.DataFrame({'price': 100 * np.exp(np.cumsum(rng.normal(0, 0.001, 200)))},
+                          index=index)
+    batch = calculate_volatility(calculate_moving_averages(prices))
+
+    incremental = IncrementalIndicators(periods_per_year=365 * 86400 / 15)
+    rows = pd.DataFrame([incremental.update(price, timestamp)
+                         for timestamp, price in zip(index, prices['price'])]).set_index('timestamp')
+
+    for column in ['MA_7', 'MA_30', 'MA_50', 'returns', 'volatility', 'volatility_annualized']:
+        np.testing.assert_allclose(rows[column], batch[column], rtol=1e-9, equal_nan=True,
+                                   err_msg=column)
+
+
+def _random_panel(rows=120, seed=1):
+    rng = np.random.default_rng(seed)
+    returns = rng.multivariate_normal([0, 0, 0], [[1, 0.6, 0.2], [0.6, 1, 0.4], [0.2, 0.4, 1]],
+                                      size=rows) * 0.01
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)),
+                        index=pd.date_range('2024-01-01', periods=rows, freq='h'),
+                        columns=['bitcoin', 'ethereum', 'solana'])
+
+
+def test_rolling_correlation_matches_pandas():
+    panel = _random_panel()
+    returns = np.log(panel).diff()
+
+    against = rolling_correlation(panel, window=20, against='bitcoin')
+    expected = returns.rolling(20).corr(returns['bitcoin'])
+    np.testing.assert_allclose(against, expected, atol=1e-9, equal_nan=True)
+
+    pairs = rolling_correlation(panel, window=20)
+    for left, right in pairs.columns:
+        expected = returns[left].rolling(20).corr(returns[right])
+        np.testing.assert_allclose(pairs[(left, right)], expected, atol=1e-9, equal_nan=True)
+
+
+def test_incremental_covariance_matches_window_corr():
+    panel = _random_panel()
+    returns = np.log(panel).diff()
+
+    covariance = IncrementalCovariance(panel.columns, window=30)
+    for i, prices in enumerate(panel.to_numpy()):
+        covariance.update(prices)
+        if i >= 2:
+            window = returns.iloc[max(1, i - 29):i + 1]
+            np.testing.assert_allclose(covariance.covariance(), window.cov(), atol=1e-12)
+            np.testing.assert_allclose(covariance.correlation(), window.corr(), atol=1e-9)
@@ -0,0 +1,75 @@
+# Tests for chunked.py (run with: python -m pytest)
+import numpy as np
+import pandas as pd
+
+from chunked import NpyRows, build_price_matrix, compute_indicators_chunked
+from indicators import compute_indicators
+from price_store import PriceStore
+
+REQUESTS = ['sma_7', 'ema_20', 'returns', 'volatility_30', 'rsi_14', 'macd', 'drawdown']
+
+
+def random_prices(rows=1000, coins=4, seed=0):
+    rng = np.random.default_rng(seed)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (rows, coins)), axis=0))
+    # A coin listed late and a gap in another
+    values[:300, 1] = np.nan
+    values[500:520, 2] = np.nan
+    index = pd.date_range('2024-01-01', periods=rows, freq='5min')
+    return pd.DataFrame(values, index=index, columns=[f'coin-{i}' for i in range(coins)])
+
+
+def test_chunked_matches_full_computation(tmp_path):
+    prices = random_prices()
+    expected = compute_indicators(prices, REQUESTS)
+
+    result = compute_indicators_chunked(prices, REQUESTS, str(tmp_path), dtype='float64',
+                                        chunk_rows=97)
+    assert result.chunk_rows == 97
+    assert sorted(result.names) == sorted(expected)
+    assert result.index.equals(prices.index)
+    for name, frame in expected.items():
+        chunked = result.frame(name)
+        assert list(chunked.columns) == list(frame.columns)
+        np.testing.assert_allclose(chunked.to_numpy(), frame.to_numpy(), rtol=1e-9, atol=1e-12,
+                                   equal_nan=True, err_msg=name)
+
+
+def test_chunked_reads_window_and_coin(tmp_path):
+    prices = random_prices(rows=400, coins=3, seed=1)
+    result = compute_indicators_chunked(prices, ['sma_7'], str(tmp_path), dtype='float64',
+                                        chunk_rows=64)
+    start, end = prices.index[100], prices.index[199]
+    window = result.frame('sma_7', start, end)
+    assert len(window) == 100 and window.index[0] == start and window.index[-1] == end
+
+    coin = result.coin_frame('coin-2', ['sma_7'])
+    np.testing.assert_allclose(coin['sma_7'], prices['coin-2'].rolling(7, min_periods=1).mean())
+
+
+def test_npy_rows_round_trip(tmp_path):
+    path = str(tmp_path / 'rows.npy')
+    rows = NpyRows(path, shape=(10, 3), dtype='float32')
+    rows.write(0, np.arange(15, dtype=np.float32).reshape(5, 3))
+    rows.write(5, np.arange(15, 30, dtype=np.float32).reshape(5, 3))
+    rows.close()
+
+    np.testing.assert_array_equal(np.load(path), np.arange(30, dtype=np.float32).reshape(10, 3))
+    reader = NpyRows(path)
+    np.testing.assert_array_equal(reader[2:4], np.arange(6, 12).reshape(2, 3))
+    reader.close()
+
+
+def test_build_price_matrix_forward_fills_last_price_per_step(tmp_path):
+    store = PriceStore(str(tmp_path / 'store'))
+    step = 60_000
+    start = 1_700_000_040_000
+    ticks = {'bitcoin': [(start + 10, 1.0), (start + 20, 2.0), (start + 3 * step + 5, 3.0)],
+             'ethereum': [(start + step, 5.0)]}
+    for coin, points in ticks.items():
+        store.merge(coin, 'usd', {'prices': [list(p) for p in points]}, points[0][0], points[-1][0])
+
+    matrix = build_price_matrix(['bitcoin', 'ethereum'], start, start + 4 * step, step,
+                                str(tmp_path / 'prices.npy'), store=store, dtype='float64')
+    np.testing.assert_array_equal(matrix[:, 0], [2, 2, 2, 3, 3])
+    np.testing.assert_array_equal(matrix[:, 1], [np.nan, 5, 5, 5, 5])
@@ -0,0 +1,25 @@
+# Tests for data_fetch.py (run with: python -m pytest)
+import data_fetch
+from replay_server import ReplayServer
+
+
+def test_market_scan_does_not_evict_tracked_coins(tmp_path, monkeypatch):
+    monkeypatch.setenv('CRYPTO_DASHBOARD_DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('COINGECKO_BASE_URL', data_fetch.DEFAULT_BASE_URL)
+    with ReplayServer(universe_size=1500) as server:
+        data_fetch.set_base_url(server.base_url)
+        try:
+            tracked = data_fetch.get_price_data(['bitcoin', 'ethereum'])
+            scan = data_fetch.scan_markets(1500)
+            stats = data_fetch._markets_cache.stats()
+            rows = {coin: data_fetch._markets_cache.get_stale((coin, 'usd'))
+                    for coin in ['bitcoin', 'ethereum', 'coin-01000']}
+        finally:
+            data_fetch.set_base_url(data_fetch.DEFAULT_BASE_URL)
+
+    assert len(scan) == 1500
+    # Only the tracked coins are cached, refreshed by the scan
+    assert stats['size'] == 2 and stats['evictions'] == 0
+    assert rows['coin-01000'] is None
+    assert rows['bitcoin']['timestamp'] == scan.attrs['fetched_at']
+    assert rows['ethereum']['timestamp'] > tracked['timestamp'].max()
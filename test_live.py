@@ -0,0 +1,53 @@
+# Tests for live.py (run with: python -m pytest)
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from live import TickPoller
+
+
+def test_interval_is_shortest_active_session_request():
+    poller = TickPoller(interval=15, idle_timeout=0.2)
+    poller.watch(['bitcoin'], 30, 'a')
+    assert poller.interval == 30
+    poller.watch(['ethereum'], 5, 'b')
+    assert poller.interval == 5
+    # A later slower request from another session does not slow anyone down
+    poller.watch(['bitcoin'], 60, 'c')
+    assert poller.interval == 5
+
+    time.sleep(0.25)
+    poller.watch(['bitcoin'], 30, 'a')
+    assert poller.interval == 30
+
+    time.sleep(0.25)
+    poller.watch(['bitcoin'])
+    assert poller.interval == 15
+
+
+def test_poll_advances_tick_indicators_and_correlation(tmp_path, monkeypatch):
+    import data_fetch
+    from replay_server import ReplayServer
+
+    monkeypatch.setenv('CRYPTO_DASHBOARD_DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('COINGECKO_BASE_URL', data_fetch.DEFAULT_BASE_URL)
+    with ReplayServer() as server:
+        data_fetch.set_base_url(server.base_url)
+        try:
+            poller = TickPoller(interval=15)
+            poller.watch(['bitcoin', 'ethereum'])
+            for _ in range(5):
+                assert poller.poll() == 2
+        finally:
+            data_fetch.set_base_url(data_fetch.DEFAULT_BASE_URL)
+
+    values = poller.indicators('bitcoin')
+    assert values['price'] == poller.latest('bitcoin')['price']
+    assert values['MA_7'] == pytest.approx(poller.ticks('bitcoin')['price'].mean())
+    assert poller._indicators['bitcoin'].periods_per_year == 365 * 86400 / 15
+
+    ticks = pd.DataFrame({coin: poller.ticks(coin)['price'] for coin in ['bitcoin', 'ethereum']})
+    expected = np.log(ticks).diff().corr()
+    np.testing.assert_allclose(poller.correlation(['bitcoin', 'ethereum']), expected, atol=1e-9)
@@ -0,0 +1,86 @@
+# Tests for ohlcv.py (run with: python -m pytest)
+import numpy as np
+import pytest
+
+from ohlcv import RESOLUTIONS, BarStore, aggregate_ticks
+from price_store import PriceStore
+
+START_MS = 1_700_000_000_000
+
+
+def random_ticks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = START_MS + np.cumsum(rng.integers(30_000, 600_000, n))
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    caps = np.where(rng.random(n) < 0.1, np.nan, prices * 1e6)
+    return timestamps, prices, caps
+
+
+def chart(timestamps, prices, caps, rows):
+    return {
+        'prices': [[int(t), p] for t, p in zip(timestamps[rows], prices[rows])],
+        'market_caps': [[int(t), c] for t, c in zip(timestamps[rows], caps[rows])],
+        'total_volumes': [[int(t), p * 10] for t, p in zip(timestamps[rows], prices[rows])]
+    }
+
+
+def merge(prices, ticks, rows):
+    timestamps = ticks[0]
+    prices.merge('bitcoin', 'usd', chart(*ticks, rows),
+                 int(timestamps[rows][0]), int(timestamps[rows][-1]))
+
+
+def assert_matches_full_rebuild(bars, prices):
+    raw = prices.load('bitcoin', 'usd')
+    for resolution, step in RESOLUTIONS.items():
+        np.testing.assert_allclose(bars.load('bitcoin', 'usd', resolution),
+                                   aggregate_ticks(raw, step), rtol=1e-12, equal_nan=True,
+                                   err_msg=resolution)
+
+
+@pytest.fixture
+def stores(tmp_path):
+    prices = PriceStore(str(tmp_path))
+    return prices, BarStore(prices)
+
+
+def test_incremental_update_matches_full_rebuild(stores):
+    prices, bars = stores
+    ticks = random_ticks(3000)
+
+    merge(prices, ticks, slice(0, 2000))
+    assert bars.update('bitcoin', 'usd') > 0
+    assert_matches_full_rebuild(bars, prices)
+
+    # Appended ticks only rebuild the tail of every level
+    for end in (2001, 2500, 3000):
+        merge(prices, ticks, slice(end - 10, end))
+        written = bars.update('bitcoin', 'usd')
+        assert 0 < written < sum(len(bars.load('bitcoin', 'usd', r)) for r in RESOLUTIONS)
+        assert_matches_full_rebuild(bars, prices)
+
+    assert bars.update('bitcoin', 'usd') == 0
+
+
+def test_backfilled_head_triggers_full_rebuild(stores):
+    prices, bars = stores
+    ticks = random_ticks(1500, seed=1)
+
+    merge(prices, ticks, slice(500, 1500))
+    bars.update('bitcoin', 'usd')
+    merge(prices, ticks, slice(0, 600))
+    bars.update('bitcoin', 'usd')
+    assert_matches_full_rebuild(bars, prices)
+
+
+def test_aggregate_ticks_ohlc():
+    step = RESOLUTIONS['1h']
+    rows = np.array([
+        [START_MS - START_MS % step + 1, 10.0, 1.0, 5.0],
+        [START_MS - START_MS % step + 2, 12.0, np.nan, 6.0],
+        [START_MS - START_MS % step + 3, 9.0, 3.0, 7.0],
+        [START_MS - START_MS % step + step, 11.0, 4.0, 8.0]
+    ])
+    bars = aggregate_ticks(rows, step)
+    np.testing.assert_array_equal(bars[:, 1:], [[10, 12, 9, 9, 7, 3, 3],
+                                                [11, 11, 11, 11, 8, 4, 1]])
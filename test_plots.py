@@ -0,0 +1,36 @@
+# Tests for plots.py (run with: python -m pytest)
+import numpy as np
+import pandas as pd
+
+from analysis import calculate_moving_averages
+from plots import count_points, create_price_chart, payload_report
+
+
+def random_prices(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=n, freq='min')
+    prices = pd.DataFrame({'price': 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))},
+                          index=index)
+    return calculate_moving_averages(prices, [7, 30])
+
+
+def test_count_points_sums_every_trace():
+    df = random_prices(500)
+    assert count_points(create_price_chart(df, max_points=None)) == 3 * 500
+    assert count_points(create_price_chart(df, show_ma=False, max_points=None)) == 500
+
+
+def test_payload_report_measures_downsampling():
+    df = random_prices(20000)
+    report = payload_report(create_price_chart, df, 'Bitcoin', max_points=1000)
+
+    assert report['points_before'] == 3 * 20000
+    assert report['points_after'] == 3 * 1000
+    assert report['bytes_after'] < report['bytes_before']
+    assert report['reduction'] == 1 - report['bytes_after'] / report['bytes_before']
+    assert not report['webgl']
+
+    # Without a point budget the large traces switch to WebGL instead
+    unreduced = payload_report(create_price_chart, df, 'Bitcoin', max_points=None)
+    assert unreduced['points_after'] == unreduced['points_before']
+    assert unreduced['webgl']
@@ -0,0 +1,92 @@
+# Tests for price_store.py (run with: python -m pytest)
+import numpy as np
+
+from price_store import PriceStore, chart_to_array
+
+HOUR_MS = 3_600_000
+
+
+def chart(timestamps, prices):
+    return {
+        'prices': [[t, p] for t, p in zip(timestamps, prices)],
+        'market_caps': [[t, p * 1000] for t, p in zip(timestamps, prices)],
+        'total_volumes': [[t, p * 10] for t, p in zip(timestamps, prices)]
+    }
+
+
+def test_chart_to_array_fills_unmatched_columns_with_nan():
+    data = {'prices': [[2, 20.0], [1, 10.0]], 'market_caps': [[1, 100.0]], 'total_volumes': []}
+    rows = chart_to_array(data)
+    np.testing.assert_array_equal(rows[:, 0], [1, 2])
+    np.testing.assert_array_equal(rows[:, 2], [100.0, np.nan])
+    assert np.isnan(rows[:, 3]).all()
+
+
+def test_merge_replaces_overlapping_rows_and_extends_coverage(tmp_path):
+    store = PriceStore(str(tmp_path))
+    first = [i * HOUR_MS for i in range(10)]
+    store.merge('bitcoin', 'usd', chart(first, [1.0] * 10), first[0], first[-1])
+
+    # Overlaps the last five rows of the first fetch and extends past it
+    second = [i * HOUR_MS for i in range(5, 15)]
+    store.merge('bitcoin', 'usd', chart(second, [2.0] * 10), second[0], second[-1])
+
+    rows = store.load('bitcoin', 'usd')
+    np.testing.assert_array_equal(rows[:, 0], [i * HOUR_MS for i in range(15)])
+    np.testing.assert_array_equal(rows[:, 1], [1.0] * 5 + [2.0] * 10)
+    np.testing.assert_array_equal(rows[:, 2], rows[:, 1] * 1000)
+    assert store.coverage('bitcoin', 'usd') == (0, 14 * HOUR_MS)
+
+
+def test_merge_of_disjoint_range_replaces_coverage(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.merge('bitcoin', 'usd', chart([0, HOUR_MS], [1.0, 1.0]), 0, HOUR_MS)
+    later = [100 * HOUR_MS, 101 * HOUR_MS]
+    store.merge('bitcoin', 'usd', chart(later, [3.0, 3.0]), later[0], later[-1])
+
+    assert store.coverage('bitcoin', 'usd') == (100 * HOUR_MS, 101 * HOUR_MS)
+    assert len(store.load('bitcoin', 'usd')) == 4
+
+
+def test_query_keeps_last_row_per_step(tmp_path):
+    store = PriceStore(str(tmp_path))
+    timestamps = [i * HOUR_MS // 4 for i in range(16)]
+    store.merge('ethereum', 'eur', chart(timestamps, list(range(16))), 0, timestamps[-1])
+
+    rows = store.query('ethereum', 'eur', 0, timestamps[-1], step_ms=HOUR_MS)
+    np.testing.assert_array_equal(rows[:, 1], [3, 7, 11, 15])
+    assert store.query('ethereum', 'usd', 0, timestamps[-1]).shape == (0, 4)
+
+
+def test_segments_record_sampling_step(tmp_path):
+    store = PriceStore(str(tmp_path))
+    day = 24 * HOUR_MS
+    daily = [i * day for i in range(366)]
+    store.merge('bitcoin', 'usd', chart(daily, [1.0] * 366), 0, daily[-1])
+
+    assert store.coverage('bitcoin', 'usd') == (0, daily[-1])
+    assert store.coverage('bitcoin', 'usd', day) == (0, daily[-1])
+    assert store.coverage('bitcoin', 'usd', HOUR_MS) is None
+
+    hourly = [daily[-1] - i * HOUR_MS for i in range(30 * 24, -1, -1)]
+    store.merge('bitcoin', 'usd', chart(hourly, [2.0] * len(hourly)), hourly[0], hourly[-1])
+    assert store.coverage('bitcoin', 'usd', HOUR_MS) == (hourly[0], hourly[-1])
+    assert store.coverage('bitcoin', 'usd', day) == (0, daily[-1])
+
+
+def test_365_then_30_day_fetch_keeps_hourly_sampling(tmp_path):
+    from data_fetch import CoinGeckoAPI
+    from replay_server import ReplayServer
+
+    server = ReplayServer().start()
+    try:
+        api = CoinGeckoAPI(base_url=server.base_url, store=PriceStore(str(tmp_path)))
+        yearly = api.fetch_historical_data('bitcoin', 365)
+        requests = server.requests
+        monthly = api.fetch_historical_data('bitcoin', 30)
+    finally:
+        server.stop()
+
+    assert len(yearly['prices']) <= 366
+    assert len(monthly['prices']) >= 30 * 24 - 1
+    assert server.requests > requests
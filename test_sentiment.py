@@ -0,0 +1,43 @@
+# Tests for sentiment.py (run with: python -m pytest)
+import json
+
+import pytest
+
+import sentiment
+from sentiment import SentimentIndex
+
+
+def write_posts(path, texts):
+    with open(path, 'a') as f:
+        for text in texts:
+            f.write(json.dumps({'text': text, 'created_at': 1_700_000_000}) + '\n')
+
+
+def test_failed_batch_is_scored_on_next_ingest(tmp_path, monkeypatch):
+    path = str(tmp_path / 'posts.jsonl')
+    write_posts(path, [f"bitcoin is great {i}" for i in range(10)])
+
+    score_batch = sentiment._score_batch
+    calls = []
+
+    def flaky(batch):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return score_batch(batch)
+
+    index = SentimentIndex()
+    monkeypatch.setattr(sentiment, '_score_batch', flaky)
+    with pytest.raises(RuntimeError):
+        index.ingest([path], batch_size=4, workers=1)
+    # Only the batch merged before the failure is committed
+    assert index.summary('all', 'all')['total_tweets'] == 4
+
+    monkeypatch.setattr(sentiment, '_score_batch', score_batch)
+    write_posts(path, ["bitcoin to the moon"])
+    index.ingest([path], batch_size=4, workers=1)
+    assert index.summary('all', 'all')['total_tweets'] == 11
+
+    # Nothing new: nothing is scored twice
+    assert index.ingest([path], batch_size=4, workers=1) == 0
+    assert index.summary('all', 'all')['total_tweets'] == 11
@@ -0,0 +1,40 @@
+# Tests for snapshot_store.py (run with: python -m pytest)
+import pandas as pd
+
+from snapshot_store import SnapshotStore
+
+START = pd.Timestamp('2024-01-01')
+
+
+def rows(n):
+    return [{'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin {i}',
+             'current_price': float(i), 'market_cap_rank': i + 1} for i in range(n)]
+
+
+def test_retention_drops_old_snapshots():
+    store = SnapshotStore(retention=60, capacity=4)
+    for k in range(20):
+        store.append(rows(3), fetched_at=START + pd.Timedelta(seconds=10 * k))
+
+    # Snapshots at 130 s .. 190 s are within 60 s of the last one
+    assert len(store) == 7 * 3
+    assert store.stats()['oldest'] == START + pd.Timedelta(seconds=130)
+    assert store.series(coins=['coin-2']).shape == (7, 1)
+
+
+def test_row_cap_keeps_newest_rows_and_bounds_capacity():
+    store = SnapshotStore(retention=86400, capacity=16, max_rows=1000)
+    for k in range(200):
+        store.append(rows(50), fetched_at=START + pd.Timedelta(seconds=k))
+
+    assert len(store) == 1000
+    assert len(store._timestamps) <= 2048
+    df = store.query(['coin-0'])
+    assert df['timestamp'].tolist() == [START + pd.Timedelta(seconds=k) for k in range(180, 200)]
+    assert df['name'].iloc[0] == 'Coin 0'
+
+
+def test_snapshot_larger_than_cap_keeps_its_last_rows():
+    store = SnapshotStore(max_rows=3)
+    store.append(rows(10), fetched_at=START)
+    assert store.query()['id'].tolist() == ['coin-7', 'coin-8', 'coin-9']